@@ -0,0 +1,345 @@
+"""
+Admission control and request deadlines for the detection routes.
+
+Each endpoint class (image, batch, video, stream) admits a bounded number
+of requests at a time and lets a bounded number wait for a slot. Admission
+happens in an ASGI middleware, before the upload body is read, so a spike
+is turned away without buffering uploads or decoding frames:
+
+- 429 with Retry-After when the waiting queue of the class is full
+- 503 with Retry-After when a request waited ADMISSION_QUEUE_TIMEOUT_S
+  without getting a slot
+
+Clients may send a time budget in the X-Request-Timeout-Ms header. A
+request whose budget runs out while queued, or that could no longer finish
+its backbone forward in time, is dropped with 504 before the forward runs.
+
+Uploads are capped during transfer as well: a request whose body would
+exceed MAX_FILE_SIZE_MB per file gets 413, from its Content-Length before
+any of the body is read, or as soon as the received bytes pass the cap.
+
+Limits apply per worker process (see serve.py).
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+import metrics
+from config import Config
+
+DEADLINE_HEADER = b"x-request-timeout-ms"
+
+# Detection routes (relative to the API prefix) and their endpoint class
+ENDPOINT_CLASSES = {
+    "/detect/image": "image",
+    "/detect/batch": "batch",
+    "/detect/video": "video",
+    "/detect/video/stream": "stream"
+}
+
+# Upload routes (relative to the API prefix) and the files a request may carry
+UPLOAD_ROUTES = {
+    "/detect/image": 1,
+    "/detect/batch": Config.MAX_BATCH_FILES,
+    "/detect/video": 1,
+    "/detect/video/stream": 1,
+    "/jobs/video": 1
+}
+
+# Allowance for multipart boundaries, part headers and form fields per file
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+# Absolute deadline (time.monotonic()) of the request being handled, if any
+_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+class LatencyEstimate:
+    """Exponentially weighted moving average of a duration in seconds."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def observe(self, seconds: float):
+        if self.value is None:
+            self.value = seconds
+        else:
+            self.value += self.alpha * (seconds - self.value)
+
+# Route-level backbone forward latency (scheduler wait included)
+forward_latency = LatencyEstimate()
+
+class EndpointLimiter:
+    """Bounded in-flight slots with a bounded FIFO of waiting requests."""
+
+    def __init__(self, name: str, max_in_flight: int, max_queued: int):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max(0, max_queued)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.request_latency = LatencyEstimate()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """
+        Wait for a slot.
+
+        Args:
+            timeout: Longest time to wait in the queue, in seconds
+
+        Returns:
+            None once admitted (call release when done), otherwise the
+            rejection reason: 'queue_full' or 'timeout'
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+        if len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            return 'queue_full'
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.set_admission_queued(self.name, len(self._waiters))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed over a slot as the wait timed out
+            # (same loop iteration); the slot is taken rather than leaked
+            if not (waiter.done() and not waiter.cancelled()):
+                self.timed_out += 1
+                return 'timeout'
+        except asyncio.CancelledError:
+            # A slot handed over just before the cancellation is passed on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            metrics.set_admission_queued(self.name, len(self._waiters))
+
+        self.admitted += 1
+        return None
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Free a slot, handing it to the oldest waiter if there is one."""
+        if held_seconds is not None:
+            self.request_latency.observe(held_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # The slot moves to the waiter
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new request."""
+        latency = self.request_latency.value or 1.0
+        return max(1, math.ceil(latency * (self.queued + 1) / self.max_in_flight))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected,
+            "rejected_timeout": self.timed_out,
+            "avg_request_seconds": self.request_latency.value
+        }
+
+_limiters: Optional[Dict[str, EndpointLimiter]] = None
+
+def get_limiters() -> Dict[str, EndpointLimiter]:
+    """Get or create the limiter of every endpoint class from the configured limits."""
+    global _limiters
+    if _limiters is None:
+        _limiters = {
+            name: EndpointLimiter(name, max_in_flight, max_queued)
+            for name, (max_in_flight, max_queued) in Config.get_admission_limits().items()
+        }
+    return _limiters
+
+def get_admission_stats() -> Optional[Dict[str, Any]]:
+    """Per endpoint class admission state, or None when admission control is disabled."""
+    if not Config.ADMISSION_CONTROL_ENABLED:
+        return None
+    return {name: limiter.get_stats() for name, limiter in get_limiters().items()}
+
+def get_remaining_time() -> Optional[float]:
+    """Seconds left before the current request's deadline (None without a deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_deadline(stage: str, expected_seconds: Optional[float] = None):
+    """
+    Drop the current request if it cannot finish the next stage before its deadline.
+
+    Args:
+        stage: Stage about to run (reported in the error)
+        expected_seconds: Expected duration of the stage, if known
+
+    Raises:
+        HTTPException: 504 when the deadline has passed or is too close
+    """
+    remaining = get_remaining_time()
+    if remaining is None or remaining > (expected_seconds or 0.0):
+        return
+
+    metrics.observe_admission_rejection(ENDPOINT_CLASSES.get(metrics.get_endpoint(), 'other'), 'deadline')
+    raise HTTPException(
+        status_code=504,
+        detail=f"Request deadline cannot be met; dropped before {stage}"
+    )
+
+def _parse_timeout_ms(headers) -> Tuple[Optional[float], Optional[str]]:
+    for name, value in headers:
+        if name == DEADLINE_HEADER:
+            try:
+                timeout_ms = float(value)
+            except ValueError:
+                return None, "X-Request-Timeout-Ms must be a number of milliseconds"
+            if not timeout_ms > 0:
+                return None, "X-Request-Timeout-Ms must be positive"
+            return timeout_ms / 1000, None
+    return None, None
+
+async def _send_error(send, status_code: int, error: str, detail: str, retry_after: Optional[int] = None):
+    headers = [(b"content-type", b"application/json")]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({
+        "type": "http.response.body",
+        "body": json.dumps({"success": False, "error": error, "detail": detail}).encode()
+    })
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying the endpoint class limits and request deadlines.
+    
+    Deadlines are honoured even with ADMISSION_CONTROL_ENABLED=False.
+
+    Args:
+        app: The wrapped ASGI app
+        prefix: Prefix the detection routes are mounted under
+    """
+
+    def __init__(self, app, prefix: str = ""):
+        self.app = app
+        self.routes = {prefix + path: name for path, name in ENDPOINT_CLASSES.items()}
+
+    async def __call__(self, scope, receive, send):
+        endpoint_class = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if endpoint_class is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        timeout, error = _parse_timeout_ms(scope["headers"])
+        if error:
+            await _send_error(send, 400, "Invalid deadline", error)
+            return
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        limiter = get_limiters()[endpoint_class] if Config.ADMISSION_CONTROL_ENABLED else None
+        queue_timeout = Config.ADMISSION_QUEUE_TIMEOUT_S
+        if timeout is not None:
+            queue_timeout = min(queue_timeout, timeout)
+
+        reason = await limiter.acquire(queue_timeout) if limiter is not None else None
+        if reason is not None:
+            if deadline is not None and time.monotonic() >= deadline:
+                reason = 'deadline'
+            metrics.observe_admission_rejection(endpoint_class, reason)
+            if reason == 'queue_full':
+                await _send_error(send, 429, "Too many requests",
+                                  f"The {endpoint_class} queue is full; retry later",
+                                  limiter.retry_after())
+            elif reason == 'timeout':
+                await _send_error(send, 503, "Service overloaded",
+                                  f"No {endpoint_class} slot became free in {queue_timeout:g}s; retry later",
+                                  limiter.retry_after())
+            else:
+                await _send_error(send, 504, "Deadline exceeded",
+                                  "Request deadline passed while waiting to be admitted")
+            return
+
+        admitted_at = time.monotonic()
+        token = _deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
+            if limiter is not None:
+                limiter.release(time.monotonic() - admitted_at)
+
+def _get_content_length(headers) -> Optional[int]:
+    for name, value in headers:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware cutting off upload requests larger than the file size limit.
+    
+    Starlette spools the whole multipart body before a route runs, so the
+    limit has to be applied while the body is received: the cap of a route
+    is MAX_FILE_SIZE_MB for each file it accepts, plus UPLOAD_OVERHEAD_BYTES
+    per file. The routes still check every file against MAX_FILE_SIZE_MB.
+    
+    Args:
+        app: The wrapped ASGI app
+        prefix: Prefix the upload routes are mounted under
+    """
+
+    def __init__(self, app, prefix: str = ""):
+        self.app = app
+        self.routes = {prefix + path: files for path, files in UPLOAD_ROUTES.items()}
+
+    async def __call__(self, scope, receive, send):
+        files = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if files is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = files * (Config.get_file_size_limit_bytes() + UPLOAD_OVERHEAD_BYTES)
+        detail = f"Request exceeds the upload limit of {Config.MAX_FILE_SIZE_MB:g} MB per file"
+
+        content_length = _get_content_length(scope["headers"])
+        if content_length is not None and content_length > limit:
+            await _send_error(send, 413, "Upload too large", detail)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised while the form is parsed, so the route never runs
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,183 @@
+"""
+Inference backends for the ViT backbone.
+
+The backbone (up to the CLS embedding) can be served by eager PyTorch, a
+traced TorchScript module or an ONNX Runtime session. Exported artifacts
+are cached on disk, keyed by a fingerprint of the weights and the
+software versions, so the export only runs once per model.
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Dict
+
+import torch
+import torch.nn as nn
+
+try:
+    import onnxruntime
+except ImportError:  # ONNX Runtime is optional
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+BACKEND_NAMES = ('eager', 'torchscript', 'onnx')
+
+class CLSEmbedding(nn.Module):
+    """Backbone wrapper returning only the CLS token embedding (the exported graph)."""
+
+    def __init__(self, backbone: nn.Module):
+        super().__init__()
+        self.backbone = backbone
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.backbone(pixel_values=pixel_values).last_hidden_state[:, 0, :]
+
+class TorchScriptBackend:
+    """Serves a traced TorchScript module."""
+
+    name = 'torchscript'
+    extension = '.pt'
+
+    def __init__(self, path: str, device: torch.device):
+        self.path = path
+        self.module = torch.jit.load(path, map_location=device)
+        self.module.eval()
+
+    @staticmethod
+    def export(module: nn.Module, example: torch.Tensor, path: str):
+        with torch.no_grad():
+            traced = torch.jit.trace(module, example, strict=False, check_trace=False)
+        traced.save(path)
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return self.module(x)
+
+class OnnxRuntimeBackend:
+    """Serves an ONNX export through ONNX Runtime."""
+
+    name = 'onnx'
+    extension = '.onnx'
+
+    def __init__(self, path: str, device: torch.device):
+        if onnxruntime is None:
+            raise RuntimeError("onnxruntime is not installed")
+
+        providers = ['CPUExecutionProvider']
+        if device.type == 'cuda' and 'CUDAExecutionProvider' in onnxruntime.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, sess_options=options, providers=providers)
+
+    @staticmethod
+    def export(module: nn.Module, example: torch.Tensor, path: str):
+        with torch.no_grad():
+            torch.onnx.export(
+                module, example, path,
+                input_names=['pixel_values'],
+                output_names=['embedding'],
+                dynamic_axes={'pixel_values': {0: 'batch'}, 'embedding': {0: 'batch'}},
+                opset_version=17,
+                dynamo=False
+            )
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        (embedding,) = self.session.run(['embedding'], {'pixel_values': x.detach().cpu().numpy()})
+        return torch.from_numpy(embedding).to(x.device)
+
+BACKEND_CLASSES = {
+    'torchscript': TorchScriptBackend,
+    'onnx': OnnxRuntimeBackend
+}
+
+def weights_fingerprint(module: nn.Module) -> str:
+    """Cheap fingerprint of a module's weights (names, shapes and sums)."""
+    digest = hashlib.sha256()
+    for name, tensor in module.state_dict().items():
+        if not isinstance(tensor, torch.Tensor):
+            continue
+        digest.update(f"{name}|{tuple(tensor.shape)}|{tensor.dtype}|".encode('utf-8'))
+        if tensor.is_floating_point():
+            digest.update(f"{tensor.double().sum().item():.10e}".encode('utf-8'))
+    return digest.hexdigest()
+
+def get_artifact_path(cache_dir: str, backend: str, fingerprint: str, precision: str,
+                      device: torch.device, image_size: int) -> str:
+    """Cache path of an exported backbone."""
+    versions = f"torch {torch.__version__}"
+    if backend == 'onnx' and onnxruntime is not None:
+        versions += f" onnxruntime {onnxruntime.__version__}"
+    key = hashlib.sha256(
+        f"{fingerprint}|{precision}|{device.type}|{image_size}|{versions}".encode('utf-8')
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"backbone-{backend}-{precision}-{key}{BACKEND_CLASSES[backend].extension}")
+
+def compare_embeddings(backend: Any, reference_fn, image_size: int, device: torch.device,
+                       batch_sizes=(1, 3)) -> float:
+    """
+    Maximum difference between backend and eager embeddings, relative to the
+    largest eager activation, over random batches of several sizes.
+    """
+    generator = torch.Generator().manual_seed(0)
+    worst = 0.0
+    for batch_size in batch_sizes:
+        x = torch.randn(batch_size, 3, image_size, image_size, generator=generator).to(device)
+        with torch.no_grad():
+            expected = reference_fn(x).float()
+            actual = backend(x).float()
+        scale = expected.abs().max().clamp_min(1e-6)
+        worst = max(worst, ((actual - expected).abs().max() / scale).item())
+    return worst
+
+def load_backend(name: str, module: nn.Module, reference_fn, fingerprint: str, precision: str,
+                 device: torch.device, image_size: int, cache_dir: str,
+                 tolerance: float) -> Dict[str, Any]:
+    """
+    Export (or reuse the cached export of) the backbone and verify it.
+
+    Args:
+        name: torchscript or onnx
+        module: CLSEmbedding wrapper around the eager backbone
+        reference_fn: Eager function producing CLS embeddings, used for the check
+        fingerprint: Weights fingerprint used in the cache key
+        precision: Active precision mode (part of the cache key)
+        device: Device serving the backbone
+        image_size: Input height and width
+        cache_dir: Directory for exported artifacts
+        tolerance: Maximum relative difference from eager embeddings
+
+    Returns:
+        Dictionary with the backend instance, artifact path and measured difference
+
+    Raises:
+        RuntimeError: If the export fails or its output is outside the tolerance
+    """
+    backend_class = BACKEND_CLASSES[name]
+    if name == 'onnx' and onnxruntime is None:
+        raise RuntimeError("onnxruntime is not installed")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = get_artifact_path(cache_dir, name, fingerprint, precision, device, image_size)
+
+    if not os.path.exists(path):
+        logger.info(f"Exporting backbone to {name}: {path}")
+        example = torch.randn(2, 3, image_size, image_size, device=device)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            backend_class.export(module, example, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    backend = backend_class(path, device)
+    difference = compare_embeddings(backend, reference_fn, image_size, device)
+    if difference > tolerance:
+        raise RuntimeError(
+            f"{name} embeddings differ from eager by {difference:.2e} (tolerance {tolerance:.0e})"
+        )
+
+    return {'backend': backend, 'artifact': path, 'max_relative_difference': difference}
@@ -0,0 +1 @@
+"""Benchmarks for the detection pipeline. Run from the backend directory, e.g. `python -m benchmarks.preprocess`."""
@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import torch
+from huggingface_hub import hf_hub_download
+
+from config import Config
+from heads import convert_classifier, check_parity, make_probe_features
+from models import CLASSIFIER_FILES
+from benchmarks.preprocess import time_call
+
+def load_estimator(classifier_type: str, artifact_dir: Optional[str] = None) -> Any:
+    """Load a sklearn classifier from a local artifact directory or the hub."""
+    filename = CLASSIFIER_FILES[classifier_type]
+    if artifact_dir:
+        path = os.path.join(artifact_dir, filename)
+    else:
+        path = hf_hub_download(repo_id=Config.DEFAULT_MODEL_REPO, filename=filename)
+    return joblib.load(path)
+
+def benchmark_head(classifier_type: str, estimator: Any, batch_sizes: List[int], repeats: int,
+                   device: torch.device, features: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Check a converted head against its sklearn estimator and time both.
+
+    Args:
+        classifier_type: Classifier name
+        estimator: Fitted sklearn estimator
+        batch_sizes: Batch sizes to time
+        repeats: Timing repeats per measurement (best is kept)
+        device: Device for the torch head
+        features: Embeddings for the parity check (default: random probe embeddings)
+
+    Returns:
+        Parity statistics and per-batch timings
+    """
+    head = convert_classifier(estimator).to(device)
+    parity = check_parity(estimator, head, features)
+
+    timings = []
+    probe = make_probe_features(estimator, n_samples=max(batch_sizes), seed=1)
+    for batch_size in batch_sizes:
+        batch = probe[:batch_size]
+        batch_tensor = torch.as_tensor(batch, device=device)
+
+        def run_head():
+            with torch.no_grad():
+                head(batch_tensor).tolist()  # Includes the copy of the labels to the host
+
+        sklearn_time = time_call(lambda: estimator.predict(batch), repeats)
+        torch_time = time_call(run_head, repeats)
+        timings.append({
+            'batch_size': batch_size,
+            'sklearn_ms': sklearn_time * 1000,
+            'torch_ms': torch_time * 1000,
+            'speedup': sklearn_time / torch_time
+        })
+
+    return {'classifier': classifier_type, 'parity': parity, 'timings': timings}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check torch classifier heads against sklearn and time them")
+    parser.add_argument("--classifiers", nargs="+", default=Config.AVAILABLE_CLASSIFIERS)
+    parser.add_argument("--artifact-dir", default=None,
+                        help="Directory containing the sklearn/ artifacts (default: download from the hub)")
+    parser.add_argument("--features", default=None,
+                        help="Optional .npy file of real CLS embeddings for the parity check")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 100])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    features = np.load(args.features).astype(np.float32) if args.features else None
+    device = torch.device(args.device)
+    failed = False
+
+    for classifier_type in args.classifiers:
+        estimator = load_estimator(classifier_type, args.artifact_dir)
+        result = benchmark_head(classifier_type, estimator, args.batch_sizes, args.repeats, device, features)
+        parity = result['parity']
+        failed = failed or parity['mismatches'] > 0
+
+        print(f"{classifier_type} ({type(estimator).__name__}): "
+              f"{parity['samples'] - parity['mismatches']}/{parity['samples']} predictions match sklearn")
+        print(f"{'batch':>8} {'sklearn ms':>11} {'torch ms':>9} {'speedup':>9}")
+        for row in result['timings']:
+            print(f"{row['batch_size']:>8} {row['sklearn_ms']:>11.3f} {row['torch_ms']:>9.3f} {row['speedup']:>8.1f}x")
+        print()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+from sklearn.neighbors import KNeighborsClassifier
+
+from heads import KNNHead
+from benchmarks.heads import load_estimator
+
+def make_synthetic_knn(reference_size: int, dim: int, n_neighbors: int, seed: int = 0) -> KNeighborsClassifier:
+    """Fit a KNN classifier on clustered random embeddings (a stand-in for the shipped reference set)."""
+    rng = np.random.default_rng(seed)
+    n_clusters = max(2, reference_size // 500)
+    centers = rng.standard_normal((n_clusters, dim)) * 4
+    cluster_ids = rng.integers(0, n_clusters, reference_size)
+    X = (centers[cluster_ids] + rng.standard_normal((reference_size, dim))).astype(np.float32)
+    # Labels follow the clusters with some noise so votes are not trivial
+    y = (cluster_ids % 2) ^ (rng.random(reference_size) < 0.2)
+    return KNeighborsClassifier(n_neighbors=n_neighbors).fit(X, y.astype(int))
+
+def make_queries(estimator: KNeighborsClassifier, n_queries: int, noise: float = 0.25,
+                 seed: int = 1) -> np.ndarray:
+    """Perturbed reference embeddings, so queries fall where real embeddings do."""
+    rng = np.random.default_rng(seed)
+    reference = np.asarray(estimator._fit_X, dtype=np.float32)
+    rows = reference[rng.integers(0, len(reference), n_queries)]
+    return (rows + noise * reference.std(axis=0) * rng.standard_normal(rows.shape)).astype(np.float32)
+
+def measure(predict, queries: np.ndarray, batch_size: int) -> Dict[str, Any]:
+    """Run predict over the queries in batches and return labels and queries/sec."""
+    labels = []
+    start = time.perf_counter()
+    for offset in range(0, len(queries), batch_size):
+        labels.append(np.asarray(predict(queries[offset:offset + batch_size])))
+    elapsed = time.perf_counter() - start
+    return {'labels': np.concatenate(labels), 'qps': len(queries) / elapsed}
+
+def benchmark_knn(estimator: KNeighborsClassifier, queries: np.ndarray, batch_size: int,
+                  block_sizes: List[int], ivf_lists: int, ivf_probes: List[int],
+                  device: torch.device) -> List[Dict[str, Any]]:
+    """
+    Compare sklearn with the exact and IVF neighbour indexes.
+
+    Args:
+        estimator: Fitted KNeighborsClassifier
+        queries: Query embeddings
+        batch_size: Queries per predict call
+        block_sizes: Exact index block sizes to try
+        ivf_lists: Number of IVF lists (0 for sqrt of the reference set size)
+        ivf_probes: IVF n_probe values to try
+        device: Device for the torch heads
+
+    Returns:
+        One row per configuration with queries/sec and label agreement with sklearn
+    """
+    reference = measure(estimator.predict, queries, batch_size)
+    rows = [{'index': 'sklearn', 'setting': '', 'qps': reference['qps'], 'agreement': 1.0, 'build_s': 0.0}]
+
+    configurations = [('exact', {'index': 'exact', 'block_size': size}, f"block={size}") for size in block_sizes]
+    configurations += [
+        ('ivf', {'index': 'ivf', 'ivf_lists': ivf_lists, 'ivf_probe': probe}, f"probe={probe}")
+        for probe in ivf_probes
+    ]
+
+    for name, options, setting in configurations:
+        build_start = time.perf_counter()
+        head = KNNHead.from_sklearn(estimator, **options).to(device)
+        build_time = time.perf_counter() - build_start
+        if name == 'ivf':
+            setting = f"lists={head.index.n_lists} {setting}"
+
+        def predict(batch):
+            with torch.no_grad():
+                return head(torch.as_tensor(batch, device=device)).cpu().numpy()
+
+        result = measure(predict, queries, batch_size)
+        rows.append({
+            'index': name,
+            'setting': setting,
+            'qps': result['qps'],
+            'agreement': float((result['labels'] == reference['labels']).mean()),
+            'build_s': build_time
+        })
+
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KNN neighbour indexes against sklearn")
+    parser.add_argument("--artifact-dir", default=None,
+                        help="Use the shipped KNN artifact from this directory instead of synthetic data")
+    parser.add_argument("--from-hub", action="store_true", help="Download the shipped KNN artifact")
+    parser.add_argument("--reference-size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--n-neighbors", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=[4096, 65536])
+    parser.add_argument("--ivf-lists", type=int, default=0)
+    parser.add_argument("--ivf-probes", type=int, nargs="+", default=[1, 4, 8, 32])
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    if args.artifact_dir or args.from_hub:
+        estimator = load_estimator('knn', args.artifact_dir)
+    else:
+        estimator = make_synthetic_knn(args.reference_size, args.dim, args.n_neighbors)
+    queries = make_queries(estimator, args.queries)
+
+    print(f"KNN reference set: {estimator.n_samples_fit_} x {estimator.n_features_in_}, "
+          f"k={estimator.n_neighbors}, {args.queries} queries in batches of {args.batch_size}")
+    print(f"{'index':>8} {'setting':>20} {'build s':>8} {'queries/s':>10} {'agreement':>10}")
+    rows = benchmark_knn(estimator, queries, args.batch_size, args.block_sizes,
+                         args.ivf_lists, args.ivf_probes, torch.device(args.device))
+    for row in rows:
+        print(f"{row['index']:>8} {row['setting']:>20} {row['build_s']:>8.2f} "
+              f"{row['qps']:>10.0f} {row['agreement']:>10.2%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.suite import make_image_bytes, make_video, parse_resolution
+
+REQUEST_KINDS = ('image', 'batch', 'video')
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a traffic mix such as 'image=0.7,batch=0.2,video=0.1' into normalized weights."""
+    weights = {}
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}; choose from {', '.join(REQUEST_KINDS)}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    return {kind: weight / total for kind, weight in weights.items() if weight > 0}
+
+def make_workload(image_resolution: str, pool_size: int, video_frames: int, video_resolution: str,
+                  workdir: str) -> Dict[str, Any]:
+    """Synthetic uploads: a pool of distinct images and one video."""
+    width, height = parse_resolution(image_resolution)
+    images = [make_image_bytes(width, height, seed=seed) for seed in range(pool_size)]
+
+    video_path = os.path.join(workdir, 'load.mp4')
+    if not make_video(video_path, video_frames, *parse_resolution(video_resolution), codec='mp4v'):
+        raise RuntimeError("OpenCV cannot write mp4v videos here")
+    with open(video_path, 'rb') as f:
+        video = f.read()
+
+    return {'images': images, 'video': video}
+
+def build_request(kind: str, workload: Dict[str, Any], rng: random.Random, model_type: str,
+                  image_payload: str, batch_files: int, max_frames: int) -> Dict[str, Any]:
+    """Arguments for one request of the given kind."""
+    data = {'model_type': model_type, 'image_payload': image_payload}
+    if kind == 'image':
+        return {
+            'url': '/api/v1/detect/image',
+            'files': {'file': ('image.jpg', rng.choice(workload['images']), 'image/jpeg')},
+            'data': data
+        }
+    if kind == 'batch':
+        return {
+            'url': '/api/v1/detect/batch',
+            'files': [
+                ('files', (f"image{i}.jpg", content, 'image/jpeg'))
+                for i, content in enumerate(rng.sample(workload['images'], min(batch_files, len(workload['images']))))
+            ],
+            'data': data
+        }
+    return {
+        'url': '/api/v1/detect/video',
+        'files': {'file': ('video.mp4', workload['video'], 'video/mp4')},
+        'data': {**data, 'max_frames': max_frames}
+    }
+
+async def run_load(client: httpx.AsyncClient, workload: Dict[str, Any], mix: Dict[str, float],
+                   concurrency: int, duration: float, warmup: float, seed: int,
+                   **request_options) -> List[Dict[str, Any]]:
+    """
+    Drive closed-loop traffic: each of `concurrency` clients sends a request,
+    waits for the response and immediately sends the next one.
+
+    Args:
+        client: HTTP client for the app
+        workload: Synthetic uploads from make_workload
+        mix: Request kind weights
+        concurrency: Concurrent clients
+        duration: Measured seconds
+        warmup: Seconds of traffic before measuring (not recorded)
+        seed: Seed for the request sequence
+        request_options: model_type, image_payload, batch_files, max_frames
+
+    Returns:
+        One record per measured request (kind, start, latency, status)
+    """
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    records = []
+    start_time = time.perf_counter()
+    measure_from = start_time + warmup
+    stop_at = measure_from + duration
+
+    async def client_loop(index: int):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < stop_at:
+            kind = rng.choices(kinds, weights)[0]
+            request = build_request(kind, workload, rng, **request_options)
+            sent_at = time.perf_counter()
+            try:
+                response = await client.post(request['url'], files=request['files'], data=request['data'])
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            finished_at = time.perf_counter()
+            if sent_at >= measure_from and finished_at <= stop_at:
+                records.append({'kind': kind, 'start': sent_at - measure_from,
+                                'latency': finished_at - sent_at, 'status': status})
+
+    await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    return records
+
+def summarize(records: List[Dict[str, Any]], duration: float) -> Dict[str, Dict[str, Any]]:
+    """Latency percentiles and throughput per request kind and overall."""
+    summary = {}
+    for kind in (*REQUEST_KINDS, 'all'):
+        selected = [r for r in records if kind == 'all' or r['kind'] == kind]
+        if not selected:
+            continue
+        ok = np.array([r['latency'] for r in selected if r['status'] == 200]) * 1000
+        summary[kind] = {
+            'requests': len(selected),
+            'errors': sum(1 for r in selected if r['status'] != 200),
+            'throughput_rps': len(selected) / duration,
+            'p50_ms': float(np.percentile(ok, 50)) if ok.size else None,
+            'p95_ms': float(np.percentile(ok, 95)) if ok.size else None,
+            'p99_ms': float(np.percentile(ok, 99)) if ok.size else None,
+            'max_ms': float(ok.max()) if ok.size else None
+        }
+    return summary
+
+@asynccontextmanager
+async def open_client(url: Optional[str], timeout: float):
+    """Client for a running server, or for the app in this process (lifespan included)."""
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://app', timeout=timeout) as client:
+            # Wait for the preload and warmup, as a load balancer would
+            while (await client.get('/api/v1/ready')).status_code != 200:
+                await asyncio.sleep(0.2)
+            yield client
+
+async def main_async(args):
+    mix = parse_mix(args.mix)
+    if not args.url and not args.cache:
+        import routes
+        routes.embedding_cache = None
+
+    with tempfile.TemporaryDirectory(prefix="deepfake-load-") as workdir:
+        workload = make_workload(args.image_resolution, args.pool_size, args.video_frames,
+                                 args.video_resolution, workdir)
+        async with open_client(args.url, args.timeout) as client:
+            records = await run_load(
+                client, workload, mix, args.concurrency, args.duration, args.warmup, args.seed,
+                model_type=args.model_type, image_payload=args.image_payload,
+                batch_files=args.batch_files, max_frames=args.max_frames
+            )
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent image, batch and video traffic and report latency percentiles"
+    )
+    parser.add_argument("--url", default=None,
+                        help="Base URL of a running server (default: run the app in this process)")
+    parser.add_argument("--mix", default="image=0.7,batch=0.2,video=0.1", help="Request kind weights")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds of traffic first")
+    parser.add_argument("--model-type", default="knn")
+    parser.add_argument("--image-payload", default="none")
+    parser.add_argument("--image-resolution", default="1280x720")
+    parser.add_argument("--pool-size", type=int, default=64, help="Distinct synthetic images")
+    parser.add_argument("--batch-files", type=int, default=8)
+    parser.add_argument("--video-frames", type=int, default=150)
+    parser.add_argument("--video-resolution", default="640x360")
+    parser.add_argument("--max-frames", type=int, default=30)
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the embedding cache enabled (in-process mode)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the summary and settings as JSON")
+    args = parser.parse_args()
+
+    records = asyncio.run(main_async(args))
+    summary = summarize(records, args.duration)
+
+    print(f"{args.concurrency} clients for {args.duration:.0f}s against {args.url or 'the in-process app'}")
+    print(f"{'kind':>6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for kind, row in summary.items():
+        latencies = ''.join(
+            f" {row[key]:>8.1f}" if row[key] is not None else f" {'-':>8}"
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        )
+        print(f"{kind:>6} {row['requests']:>9} {row['errors']:>7} {row['throughput_rps']:>8.2f}{latencies}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'summary': summary}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import copy
+import os
+from typing import Any, Dict, List
+
+import torch
+
+from config import Config
+from models import VITContrastiveHF, PRECISION_MODES
+from utils import ImageProcessor, VideoProcessor
+from benchmarks.preprocess import time_call
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+def load_samples(sample_dir: str, frames_per_video: int) -> torch.Tensor:
+    """
+    Preprocess every image (and frames sampled from every video) in a directory.
+
+    Args:
+        sample_dir: Directory of sample images and videos (searched recursively)
+        frames_per_video: Frames sampled from each video
+
+    Returns:
+        Tensor of shape (num_samples, 3, 224, 224)
+    """
+    tensors = []
+    for root, _, filenames in os.walk(sample_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            extension = os.path.splitext(filename)[1].lower()
+            if extension in IMAGE_EXTENSIONS:
+                with open(path, 'rb') as f:
+                    tensors.append(ImageProcessor.decode_and_preprocess(f.read(), keep_image=False)[1])
+            elif extension in VIDEO_EXTENSIONS:
+                frames = VideoProcessor.extract_frames(path, max_frames=frames_per_video)
+                if frames:
+                    tensors.append(VideoProcessor.frames_to_tensors(frames))
+
+    if not tensors:
+        raise ValueError(f"No images or videos found in {sample_dir}")
+    return torch.cat(tensors)
+
+def embed(model: VITContrastiveHF, samples: torch.Tensor, batch_size: int) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat([
+            model.extract_features(samples[start:start + batch_size])
+            for start in range(0, samples.shape[0], batch_size)
+        ])
+
+def evaluate_precision(model: VITContrastiveHF, samples: torch.Tensor, modes: List[str],
+                       batch_size: int, repeats: int) -> List[Dict[str, Any]]:
+    """
+    Compare reduced-precision backbones with fp32.
+
+    Args:
+        model: fp32 model with the classifier heads to compare loaded
+        samples: Preprocessed sample tensors
+        modes: Precision modes to evaluate
+        batch_size: Forward batch size
+        repeats: Timing repeats (best is kept)
+
+    Returns:
+        One row per mode with embedding drift, verdict agreement per
+        classifier and forward latency
+    """
+    reference = embed(model, samples, batch_size)
+    with torch.no_grad():
+        reference_predictions = {name: model.classify(reference, name) for name in model.loaded_classifiers}
+    timing_batch = samples[:batch_size]
+
+    rows = []
+    for mode in modes:
+        candidate = copy.deepcopy(model)
+        if candidate.set_precision(mode) != mode:
+            print(f"Skipping {mode}: not supported on {candidate.device}")
+            continue
+
+        features = embed(candidate, samples, batch_size)
+        cosine = torch.nn.functional.cosine_similarity(features, reference, dim=1)
+        relative_error = (features - reference).norm(dim=1) / reference.norm(dim=1)
+
+        with torch.no_grad():
+            agreement = {
+                name: (candidate.classify(features, name) == expected).float().mean().item()
+                for name, expected in reference_predictions.items()
+            }
+
+        rows.append({
+            'mode': mode,
+            'cosine_mean': cosine.mean().item(),
+            'cosine_min': cosine.min().item(),
+            'relative_error_max': relative_error.max().item(),
+            'agreement': agreement,
+            'batch_ms': time_call(lambda: embed(candidate, timing_batch, batch_size), repeats) * 1000
+        })
+
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare embedding drift and verdict agreement of precision modes against fp32"
+    )
+    parser.add_argument("sample_dir", help="Directory of local sample images and videos")
+    parser.add_argument("--modes", nargs="+", default=list(PRECISION_MODES), choices=PRECISION_MODES)
+    parser.add_argument("--classifiers", nargs="+", default=Config.AVAILABLE_CLASSIFIERS)
+    parser.add_argument("--frames-per-video", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    samples = load_samples(args.sample_dir, args.frames_per_video)
+    model = VITContrastiveHF(
+        repo_name=Config.DEFAULT_MODEL_REPO,
+        classificator_type=args.classifiers[0],
+        torch_heads=Config.TORCH_CLASSIFIER_HEADS,
+        knn_options=Config.get_knn_options()
+    )
+    for name in args.classifiers:
+        model.load_classifier(name)
+    model.eval()
+
+    print(f"{samples.shape[0]} samples, batch size {args.batch_size}, {torch.get_num_threads()} threads")
+    header = f"{'mode':>6} {'cos mean':>9} {'cos min':>8} {'max rel err':>12} {'batch ms':>9}"
+    print(header + ''.join(f" {name + ' agree':>13}" for name in args.classifiers))
+    for row in evaluate_precision(model, samples, args.modes, args.batch_size, args.repeats):
+        line = (f"{row['mode']:>6} {row['cosine_mean']:>9.5f} {row['cosine_min']:>8.5f} "
+                f"{row['relative_error_max']:>12.4f} {row['batch_ms']:>9.1f}")
+        print(line + ''.join(f" {row['agreement'][name]:>13.2%}" for name in args.classifiers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import io
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+from PIL import Image
+
+from utils import VideoProcessor, ImageProcessor
+
+def time_call(func: Callable, repeats: int) -> float:
+    """Return the best wall time of func over several repeats, in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark_frames_to_tensors(frame_counts: List[int], height: int, width: int,
+                                repeats: int) -> List[Dict[str, float]]:
+    """
+    Compare the per-frame PIL path with the vectorized frames_to_tensors path.
+    
+    Args:
+        frame_counts: Batch sizes to benchmark
+        height: Frame height in pixels
+        width: Frame width in pixels
+        repeats: Timing repeats per measurement (best is kept)
+        
+    Returns:
+        List of result rows
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    
+    for count in frame_counts:
+        frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+        
+        # Both paths must produce identical pixels
+        if not torch.equal(VideoProcessor.frames_to_tensors(frames),
+                           VideoProcessor._frames_to_tensors_pil(frames)):
+            raise AssertionError("Vectorized preprocessing does not match image_transform")
+        
+        pil_time = time_call(lambda: VideoProcessor._frames_to_tensors_pil(frames), repeats)
+        vectorized_time = time_call(lambda: VideoProcessor.frames_to_tensors(frames), repeats)
+        
+        results.append({
+            'frames': count,
+            'pil_ms_per_frame': pil_time * 1000 / count,
+            'vectorized_ms_per_frame': vectorized_time * 1000 / count,
+            'speedup': pil_time / vectorized_time
+        })
+    
+    return results
+
+def benchmark_image_decode(resolutions: List[str], repeats: int) -> List[Dict[str, float]]:
+    """
+    Compare full decoding with center-crop decoding for uploaded images.
+    
+    Args:
+        resolutions: Image sizes as WIDTHxHEIGHT strings
+        repeats: Timing repeats per measurement (best is kept)
+        
+    Returns:
+        List of result rows
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    
+    for resolution in resolutions:
+        width, height = (int(value) for value in resolution.split('x'))
+        # Smooth content compresses like a photo; pure noise would not
+        small = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+        image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+        
+        for image_format in ('JPEG', 'PNG'):
+            buffer = io.BytesIO()
+            image.save(buffer, format=image_format)
+            file_content = buffer.getvalue()
+            
+            full = lambda: ImageProcessor.decode_and_preprocess(file_content, keep_image=True)
+            crop = lambda: ImageProcessor.decode_and_preprocess(file_content, keep_image=False)
+            
+            if not torch.equal(full()[1], crop()[1]):
+                raise AssertionError("Center-crop decoding does not match full decoding")
+            
+            full_time = time_call(full, repeats)
+            crop_time = time_call(crop, repeats)
+            
+            # Size of the RGB buffer each path decodes into
+            box = ImageProcessor.get_center_crop_box(width, height)
+            decoded_rows = box[3] if box is not None else height
+            
+            results.append({
+                'resolution': resolution,
+                'format': image_format,
+                'full_ms': full_time * 1000,
+                'crop_ms': crop_time * 1000,
+                'full_decoded_mb': width * height * 3 / (1024 * 1024),
+                'crop_decoded_mb': width * decoded_rows * 3 / (1024 * 1024)
+            })
+    
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame and image preprocessing")
+    parser.add_argument("--frames", type=int, nargs="+", default=[1, 8, 30, 100])
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--image-resolutions", nargs="+", default=["640x480", "1920x1080", "6000x4000"])
+    args = parser.parse_args()
+    
+    print(f"frames_to_tensors on {args.width}x{args.height} frames")
+    print(f"{'frames':>8} {'pil ms/frame':>14} {'vectorized ms/frame':>21} {'speedup':>9}")
+    for row in benchmark_frames_to_tensors(args.frames, args.height, args.width, args.repeats):
+        print(f"{row['frames']:>8} {row['pil_ms_per_frame']:>14.3f} "
+              f"{row['vectorized_ms_per_frame']:>21.3f} {row['speedup']:>8.1f}x")
+    
+    print()
+    print("Image decode + preprocess (full decode vs center-crop decode)")
+    print(f"{'resolution':>11} {'format':>7} {'full ms':>9} {'crop ms':>9} {'full buf MB':>12} {'crop buf MB':>12}")
+    for row in benchmark_image_decode(args.image_resolutions, args.repeats):
+        print(f"{row['resolution']:>11} {row['format']:>7} {row['full_ms']:>9.1f} {row['crop_ms']:>9.1f} "
+              f"{row['full_decoded_mb']:>12.1f} {row['crop_decoded_mb']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
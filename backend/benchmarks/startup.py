@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak RSS (KB on Linux, bytes on macOS) where /proc is unavailable
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def measure_cold_start(bundle_dir: Optional[str], classifiers: List[str]) -> Dict[str, Any]:
+    """
+    Load the model in this (fresh) process and time each stage.
+
+    Args:
+        bundle_dir: Bundle to load from, or None for the hub
+        classifiers: Classifier heads to load
+
+    Returns:
+        Stage timings in seconds and RSS in MB
+    """
+    start = time.perf_counter()
+    import torch
+    from models import VITContrastiveHF
+    imported = time.perf_counter()
+    rss_after_import = current_rss_mb()
+
+    model = VITContrastiveHF(classificator_type=classifiers[0], bundle_dir=bundle_dir)
+    backbone_loaded = time.perf_counter()
+
+    for name in classifiers:
+        model.load_classifier(name)
+    model.eval()
+    classifiers_loaded = time.perf_counter()
+    rss_after_load = current_rss_mb()
+
+    with torch.no_grad():
+        features = model.extract_features(torch.zeros(1, 3, 224, 224))
+        for name in classifiers:
+            model.classify(features, name)
+    first_forward = time.perf_counter()
+
+    return {
+        'source': bundle_dir or 'hub',
+        'import_s': imported - start,
+        'backbone_s': backbone_loaded - imported,
+        'classifiers_s': classifiers_loaded - backbone_loaded,
+        'first_forward_s': first_forward - classifiers_loaded,
+        'total_s': first_forward - start,
+        'rss_after_import_mb': rss_after_import,
+        'rss_after_load_mb': rss_after_load,
+        'rss_after_forward_mb': current_rss_mb()
+    }
+
+def run_child(bundle_dir: Optional[str], classifiers: List[str]) -> Dict[str, Any]:
+    """Measure a cold start in a separate Python process."""
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child', '--classifiers', *classifiers]
+    if bundle_dir:
+        command += ['--bundle-dir', bundle_dir]
+    output = subprocess.run(
+        command, check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure model cold start time and memory")
+    parser.add_argument("--bundle-dir", default=None, help="Bundle created with bundle.py")
+    parser.add_argument("--include-hub", action="store_true",
+                        help="Also measure loading from the hub (uses the local hub cache)")
+    parser.add_argument("--classifiers", nargs="+", default=["knn", "linear", "svm"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_cold_start(args.bundle_dir, args.classifiers)))
+        return
+
+    sources = []
+    if args.include_hub or not args.bundle_dir:
+        sources.append(None)
+    if args.bundle_dir:
+        sources.append(args.bundle_dir)
+
+    print(f"{'source':>24} {'import s':>9} {'backbone s':>11} {'heads s':>8} {'forward s':>10} "
+          f"{'total s':>8} {'RSS MB':>8}")
+    for source in sources:
+        for _ in range(args.repeats):
+            row = run_child(source, args.classifiers)
+            print(f"{row['source'][-24:]:>24} {row['import_s']:>9.2f} {row['backbone_s']:>11.2f} "
+                  f"{row['classifiers_s']:>8.2f} {row['first_forward_s']:>10.2f} {row['total_s']:>8.2f} "
+                  f"{row['rss_after_forward_mb']:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+
+from config import Config
+from utils import VideoProcessor, ImageProcessor, encode_image_payload
+
+# Codecs tried for synthetic videos; ones OpenCV cannot write here are skipped
+VIDEO_CODECS = {'mp4v': '.mp4', 'MJPG': '.avi', 'XVID': '.avi', 'VP80': '.webm'}
+VIDEO_CONTENT_TYPES = {'.mp4': 'video/mp4', '.avi': 'video/avi', '.webm': 'video/webm'}
+
+def parse_resolution(resolution: str):
+    width, height = (int(value) for value in resolution.split('x'))
+    return width, height
+
+def make_image_bytes(width: int, height: int, image_format: str = 'JPEG', seed: int = 0) -> bytes:
+    """Encode a synthetic image with smooth, photo-like content (noise would not compress realistically)."""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (max(1, height // 16), max(1, width // 16), 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+def make_video(path: str, num_frames: int, width: int, height: int, codec: str,
+               fps: float = 30.0, seed: int = 0) -> bool:
+    """
+    Write a synthetic video: a smooth background panning across the frame
+    with a moving textured block, so consecutive frames differ like real footage.
+
+    Returns:
+        False if OpenCV cannot write this codec
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+    if not writer.isOpened():
+        return False
+
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (max(2, height // 16), max(2, width // 8), 3), dtype=np.uint8)
+    background = cv2.resize(small, (width * 2, height), interpolation=cv2.INTER_LINEAR)
+    block = rng.integers(0, 256, (max(1, height // 4), max(1, width // 4), 3), dtype=np.uint8)
+    try:
+        for index in range(num_frames):
+            offset = (index * 4) % width
+            frame = np.ascontiguousarray(background[:, offset:offset + width])
+            top = (index * 3) % (height - block.shape[0] + 1)
+            left = (index * 5) % (width - block.shape[1] + 1)
+            frame[top:top + block.shape[0], left:left + block.shape[1]] = block
+            writer.write(frame)
+    finally:
+        writer.release()
+    return os.path.getsize(path) > 0
+
+def measure(func: Callable, repeats: int, warmup: int = 1) -> Dict[str, float]:
+    """Time func after warmup calls and summarize the runs in milliseconds."""
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        'best_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'repeats': repeats
+    }
+
+def make_inputs(image_resolutions: List[str], image_format: str, video_lengths: List[int],
+                video_resolutions: List[str], codecs: List[str], workdir: str) -> Dict[str, Any]:
+    """
+    Generate the synthetic images and videos used by every benchmark.
+
+    Returns:
+        Dictionary with 'images' (resolution -> bytes) and 'videos' (list of
+        dicts with path, frames, resolution and codec)
+    """
+    images = {
+        resolution: make_image_bytes(*parse_resolution(resolution), image_format=image_format, seed=i)
+        for i, resolution in enumerate(image_resolutions)
+    }
+
+    videos = []
+    for codec in codecs:
+        for resolution in video_resolutions:
+            width, height = parse_resolution(resolution)
+            for length in video_lengths:
+                path = os.path.join(workdir, f"{codec}-{resolution}-{length}{VIDEO_CODECS.get(codec, '.avi')}")
+                if not make_video(path, length, width, height, codec):
+                    print(f"Skipping codec {codec}: not supported by this OpenCV build", file=sys.stderr)
+                    break
+                videos.append({'path': path, 'frames': length, 'resolution': resolution, 'codec': codec})
+    return {'images': images, 'videos': videos}
+
+def benchmark_preprocessing(inputs: Dict[str, Any], max_frames: int, repeats: int) -> List[Dict[str, Any]]:
+    """Time image preprocessing, frame extraction, frame preprocessing and payload encoding."""
+    results = []
+
+    for resolution, file_content in inputs['images'].items():
+        image = ImageProcessor.load_from_bytes(file_content)
+        results.append({
+            'id': f"stage/preprocess_image/{resolution}",
+            **measure(lambda: ImageProcessor.decode_and_preprocess(file_content, keep_image=False), repeats)
+        })
+        for mode in ('full', 'thumbnail'):
+            results.append({
+                'id': f"stage/encode_image/{mode}/{resolution}",
+                **measure(lambda: encode_image_payload(file_content, image, mode), repeats)
+            })
+
+    for video in inputs['videos']:
+        key = f"{video['codec']}/{video['resolution']}/{video['frames']}f"
+        results.append({
+            'id': f"stage/extract_frames/{key}",
+            **measure(lambda: VideoProcessor.extract_frames(video['path'], max_frames=max_frames), repeats)
+        })
+        frames = VideoProcessor.extract_frames(video['path'], max_frames=max_frames)
+        if frames:
+            results.append({
+                'id': f"stage/frames_to_tensors/{key}",
+                **measure(lambda: VideoProcessor.frames_to_tensors(frames), repeats)
+            })
+
+    return results
+
+def benchmark_model(model, classifiers: List[str], batch_sizes: List[int], repeats: int) -> List[Dict[str, Any]]:
+    """Time the backbone forward and each classifier head at several batch sizes."""
+    results = []
+    generator = torch.Generator().manual_seed(0)
+    for batch_size in batch_sizes:
+        inputs = torch.randn(batch_size, 3, 224, 224, generator=generator).to(model.device)
+
+        def forward():
+            with torch.no_grad():
+                return model.extract_features(inputs)
+
+        results.append({'id': f"stage/forward/batch{batch_size}", **measure(forward, repeats)})
+
+        features = forward()
+        for name in classifiers:
+            def classify():
+                with torch.no_grad():
+                    return model.classify(features, name)
+            results.append({'id': f"stage/classify/{name}/batch{batch_size}", **measure(classify, repeats)})
+    return results
+
+def benchmark_end_to_end(app, inputs: Dict[str, Any], model_type: str, image_payload: str,
+                         batch_files: int, max_frames: int, repeats: int) -> List[Dict[str, Any]]:
+    """
+    Time requests through the ASGI app (routing, form parsing, executors,
+    scheduler and serialization included). The embedding cache is disabled
+    so repeated uploads are not served from it.
+    """
+    from fastapi.testclient import TestClient
+    import routes
+
+    routes.embedding_cache = None
+    results = []
+
+    with TestClient(app) as client:
+        # Detection routes return 503 until the preload and warmup finish
+        while client.get('/api/v1/ready').status_code != 200:
+            time.sleep(0.2)
+
+        def post(url, files, data):
+            response = client.post(url, files=files, data=data)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}: {response.text[:200]}")
+            return response
+
+        data = {'model_type': model_type, 'image_payload': image_payload}
+        for resolution, file_content in inputs['images'].items():
+            files = {'file': ('image.jpg', file_content, 'image/jpeg')}
+            results.append({
+                'id': f"e2e/detect_image/{resolution}",
+                **measure(lambda: post('/api/v1/detect/image', files, data), repeats)
+            })
+
+        if inputs['images'] and batch_files:
+            resolution, file_content = next(iter(inputs['images'].items()))
+            files = [('files', (f"image{i}.jpg", file_content, 'image/jpeg')) for i in range(batch_files)]
+            results.append({
+                'id': f"e2e/detect_batch/{batch_files}x{resolution}",
+                **measure(lambda: post('/api/v1/detect/batch', files, data), repeats)
+            })
+
+        for video in inputs['videos']:
+            with open(video['path'], 'rb') as f:
+                video_content = f.read()
+            content_type = VIDEO_CONTENT_TYPES[os.path.splitext(video['path'])[1]]
+            files = {'file': (os.path.basename(video['path']), video_content, content_type)}
+            video_data = {**data, 'max_frames': max_frames}
+            results.append({
+                'id': f"e2e/detect_video/{video['codec']}/{video['resolution']}/{video['frames']}f",
+                **measure(lambda: post('/api/v1/detect/video', files, video_data), repeats)
+            })
+
+    return results
+
+def get_environment() -> Dict[str, Any]:
+    """Software, hardware and configuration the results were measured with."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'opencv': cv2.__version__,
+        'cuda': torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
+        'config': {
+            'model_repo': Config.DEFAULT_MODEL_REPO,
+            'model_bundle_dir': Config.MODEL_BUNDLE_DIR or None,
+            'precision': Config.INFERENCE_PRECISION,
+            'backend': Config.INFERENCE_BACKEND,
+            'knn_index': Config.KNN_INDEX,
+            'micro_batching': Config.ENABLE_MICRO_BATCHING,
+            'frame_sampling_mode': Config.FRAME_SAMPLING_MODE,
+            'executor_type': Config.EXECUTOR_TYPE
+        }
+    }
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                          max_regression: float) -> List[Dict[str, Any]]:
+    """
+    Compare median timings with a stored baseline.
+
+    Args:
+        results: Rows from this run
+        baseline: Rows from the baseline run
+        max_regression: Allowed slowdown as a fraction (0.1 = 10% slower)
+
+    Returns:
+        One row per benchmark present in both runs, with the timing ratio
+        and whether it regressed
+    """
+    baseline_by_id = {row['id']: row for row in baseline}
+    comparisons = []
+    for row in results:
+        reference = baseline_by_id.get(row['id'])
+        if reference is None:
+            continue
+        ratio = row['median_ms'] / max(reference['median_ms'], 1e-9)
+        comparisons.append({
+            'id': row['id'],
+            'baseline_ms': reference['median_ms'],
+            'current_ms': row['median_ms'],
+            'ratio': ratio,
+            'regressed': ratio > 1 + max_regression
+        })
+    return comparisons
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the detection pipeline stage by stage and end to end"
+    )
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="Results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="Allowed median slowdown vs the baseline before exiting with status 1")
+    parser.add_argument("--image-resolutions", nargs="+", default=["640x480", "1920x1080", "3840x2160"])
+    parser.add_argument("--image-format", default="JPEG", choices=["JPEG", "PNG", "WEBP"])
+    parser.add_argument("--video-lengths", type=int, nargs="+", default=[60, 300], help="Frames per video")
+    parser.add_argument("--video-resolutions", nargs="+", default=["640x360", "1280x720"])
+    parser.add_argument("--codecs", nargs="+", default=["mp4v", "MJPG"], choices=list(VIDEO_CODECS))
+    parser.add_argument("--max-frames", type=int, default=Config.DEFAULT_MAX_FRAMES)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-files", type=int, default=8, help="Images per /detect/batch request")
+    parser.add_argument("--classifiers", nargs="+", default=Config.AVAILABLE_CLASSIFIERS)
+    parser.add_argument("--model-type", default=Config.DEFAULT_CLASSIFIER, help="Classifier for end-to-end requests")
+    parser.add_argument("--image-payload", default=Config.DEFAULT_IMAGE_PAYLOAD, choices=Config.IMAGE_PAYLOAD_MODES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    parser.add_argument("--skip-model", action="store_true", help="Only benchmark preprocessing stages")
+    parser.add_argument("--skip-e2e", action="store_true", help="Skip the end-to-end requests")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="deepfake-bench-") as workdir:
+        inputs = make_inputs(args.image_resolutions, args.image_format, args.video_lengths,
+                             args.video_resolutions, args.codecs, workdir)
+        results += benchmark_preprocessing(inputs, args.max_frames, args.repeats)
+
+        if not args.skip_model:
+            import routes
+            model = routes.get_model(Config.ALL_CLASSIFIERS_MODE)
+            results += benchmark_model(model, args.classifiers, args.batch_sizes, args.repeats)
+
+            if not args.skip_e2e:
+                from main import app
+                results += benchmark_end_to_end(app, inputs, args.model_type, args.image_payload,
+                                                args.batch_files, args.max_frames, args.repeats)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': get_environment(),
+        'settings': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<52} {'best ms':>9} {'median ms':>10}")
+    for row in results:
+        print(f"{row['id']:<52} {row['best_ms']:>9.2f} {row['median_ms']:>10.2f}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparisons = compare_with_baseline(results, baseline['results'], args.max_regression)
+        print()
+        print(f"Compared with {args.baseline} (commit {baseline['environment'].get('commit')})")
+        print(f"{'benchmark':<52} {'baseline ms':>12} {'current ms':>11} {'ratio':>7}")
+        for row in comparisons:
+            flag = "  REGRESSED" if row['regressed'] else ""
+            print(f"{row['id']:<52} {row['baseline_ms']:>12.2f} {row['current_ms']:>11.2f} "
+                  f"{row['ratio']:>7.2f}{flag}")
+        if any(row['regressed'] for row in comparisons):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def read_memory_kb(pid: int) -> Dict[str, int]:
+    """Rss, Pss and private memory of a process from /proc/<pid>/smaps_rollup (Linux only)."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+def child_pids(pid: int) -> List[int]:
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+def wait_until_ready(port: int, workers: int, timeout: float) -> bool:
+    """Poll /ready until enough consecutive responses (spread over the workers) report ready."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/v1/ready', timeout=5) as response:
+                streak = streak + 1 if json.load(response).get('ready') else 0
+        except OSError:
+            streak = 0
+        if streak >= 4 * workers:
+            return True
+        time.sleep(0.25)
+    return False
+
+def measure_workers(workers: int, port: int, timeout: float) -> Dict[str, Any]:
+    """
+    Start serve.py with the given number of workers and measure its memory.
+
+    Returns:
+        Memory in MB: PSS of the whole process tree (the real footprint) and
+        the sum of RSS (what it would be if nothing was shared)
+    """
+    process = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port), '--no-access-log'],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_ready(port, workers, timeout):
+            raise RuntimeError(f"serve.py with {workers} worker(s) did not become ready")
+        pids = [process.pid] + (child_pids(process.pid) if workers > 1 else [])
+        usage = [read_memory_kb(pid) for pid in pids]
+        return {
+            'workers': workers,
+            'processes': len(pids),
+            'pss_mb': sum(u['pss'] for u in usage) / 1024,
+            'rss_sum_mb': sum(u['rss'] for u in usage) / 1024,
+            'private_mb': sum(u['private'] for u in usage) / 1024
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure serve.py memory as the worker count grows")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for readiness")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'PSS MB':>9} {'RSS sum MB':>11} {'private MB':>11} {'PSS/worker':>11}")
+    for workers in args.workers:
+        row = measure_workers(workers, args.port, args.timeout)
+        print(f"{row['workers']:>8} {row['pss_mb']:>9.0f} {row['rss_sum_mb']:>11.0f} "
+              f"{row['private_mb']:>11.0f} {row['pss_mb'] / workers:>11.0f}")
+
+if __name__ == "__main__":
+    main()
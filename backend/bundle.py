@@ -0,0 +1,289 @@
+"""
+Offline model bundles.
+
+A bundle is a local directory with everything VITContrastiveHF needs, laid
+out like the hub repository so it can be loaded without network access:
+
+    bundle/
+        bundle.json                 manifest (source repo, versions, checksums)
+        config.json                 backbone config
+        model.safetensors           backbone weights (memory-mapped on load)
+        preprocessor_config.json    processor config
+        sklearn/...                 the classifier artifacts (CLASSIFIER_FILES)
+
+A stand-in bundle replaces the hub model with a tiny randomly initialised
+ViT (same CLS embedding size) and knn/linear/OCSVM heads fitted locally on
+its embeddings, so the serving path can be exercised without network
+access. Its predictions are meaningless; use it for load and regression
+testing only (MODEL_STANDIN=True builds one on first start).
+
+Usage (from the backend directory):
+    python bundle.py create ./bundles/code
+    python bundle.py standin ./bundles/standin
+    python bundle.py verify ./bundles/code
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+MANIFEST_FILE = 'bundle.json'
+WEIGHTS_FILE = 'model.safetensors'
+
+def _sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_bundle(path: Optional[str]) -> bool:
+    """Whether path is a model bundle directory."""
+    return bool(path) and os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+def read_manifest(bundle_dir: str) -> Dict[str, Any]:
+    """Read a bundle manifest."""
+    with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+def write_manifest(output_dir: str, **fields) -> Dict[str, Any]:
+    """Checksum every file in a bundle directory and write the manifest."""
+    import torch
+    import transformers
+    from models import CLASSIFIER_FILES
+
+    files = sorted(
+        os.path.relpath(os.path.join(root, name), output_dir)
+        for root, _, names in os.walk(output_dir)
+        for name in names
+        if name != MANIFEST_FILE
+    )
+    manifest = {
+        **fields,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'torch_version': torch.__version__,
+        'transformers_version': transformers.__version__,
+        'classifiers': CLASSIFIER_FILES,
+        'files': {name: _sha256(os.path.join(output_dir, name)) for name in files}
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+def create_bundle(output_dir: str, repo_name: str, revision: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Download the backbone, processor and classifiers and pack them into a bundle.
+
+    Args:
+        output_dir: Bundle directory to create
+        repo_name: Hub repository of the model
+        revision: Optional hub revision (branch, tag or commit)
+
+    Returns:
+        The bundle manifest
+    """
+    import transformers
+    from huggingface_hub import hf_hub_download
+    from models import CLASSIFIER_FILES
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    model = transformers.AutoModel.from_pretrained(repo_name, revision=revision)
+    model.save_pretrained(output_dir, safe_serialization=True)
+    processor = transformers.AutoProcessor.from_pretrained(repo_name, revision=revision)
+    processor.save_pretrained(output_dir)
+
+    for filename in CLASSIFIER_FILES.values():
+        source = hf_hub_download(repo_id=repo_name, filename=filename, revision=revision)
+        target = os.path.join(output_dir, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+
+    return write_manifest(output_dir, repo_name=repo_name, revision=revision)
+
+def _standin_pixels(n_samples: int, fake: bool, generator, image_size: int = 224):
+    """
+    Normalized synthetic inputs: smooth images for the real class, the same
+    with high-frequency noise for the fake class, so the heads have
+    something to separate.
+    """
+    import torch
+    import torch.nn.functional as F
+
+    coarse = torch.rand(n_samples, 3, image_size // 16, image_size // 16, generator=generator)
+    pixels = F.interpolate(coarse, size=(image_size, image_size), mode='bilinear', align_corners=False)
+    if fake:
+        pixels = (pixels + 0.15 * torch.randn(pixels.shape, generator=generator)).clamp(0, 1)
+    return (pixels - 0.5) / 0.5
+
+def create_standin_bundle(output_dir: str, hidden_size: int = 768, num_layers: int = 1,
+                          reference_size: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build an offline stand-in for the hub model.
+
+    Args:
+        output_dir: Bundle directory to create
+        hidden_size: CLS embedding size (768 matches aimagelab/CoDE)
+        num_layers: Transformer layers of the random ViT
+        reference_size: Embeddings the heads are fitted on (half real, half fake)
+        seed: Seed for the weights and the synthetic training data
+
+    Returns:
+        The bundle manifest
+    """
+    import joblib
+    import numpy as np
+    import torch
+    import transformers
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.svm import OneClassSVM
+    from models import CLASSIFIER_FILES
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    torch.manual_seed(seed)
+    config = transformers.ViTConfig(
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=max(1, hidden_size // 64),
+        intermediate_size=hidden_size * 2,
+        image_size=224,
+        patch_size=32
+    )
+    model = transformers.ViTModel(config).eval()
+    model.save_pretrained(output_dir, safe_serialization=True)
+    transformers.ViTImageProcessor(size={'height': 224, 'width': 224}).save_pretrained(output_dir)
+
+    # Embed synthetic real and fake inputs with the random backbone
+    generator = torch.Generator().manual_seed(seed)
+    half = max(1, reference_size // 2)
+    embeddings = []
+    with torch.no_grad():
+        for fake in (False, True):
+            pixels = _standin_pixels(half, fake, generator)
+            embeddings.append(torch.cat([
+                model(pixel_values=pixels[start:start + 64]).last_hidden_state[:, 0, :]
+                for start in range(0, half, 64)
+            ]).numpy())
+    X = np.concatenate(embeddings).astype(np.float32)
+    y = np.repeat([0, 1], half)
+
+    # Same estimator types and label conventions as the shipped heads
+    heads = {
+        'knn': KNeighborsClassifier(n_neighbors=5).fit(X, y),
+        'linear': LogisticRegression(max_iter=1000).fit(X, y),
+        'svm': OneClassSVM(kernel='poly', gamma='auto', nu=0.1).fit(embeddings[1])  # 1 = Fake
+    }
+    for name, estimator in heads.items():
+        target = os.path.join(output_dir, CLASSIFIER_FILES[name])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        joblib.dump(estimator, target)
+
+    return write_manifest(
+        output_dir,
+        repo_name='standin',
+        revision=None,
+        standin=True,
+        standin_options={
+            'hidden_size': hidden_size,
+            'num_layers': num_layers,
+            'reference_size': reference_size,
+            'seed': seed
+        }
+    )
+
+def ensure_standin_bundle(bundle_dir: str) -> str:
+    """Create the stand-in bundle in bundle_dir unless one is already there."""
+    if not is_bundle(bundle_dir):
+        tmp_dir = f"{bundle_dir.rstrip(os.sep)}.{os.getpid()}.tmp"
+        try:
+            create_standin_bundle(tmp_dir)
+            os.replace(tmp_dir, bundle_dir)
+        except OSError:
+            # Another process created it first
+            if not is_bundle(bundle_dir):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return bundle_dir
+
+def verify_bundle(bundle_dir: str) -> List[str]:
+    """
+    Check a bundle against the checksums in its manifest.
+
+    Returns:
+        List of problems (empty if the bundle is intact)
+    """
+    if not is_bundle(bundle_dir):
+        return [f"{bundle_dir} has no {MANIFEST_FILE}"]
+
+    problems = []
+    manifest = read_manifest(bundle_dir)
+    for name, checksum in manifest['files'].items():
+        path = os.path.join(bundle_dir, name)
+        if not os.path.isfile(path):
+            problems.append(f"missing {name}")
+        elif _sha256(path) != checksum:
+            problems.append(f"checksum mismatch for {name}")
+
+    if WEIGHTS_FILE not in manifest['files']:
+        problems.append(f"no {WEIGHTS_FILE} (weights must be stored as safetensors)")
+    for filename in manifest.get('classifiers', {}).values():
+        if filename not in manifest['files']:
+            problems.append(f"classifier artifact {filename} not bundled")
+
+    return problems
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Create or verify offline model bundles")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create = subparsers.add_parser('create', help="Download the model and pack it into a bundle")
+    create.add_argument('output_dir')
+    create.add_argument('--repo', default=Config.DEFAULT_MODEL_REPO)
+    create.add_argument('--revision', default=None)
+
+    standin = subparsers.add_parser('standin', help="Build a tiny random stand-in model for offline testing")
+    standin.add_argument('output_dir')
+    standin.add_argument('--hidden-size', type=int, default=768)
+    standin.add_argument('--layers', type=int, default=1)
+    standin.add_argument('--reference-size', type=int, default=1000,
+                         help="Embeddings the heads are fitted on (KNN reference set size)")
+    standin.add_argument('--seed', type=int, default=0)
+
+    verify = subparsers.add_parser('verify', help="Check bundle files against the manifest")
+    verify.add_argument('bundle_dir')
+
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        manifest = create_bundle(args.output_dir, args.repo, args.revision)
+        total_mb = sum(
+            os.path.getsize(os.path.join(args.output_dir, name)) for name in manifest['files']
+        ) / (1024 * 1024)
+        print(f"Bundled {args.repo} into {args.output_dir} ({len(manifest['files'])} files, {total_mb:.1f} MB)")
+        print(f"Serve it with MODEL_BUNDLE_DIR={os.path.abspath(args.output_dir)}")
+    elif args.command == 'standin':
+        manifest = create_standin_bundle(
+            args.output_dir, args.hidden_size, args.layers, args.reference_size, args.seed
+        )
+        print(f"Created a stand-in model in {args.output_dir} ({len(manifest['files'])} files)")
+        print(f"Serve it with MODEL_BUNDLE_DIR={os.path.abspath(args.output_dir)}")
+    else:
+        problems = verify_bundle(args.bundle_dir)
+        for problem in problems:
+            print(problem)
+        if problems:
+            sys.exit(1)
+        print(f"{args.bundle_dir} is intact")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of CLS embeddings.
+
+    Entries are keyed by a hash of the uploaded bytes plus a signature of
+    the preprocessing/model configuration. The in-memory tier is an LRU
+    bounded by a byte budget; an optional on-disk tier persists every
+    embedding so evicted entries (and entries from earlier runs) can be
+    reloaded without running the backbone.
+    """
+
+    def __init__(self, max_bytes: int, signature: str = "", disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.signature = signature
+        self.disk_dir = disk_dir or None
+
+        self._entries: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def make_key(self, file_content: bytes, model_signature: str = "") -> str:
+        """
+        Hash uploaded bytes together with the cache signature.
+
+        Args:
+            file_content: Uploaded bytes
+            model_signature: Effective configuration of the model computing
+                the embedding (precision, backend, device), known once it is loaded
+        """
+        digest = hashlib.sha256(f"{self.signature}|{model_signature}".encode('utf-8'))
+        digest.update(file_content)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        """
+        Look up an embedding.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Cached embedding on CPU, or None on a miss
+        """
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return embedding
+
+        embedding = self._load_from_disk(key)
+        with self._lock:
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+
+        self._store_in_memory(key, embedding)
+        return embedding
+
+    def put(self, key: str, embedding: torch.Tensor):
+        """
+        Store an embedding.
+
+        Args:
+            key: Key from make_key
+            embedding: CLS embedding (copied to CPU so batch outputs are not kept alive)
+        """
+        embedding = embedding.detach().to('cpu').clone()
+        self._store_in_memory(key, embedding)
+        self._save_to_disk(key, embedding)
+
+    def lookup_many(self, file_contents: List[bytes],
+                    model_signature: str = "") -> Tuple[List[str], List[Optional[torch.Tensor]]]:
+        """
+        Hash several uploads and look up their embeddings.
+
+        Hashing and the disk tier block, so async callers run this on a thread.
+
+        Returns:
+            Tuple of (keys, cached embedding or None per upload)
+        """
+        keys = [self.make_key(file_content, model_signature) for file_content in file_contents]
+        return keys, [self.get(key) for key in keys]
+
+    def put_many(self, entries: List[Tuple[str, torch.Tensor]]):
+        """Store several (key, embedding) pairs (see put)."""
+        for key, embedding in entries:
+            self.put(key, embedding)
+
+    def _store_in_memory(self, key: str, embedding: torch.Tensor):
+        size = self._tensor_bytes(embedding)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._tensor_bytes(self._entries.pop(key))
+
+            self._entries[key] = embedding
+            self._current_bytes += size
+
+            # Evict least recently used entries until within budget
+            while self._current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= self._tensor_bytes(evicted)
+                self._evictions += 1
+
+    @staticmethod
+    def _tensor_bytes(tensor: torch.Tensor) -> int:
+        return tensor.numel() * tensor.element_size()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pt")
+
+    def _load_from_disk(self, key: str) -> Optional[torch.Tensor]:
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            return torch.load(path, map_location='cpu', weights_only=True)
+        except Exception:
+            return None  # Treat unreadable entries as misses
+
+    def _save_to_disk(self, key: str, embedding: torch.Tensor):
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            torch.save(embedding, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            pass  # The disk tier is best-effort
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory usage."""
+        with self._lock:
+            lookups = self._memory_hits + self._disk_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'memory_hits': self._memory_hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': (
+                    (self._memory_hits + self._disk_hits) / lookups if lookups else 0.0
+                ),
+                'disk_tier': self.disk_dir
+            }
+
+    def clear(self):
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
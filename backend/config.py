@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class Config:
     """Configuration settings for the deepfake detection API."""
@@ -8,16 +8,89 @@ class Config:
     DEFAULT_MODEL_REPO = "aimagelab/CoDE"
     AVAILABLE_CLASSIFIERS = ["knn", "linear", "svm"]
     DEFAULT_CLASSIFIER = "knn"
+    MODEL_BUNDLE_DIR = os.getenv("MODEL_BUNDLE_DIR", "")  # Local bundle from bundle.py; empty uses the hub
+    MODEL_STANDIN = os.getenv("MODEL_STANDIN", "False").lower() == "true"  # Tiny random model, for testing only
+    STANDIN_MODEL_DIR = os.getenv("STANDIN_MODEL_DIR", "standin_model")  # Stand-in bundle, built on first start
+    ALL_CLASSIFIERS_MODE = "all"  # Run every classifier head on one shared embedding
+    INFERENCE_PRECISION = os.getenv("INFERENCE_PRECISION", "fp32").lower()  # fp32, bf16 or int8
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager").lower()  # eager, torchscript or onnx
+    BACKEND_CACHE_DIR = os.getenv("BACKEND_CACHE_DIR", "exported_models")  # Exported backbone artifacts
+    BACKEND_TOLERANCE = float(os.getenv("BACKEND_TOLERANCE", 1e-3))  # Max relative drift from eager
+    TORCH_CLASSIFIER_HEADS = os.getenv("TORCH_CLASSIFIER_HEADS", "True").lower() == "true"  # Run heads as torch modules
+    
+    # KNN neighbour index (exact blocked search, or approximate IVF search)
+    KNN_INDEX_TYPES = ["exact", "ivf"]
+    KNN_INDEX = os.getenv("KNN_INDEX", "exact").lower()
+    KNN_BLOCK_SIZE = int(os.getenv("KNN_BLOCK_SIZE", 65536))  # Reference rows scored per block
+    KNN_IVF_LISTS = int(os.getenv("KNN_IVF_LISTS", 0))  # 0 picks sqrt(reference set size)
+    KNN_IVF_PROBE = int(os.getenv("KNN_IVF_PROBE", 8))  # Lists searched per query (higher = better recall)
+    
+    # Startup configuration (eager model loading and warmup)
+    PRELOAD_CLASSIFIERS = [
+        name.strip() for name in os.getenv("PRELOAD_CLASSIFIERS", "knn,linear,svm").split(",")
+        if name.strip()
+    ]
+    WARMUP_BATCH_SIZES = [
+        int(size) for size in os.getenv("WARMUP_BATCH_SIZES", "1,30").split(",")
+        if size.strip()
+    ]
+    
+    # Executor configuration (keeps decoding and inference off the event loop)
+    EXECUTOR_TYPE = os.getenv("EXECUTOR_TYPE", "thread").lower()  # "thread" or "process"
+    EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", os.cpu_count() or 1))
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 1))
+    
+    # Inference scheduling configuration (cross-request micro-batching)
+    ENABLE_MICRO_BATCHING = os.getenv("ENABLE_MICRO_BATCHING", "True").lower() == "true"
+    MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", 32))
+    MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", 5))
+    
+    # Admission control (bounded in-flight and waiting requests per endpoint class, per worker)
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_IN_FLIGHT = {
+        name.strip(): int(limit) for name, _, limit in (
+            item.partition("=") for item in
+            os.getenv("ADMISSION_MAX_IN_FLIGHT", "image=16,batch=4,video=2,stream=2").split(",")
+            if item.strip()
+        )
+    }
+    ADMISSION_MAX_QUEUED = {
+        name.strip(): int(limit) for name, _, limit in (
+            item.partition("=") for item in
+            os.getenv("ADMISSION_MAX_QUEUED", "image=64,batch=8,video=4,stream=4").split(",")
+            if item.strip()
+        )
+    }
+    ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", 10))  # Longest wait for a slot
+    
+    # Embedding cache configuration (keyed by a hash of the uploaded bytes)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", 256))
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")  # Empty disables the disk tier
     
     # Video processing configuration
     MAX_VIDEO_FRAMES = 100
     DEFAULT_MAX_FRAMES = 30
     MAX_FRAME_RATE = 60
     DEFAULT_FRAME_RATE = None
+    FRAME_SAMPLING_MODES = ["seek", "grab", "sequential"]
+    FRAME_SAMPLING_MODE = os.getenv("FRAME_SAMPLING_MODE", "seek").lower()  # Checked at startup
+    FRAME_SEEK_MIN_GAP = int(os.getenv("FRAME_SEEK_MIN_GAP", 32))  # Grab forward over shorter gaps
+    FRAME_DEDUP_THRESHOLD = float(os.getenv("FRAME_DEDUP_THRESHOLD", 0.0))  # Opt-in: skip near-duplicate frames (0 = off)
+    STREAM_CHUNK_FRAMES = int(os.getenv("STREAM_CHUNK_FRAMES", 8))  # Frames per streamed verdict chunk
+    VIDEO_EARLY_EXIT = os.getenv("VIDEO_EARLY_EXIT", "False").lower() == "true"  # Opt-in: stop once the verdict is settled
+    VIDEO_EARLY_EXIT_MIN_CHUNK = int(os.getenv("VIDEO_EARLY_EXIT_MIN_CHUNK", 4))  # Fewest frames per early-exit step
+    
+    # Job configuration (background video analysis)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))  # Jobs processed concurrently
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 100))  # Waiting jobs before submissions are rejected
+    JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", "jobs")  # SQLite job store and pending uploads
+    JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", 24))  # Finished jobs are purged after this
+    JOB_REQUEUE_ON_START = os.getenv("JOB_REQUEUE_ON_START", "True").lower() == "true"  # Resume interrupted jobs
     
     # File upload configuration
     MAX_FILE_SIZE_MB = 100  # Maximum file size in MB
-    MAX_BATCH_FILES = 20    # Maximum files in batch processing
+    MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 20))  # Maximum files in batch processing
     ALLOWED_IMAGE_TYPES = {
         "image/jpeg", "image/jpg", "image/png", 
         "image/bmp", "image/tiff", "image/webp"
@@ -26,6 +99,19 @@ class Config:
         "video/mp4", "video/avi", "video/mov", 
         "video/wmv", "video/flv", "video/webm"
     }
+    VIDEO_TYPE_SUFFIXES = {
+        "video/mp4": ".mp4", "video/avi": ".avi", "video/x-msvideo": ".avi",
+        "video/mov": ".mov", "video/quicktime": ".mov", "video/wmv": ".wmv",
+        "video/x-ms-wmv": ".wmv", "video/flv": ".flv", "video/x-flv": ".flv",
+        "video/webm": ".webm", "video/x-matroska": ".mkv"
+    }
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per chunk when streaming uploads to disk
+    
+    # Response configuration
+    IMAGE_PAYLOAD_MODES = ["full", "thumbnail", "original", "none"]
+    DEFAULT_IMAGE_PAYLOAD = "full"
+    THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 256))  # Longest thumbnail side in pixels
+    RESPONSE_FORMATS = ["json", "msgpack"]
     
     # API configuration
     API_VERSION = "1.0.0"
@@ -40,6 +126,8 @@ class Config:
     PORT = int(os.getenv("PORT", 8000))
     RELOAD = os.getenv("RELOAD", "True").lower() == "true"
     LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 1))  # Forked workers started by serve.py
+    TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", 0))  # 0 splits the cores evenly
     
     # CORS configuration
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
@@ -76,7 +164,8 @@ class Config:
                     "output_format": "-1=Real, 1=Fake"
                 }
             ],
-            "default_classifier": cls.DEFAULT_CLASSIFIER
+            "default_classifier": cls.DEFAULT_CLASSIFIER,
+            "ensemble_mode": cls.ALL_CLASSIFIERS_MODE
         }
     
     @classmethod
@@ -84,11 +173,44 @@ class Config:
         """Validate if classifier type is supported."""
         return classifier_type in cls.AVAILABLE_CLASSIFIERS
     
+    @classmethod
+    def validate_model_type(cls, model_type: str) -> bool:
+        """Validate if a requested model type (classifier or ensemble mode) is supported."""
+        return cls.validate_classifier(model_type) or model_type == cls.ALL_CLASSIFIERS_MODE
+    
     @classmethod
     def get_file_size_limit_bytes(cls) -> int:
         """Get file size limit in bytes."""
         return cls.MAX_FILE_SIZE_MB * 1024 * 1024
     
+    @classmethod
+    def get_model_id(cls) -> str:
+        """Identify the served weights (used to keep caches of different models apart)."""
+        return "standin" if cls.MODEL_STANDIN else cls.DEFAULT_MODEL_REPO
+    
+    @classmethod
+    def get_knn_options(cls) -> Dict[str, Any]:
+        """Get neighbour index options for the KNN head."""
+        return {
+            "index": cls.KNN_INDEX,
+            "block_size": cls.KNN_BLOCK_SIZE,
+            "ivf_lists": cls.KNN_IVF_LISTS,
+            "ivf_probe": cls.KNN_IVF_PROBE
+        }
+    
+    @classmethod
+    def get_admission_limits(cls) -> Dict[str, tuple]:
+        """Get (max in flight, max queued) per endpoint class."""
+        return {
+            name: (cls.ADMISSION_MAX_IN_FLIGHT.get(name, 1), cls.ADMISSION_MAX_QUEUED.get(name, 0))
+            for name in ("image", "batch", "video", "stream")
+        }
+    
+    @classmethod
+    def get_embedding_cache_limit_bytes(cls) -> int:
+        """Get embedding cache memory budget in bytes."""
+        return int(cls.EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+    
     @classmethod
     def is_allowed_image_type(cls, content_type: str) -> bool:
         """Check if image content type is allowed."""
@@ -97,4 +219,21 @@ class Config:
     @classmethod
     def is_allowed_video_type(cls, content_type: str) -> bool:
         """Check if video content type is allowed."""
-        return content_type in cls.ALLOWED_VIDEO_TYPES
\ No newline at end of file
+        return content_type in cls.ALLOWED_VIDEO_TYPES
+    
+    @classmethod
+    def check_frame_sampling_mode(cls) -> Optional[str]:
+        """
+        Fall back to seek sampling when FRAME_SAMPLING_MODE is not a known mode.
+        
+        Returns:
+            A warning to log if the configured mode was replaced, otherwise None
+        """
+        if cls.FRAME_SAMPLING_MODE in cls.FRAME_SAMPLING_MODES:
+            return None
+        invalid_mode = cls.FRAME_SAMPLING_MODE
+        cls.FRAME_SAMPLING_MODE = "seek"
+        return (
+            f"Invalid FRAME_SAMPLING_MODE {invalid_mode!r} (choose from "
+            f"{', '.join(cls.FRAME_SAMPLING_MODES)}); using seek"
+        )
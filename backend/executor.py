@@ -0,0 +1,72 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+
+# CPU-bound preprocessing pool (decoding, frame extraction, encoding)
+_cpu_executor: Optional[Executor] = None
+
+# Model inference pool; torch releases the GIL, so threads share one model copy
+_inference_executor: Optional[ThreadPoolExecutor] = None
+
+def get_cpu_executor() -> Executor:
+    """Get or create the configured pool for CPU-bound preprocessing."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        if Config.EXECUTOR_TYPE == "process":
+            _cpu_executor = ProcessPoolExecutor(max_workers=Config.EXECUTOR_WORKERS)
+        else:
+            _cpu_executor = ThreadPoolExecutor(
+                max_workers=Config.EXECUTOR_WORKERS,
+                thread_name_prefix="cpu-worker"
+            )
+    return _cpu_executor
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Get or create the thread pool used for model forwards and classifier heads."""
+    global _inference_executor
+    if _inference_executor is None:
+        _inference_executor = ThreadPoolExecutor(
+            max_workers=Config.INFERENCE_WORKERS,
+            thread_name_prefix="inference-worker"
+        )
+    return _inference_executor
+
+async def run_cpu_bound(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a CPU-bound preprocessing function off the event loop.
+
+    With EXECUTOR_TYPE=process, func and its arguments must be picklable.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+async def run_inference(func: Callable, *args, **kwargs) -> Any:
+    """Run a model function on the inference thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), functools.partial(func, *args, **kwargs))
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run blocking work that cannot be pickled (e.g. stepping a generator) on a thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+def get_executor_info() -> Dict[str, Any]:
+    """Get executor configuration."""
+    return {
+        "executor_type": Config.EXECUTOR_TYPE,
+        "executor_workers": Config.EXECUTOR_WORKERS,
+        "inference_workers": Config.INFERENCE_WORKERS
+    }
+
+def shutdown_executors():
+    """Shut down the executor pools."""
+    global _cpu_executor, _inference_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+    if _inference_executor is not None:
+        _inference_executor.shutdown(wait=False, cancel_futures=True)
+        _inference_executor = None
@@ -0,0 +1,404 @@
+"""
+Torch implementations of the sklearn classifier heads.
+
+The fitted sklearn estimators shipped with the model are converted into
+nn.Modules holding the same parameters as buffers, so classification runs
+on the backbone's device without copying embeddings to the host:
+
+- KNeighborsClassifier: exact blocked or IVF neighbour search + vote
+- Linear classifiers (LogisticRegression, LinearSVC, ...): one matmul
+- OneClassSVM: batched kernel evaluation against the support vectors
+"""
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+class UnsupportedHeadError(ValueError):
+    """Raised when an estimator cannot be converted to a torch head."""
+
+def _as_buffer(array: np.ndarray, dtype: torch.dtype = torch.float32) -> torch.Tensor:
+    return torch.as_tensor(np.ascontiguousarray(array), dtype=dtype)
+
+def _numeric_classes(classes: np.ndarray) -> torch.Tensor:
+    if not np.issubdtype(np.asarray(classes).dtype, np.number):
+        raise UnsupportedHeadError("Only numeric class labels are supported")
+    return _as_buffer(classes, torch.long)
+
+def _pairwise_distances(x: torch.Tensor, reference: torch.Tensor, reference_sq_norms: torch.Tensor,
+                        metric: str) -> torch.Tensor:
+    """
+    Distances between queries and reference rows.
+
+    For the cosine metric, reference rows must already be L2-normalized.
+    """
+    reference = reference.to(x.dtype)
+    if metric == "euclidean":
+        sq = (x ** 2).sum(dim=1, keepdim=True) - 2.0 * x @ reference.T + reference_sq_norms.to(x.dtype)
+        return sq.clamp_min_(0).sqrt_()
+    if metric == "cosine":
+        return 1.0 - nn.functional.normalize(x, dim=1) @ reference.T
+    return torch.cdist(x, reference, p=1)
+
+class ExactIndex(nn.Module):
+    """
+    Exact nearest-neighbour search over the reference embeddings.
+
+    Distances are computed against blocks of block_size reference rows and
+    the running top-k is merged after each block, so memory stays bounded
+    by batch_size x block_size however large the reference set is.
+    """
+
+    approximate = False
+
+    def __init__(self, reference: torch.Tensor, metric: str, block_size: int = 65536):
+        super().__init__()
+        self.metric = metric
+        self.block_size = max(1, block_size)
+        if metric == "cosine":
+            reference = nn.functional.normalize(reference, dim=1)
+        self.register_buffer("reference", reference)
+        self.register_buffer("reference_sq_norms", (reference ** 2).sum(dim=1))
+
+    def search(self, x: torch.Tensor, k: int):
+        """
+        Find the k nearest reference rows for each query.
+
+        Args:
+            x: Queries of shape (batch_size, dim)
+            k: Number of neighbours
+
+        Returns:
+            Tuple of (distances, indices), both of shape (batch_size, k), nearest first
+        """
+        best_distances, best_indices = None, None
+        for start in range(0, self.reference.shape[0], self.block_size):
+            end = start + self.block_size
+            distances = _pairwise_distances(
+                x, self.reference[start:end], self.reference_sq_norms[start:end], self.metric
+            )
+            distances, indices = distances.topk(min(k, distances.shape[1]), dim=1, largest=False)
+            indices = indices + start
+
+            if best_distances is not None:
+                distances = torch.cat([best_distances, distances], dim=1)
+                indices = torch.cat([best_indices, indices], dim=1)
+                distances, order = distances.topk(min(k, distances.shape[1]), dim=1, largest=False)
+                indices = indices.gather(1, order)
+            best_distances, best_indices = distances, indices
+
+        return best_distances, best_indices
+
+class IVFIndex(nn.Module):
+    """
+    Approximate nearest-neighbour search with an inverted file.
+
+    The reference embeddings are partitioned into n_lists clusters with
+    k-means. A query is only compared against the rows of its n_probe
+    closest clusters; raising n_probe trades latency for recall, and
+    n_probe == n_lists is an exhaustive search.
+    """
+
+    approximate = True
+
+    def __init__(self, reference: torch.Tensor, metric: str, n_lists: int = 0, n_probe: int = 8,
+                 kmeans_iterations: int = 10, seed: int = 0):
+        super().__init__()
+        if metric not in ("euclidean", "cosine"):
+            raise UnsupportedHeadError(f"IVF index does not support the {metric} metric")
+
+        self.metric = metric
+        if metric == "cosine":
+            reference = nn.functional.normalize(reference, dim=1)
+
+        num_rows = reference.shape[0]
+        self.n_lists = min(num_rows, n_lists or max(1, int(round(num_rows ** 0.5))))
+        self.n_probe = max(1, min(n_probe, self.n_lists))
+
+        centroids = self._kmeans(reference, self.n_lists, kmeans_iterations, seed)
+        assignments = self._assign(reference, centroids)
+
+        # Store rows grouped by list so each list is a contiguous slice
+        order = torch.argsort(assignments, stable=True)
+        counts = torch.bincount(assignments, minlength=self.n_lists)
+        offsets = torch.zeros(self.n_lists + 1, dtype=torch.long)
+        offsets[1:] = counts.cumsum(0)
+
+        self.register_buffer("centroids", centroids)
+        self.register_buffer("reference", reference[order])
+        self.register_buffer("reference_sq_norms", (self.reference ** 2).sum(dim=1))
+        self.register_buffer("row_ids", order)  # Position in the original reference set
+        self.register_buffer("row_lists", assignments[order])
+        self.list_bounds = offsets.tolist()
+
+    @staticmethod
+    def _assign(rows: torch.Tensor, centroids: torch.Tensor, block_size: int = 65536) -> torch.Tensor:
+        centroid_sq_norms = (centroids ** 2).sum(dim=1)
+        return torch.cat([
+            (centroid_sq_norms - 2.0 * rows[start:start + block_size] @ centroids.T).argmin(dim=1)
+            for start in range(0, rows.shape[0], block_size)
+        ])
+
+    @classmethod
+    def _kmeans(cls, rows: torch.Tensor, n_lists: int, iterations: int, seed: int) -> torch.Tensor:
+        generator = torch.Generator().manual_seed(seed)
+        # Like faiss, train on a bounded sample of the reference set
+        sample_size = min(rows.shape[0], 256 * n_lists)
+        sample = rows[torch.randperm(rows.shape[0], generator=generator)[:sample_size]]
+        centroids = sample[torch.randperm(sample_size, generator=generator)[:n_lists]].clone()
+
+        for _ in range(iterations):
+            assignments = cls._assign(sample, centroids)
+            sums = torch.zeros_like(centroids).index_add_(0, assignments, sample)
+            counts = torch.bincount(assignments, minlength=n_lists).unsqueeze(1)
+            # Empty clusters keep their previous centroid
+            centroids = torch.where(counts > 0, sums / counts.clamp_min(1), centroids)
+        return centroids
+
+    def search(self, x: torch.Tensor, k: int):
+        """
+        Find (approximately) the k nearest reference rows for each query.
+
+        Returns:
+            Tuple of (distances, indices) of shape (batch_size, k); queries
+            whose probed lists hold fewer than k rows are padded with
+            infinite distances
+        """
+        centroids = self.centroids.to(x.dtype)
+        query = nn.functional.normalize(x, dim=1) if self.metric == "cosine" else x
+        probed = ((centroids ** 2).sum(dim=1) - 2.0 * query @ centroids.T).topk(
+            self.n_probe, dim=1, largest=False
+        ).indices
+
+        # Score the queries against every row of the lists probed by the batch,
+        # then mask out rows from lists a given query did not probe
+        bounds = self.list_bounds
+        candidates = torch.cat([
+            torch.arange(bounds[i], bounds[i + 1]) for i in torch.unique(probed).tolist()
+        ]).to(x.device)
+        distances = _pairwise_distances(
+            x, self.reference[candidates], self.reference_sq_norms[candidates], self.metric
+        )
+        probed_lists = torch.zeros(x.shape[0], self.n_lists, dtype=torch.bool, device=x.device)
+        probed_lists.scatter_(1, probed, True)
+        distances = distances.masked_fill(~probed_lists[:, self.row_lists[candidates]], float("inf"))
+
+        if distances.shape[1] < k:
+            padding = torch.full((x.shape[0], k - distances.shape[1]), float("inf"),
+                                 dtype=distances.dtype, device=x.device)
+            distances = torch.cat([distances, padding], dim=1)
+            candidates = torch.cat([candidates, candidates.new_zeros(k - candidates.shape[0])])
+
+        distances, order = distances.topk(k, dim=1, largest=False)
+        return distances, self.row_ids[candidates[order]]
+
+class KNNHead(nn.Module):
+    """k-nearest-neighbour vote over the stored training embeddings."""
+
+    METRICS = ("euclidean", "manhattan", "cosine")
+    INDEX_TYPES = ("exact", "ivf")
+
+    def __init__(self, fit_X: np.ndarray, labels: np.ndarray, classes: np.ndarray,
+                 n_neighbors: int, metric: str = "euclidean", weights: str = "uniform",
+                 index: str = "exact", block_size: int = 65536, ivf_lists: int = 0, ivf_probe: int = 8):
+        super().__init__()
+        if metric not in self.METRICS:
+            raise UnsupportedHeadError(f"Unsupported KNN metric: {metric}")
+        if weights not in ("uniform", "distance"):
+            raise UnsupportedHeadError(f"Unsupported KNN weights: {weights}")
+        if index not in self.INDEX_TYPES:
+            raise UnsupportedHeadError(f"Unknown KNN index: {index}")
+
+        self.n_neighbors = n_neighbors
+        self.metric = metric
+        self.weights = weights
+        reference = _as_buffer(fit_X)
+        if index == "ivf":
+            self.index = IVFIndex(reference, metric, n_lists=ivf_lists, n_probe=ivf_probe)
+        else:
+            self.index = ExactIndex(reference, metric, block_size=block_size)
+        self.register_buffer("labels", _as_buffer(labels, torch.long))
+        self.register_buffer("classes", _numeric_classes(classes))
+
+    @property
+    def approximate(self) -> bool:
+        return self.index.approximate
+
+    @classmethod
+    def from_sklearn(cls, estimator, **index_options) -> "KNNHead":
+        metric = estimator.effective_metric_
+        params = estimator.effective_metric_params_ or {}
+        if metric == "minkowski":
+            metric = {1: "manhattan", 2: "euclidean"}.get(params.get("p"), metric)
+        elif metric in ("l2", "l1", "cityblock"):
+            metric = "euclidean" if metric == "l2" else "manhattan"
+
+        labels = np.asarray(estimator._y)
+        if labels.ndim != 1:
+            raise UnsupportedHeadError("Multi-output KNN is not supported")
+        if not isinstance(estimator.weights, str):
+            raise UnsupportedHeadError("Callable KNN weights are not supported")
+
+        return cls(estimator._fit_X, labels, estimator.classes_,
+                   estimator.n_neighbors, metric, estimator.weights, **index_options)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        distances, indices = self.index.search(x, self.n_neighbors)
+        neighbor_labels = self.labels[indices]
+
+        if self.weights == "distance":
+            # As in sklearn, exact matches take all the weight
+            exact = distances == 0
+            weights = torch.where(exact.any(dim=1, keepdim=True), exact.to(x.dtype), 1.0 / distances)
+        else:
+            # Padding from an approximate search (infinite distance) does not vote
+            weights = torch.isfinite(distances).to(x.dtype)
+
+        votes = torch.zeros(x.shape[0], self.classes.shape[0], dtype=weights.dtype, device=x.device)
+        votes.scatter_add_(1, neighbor_labels, weights)
+        return self.classes[votes.argmax(dim=1)]
+
+class LinearHead(nn.Module):
+    """Linear decision function followed by a threshold (binary) or argmax."""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray):
+        super().__init__()
+        self.register_buffer("coef", _as_buffer(np.atleast_2d(coef)))
+        self.register_buffer("intercept", _as_buffer(np.atleast_1d(intercept)))
+        self.register_buffer("classes", _numeric_classes(classes))
+
+    @classmethod
+    def from_sklearn(cls, estimator) -> "LinearHead":
+        return cls(estimator.coef_, estimator.intercept_, estimator.classes_)
+
+    def decision_function(self, x: torch.Tensor) -> torch.Tensor:
+        return x @ self.coef.to(x.dtype).T + self.intercept.to(x.dtype)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        scores = self.decision_function(x)
+        if scores.shape[1] == 1:
+            indices = (scores[:, 0] > 0).long()
+        else:
+            indices = scores.argmax(dim=1)
+        return self.classes[indices]
+
+class OneClassSVMHead(nn.Module):
+    """One-class SVM decision function; predicts 1 (inlier) or -1 (outlier)."""
+
+    KERNELS = ("poly", "rbf", "linear", "sigmoid")
+
+    def __init__(self, support_vectors: np.ndarray, dual_coef: np.ndarray, intercept: float,
+                 kernel: str = "poly", gamma: float = 1.0, coef0: float = 0.0, degree: int = 3):
+        super().__init__()
+        if kernel not in self.KERNELS:
+            raise UnsupportedHeadError(f"Unsupported OneClassSVM kernel: {kernel}")
+
+        self.kernel = kernel
+        self.gamma = float(gamma)
+        self.coef0 = float(coef0)
+        self.degree = int(degree)
+        self.intercept = float(intercept)
+        self.register_buffer("support_vectors", _as_buffer(support_vectors))
+        self.register_buffer("dual_coef", _as_buffer(np.ravel(dual_coef)))
+
+    @classmethod
+    def from_sklearn(cls, estimator) -> "OneClassSVMHead":
+        if not isinstance(estimator.kernel, str):
+            raise UnsupportedHeadError("Callable kernels are not supported")
+        return cls(estimator.support_vectors_, estimator.dual_coef_, float(estimator.intercept_[0]),
+                   estimator.kernel, estimator._gamma, estimator.coef0, estimator.degree)
+
+    def kernel_matrix(self, x: torch.Tensor) -> torch.Tensor:
+        """Kernel values of shape (batch_size, n_support_vectors)."""
+        support_vectors = self.support_vectors.to(x.dtype)
+        if self.kernel == "rbf":
+            return torch.exp(-self.gamma * torch.cdist(x, support_vectors).pow(2))
+
+        dot = x @ support_vectors.T
+        if self.kernel == "linear":
+            return dot
+        if self.kernel == "sigmoid":
+            return torch.tanh(self.gamma * dot + self.coef0)
+        return (self.gamma * dot + self.coef0).pow(self.degree)
+
+    def decision_function(self, x: torch.Tensor) -> torch.Tensor:
+        return self.kernel_matrix(x) @ self.dual_coef.to(x.dtype) + self.intercept
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        # libsvm treats a zero decision value as an outlier
+        return torch.where(self.decision_function(x) > 0, 1, -1)
+
+def convert_classifier(estimator: Any, knn_options: Optional[Dict[str, Any]] = None) -> nn.Module:
+    """
+    Convert a fitted sklearn estimator into a torch head.
+
+    Args:
+        estimator: Fitted KNeighborsClassifier, linear classifier or OneClassSVM
+        knn_options: Neighbour index options for KNN heads (index, block_size,
+            ivf_lists, ivf_probe)
+
+    Returns:
+        Equivalent nn.Module mapping embeddings to predicted labels
+
+    Raises:
+        UnsupportedHeadError: If the estimator (or its configuration) has no torch equivalent
+    """
+    name = type(estimator).__name__
+    if name == "KNeighborsClassifier":
+        return KNNHead.from_sklearn(estimator, **(knn_options or {}))
+    if name == "OneClassSVM":
+        return OneClassSVMHead.from_sklearn(estimator)
+    if hasattr(estimator, "coef_") and hasattr(estimator, "intercept_") and hasattr(estimator, "classes_"):
+        return LinearHead.from_sklearn(estimator)
+    raise UnsupportedHeadError(f"No torch head for {name}")
+
+def _reference_samples(estimator: Any) -> Optional[np.ndarray]:
+    for attribute in ("_fit_X", "support_vectors_"):
+        samples = getattr(estimator, attribute, None)
+        if samples is not None:
+            return np.asarray(samples, dtype=np.float64)
+    return None
+
+def make_probe_features(estimator: Any, n_samples: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Random embeddings for comparing a head with its estimator.
+
+    Samples follow the per-dimension mean and spread of the estimator's
+    stored data (training set or support vectors) when it has any.
+    """
+    rng = np.random.default_rng(seed)
+    reference = _reference_samples(estimator)
+    if reference is None:
+        return rng.standard_normal((n_samples, estimator.n_features_in_)).astype(np.float32)
+
+    mean = reference.mean(axis=0)
+    std = reference.std(axis=0) + 1e-6
+    return (mean + std * rng.standard_normal((n_samples, reference.shape[1]))).astype(np.float32)
+
+def check_parity(estimator: Any, head: nn.Module, features: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Compare torch head predictions with the sklearn estimator.
+
+    Args:
+        estimator: Fitted sklearn estimator
+        head: Converted head (on any device)
+        features: Embeddings to compare on (default: make_probe_features)
+
+    Returns:
+        Dictionary with the number of samples, mismatches and agreement ratio
+    """
+    if features is None:
+        features = make_probe_features(estimator)
+
+    expected = np.asarray(estimator.predict(features))
+    device = next(head.buffers()).device
+    with torch.no_grad():
+        actual = head(torch.as_tensor(features, device=device)).cpu().numpy()
+
+    mismatches = int((expected != actual).sum())
+    return {
+        "samples": len(features),
+        "mismatches": mismatches,
+        "agreement": 1.0 - mismatches / len(features) if len(features) else 1.0
+    }
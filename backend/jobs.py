@@ -0,0 +1,331 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils import cleanup_temp_file
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# A runner receives the job parameters and the stored input file and returns the result
+JobRunner = Callable[[Dict[str, Any], str], Awaitable[Dict[str, Any]]]
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+class JobStore:
+    """
+    SQLite-backed job state.
+
+    Every state change is written through immediately, so queued and
+    interrupted jobs can be recovered after a restart.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    filename TEXT,
+                    params TEXT NOT NULL,
+                    input_path TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def create(self, kind: str, params: Dict[str, Any], input_path: str,
+               filename: Optional[str] = None) -> str:
+        """Insert a new queued job and return its ID."""
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, filename, params, input_path, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, filename, json.dumps(params), input_path, time.time())
+            )
+        return job_id
+
+    def get(self, job_id: str, include_result: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a job.
+
+        Args:
+            job_id: Job ID
+            include_result: Also decode the stored result
+
+        Returns:
+            Job fields, or None if the job does not exist
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        result = job.pop("result")
+        if include_result:
+            job["result"] = json.loads(result) if result is not None else None
+        return job
+
+    def transition(self, job_id: str, from_states: tuple, to_state: str, **fields) -> bool:
+        """
+        Atomically move a job between states.
+
+        Args:
+            job_id: Job ID
+            from_states: States the job must currently be in
+            to_state: New state
+            **fields: Other columns to set (result is JSON encoded)
+
+        Returns:
+            True if the job was updated
+        """
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+
+        assignments = ", ".join(["status = ?"] + [f"{column} = ?" for column in fields])
+        placeholders = ", ".join("?" for _ in from_states)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN ({placeholders})",
+                (to_state, *fields.values(), job_id, *from_states)
+            )
+        return cursor.rowcount > 0
+
+    def list_ids(self, states: tuple) -> List[str]:
+        """IDs of jobs in the given states, oldest first."""
+        placeholders = ", ".join("?" for _ in states)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                states
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def requeue_running(self) -> int:
+        """Return jobs interrupted by a shutdown to the queue."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (QUEUED, RUNNING)
+            )
+        return cursor.rowcount
+
+    def purge_finished(self, older_than: float) -> int:
+        """Delete finished jobs that ended before the given timestamp."""
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED_STATES, older_than)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class JobManager:
+    """
+    Runs submitted jobs on a bounded pool of asyncio workers.
+
+    Job state lives in a JobStore; the in-memory queue only holds job IDs
+    and is rebuilt from the store on start, so jobs that were queued or
+    running when the server stopped are picked up again.
+    """
+
+    def __init__(self, store: JobStore, runners: Dict[str, JobRunner],
+                 max_workers: int = 2, max_queued: int = 100):
+        self.store = store
+        self.runners = runners
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def start(self, requeue_running: bool = True):
+        """
+        Recover unfinished jobs and start the workers.
+
+        Args:
+            requeue_running: Return jobs left running by a previous shutdown
+                to the queue. Disable when several processes share the store,
+                as the running jobs may belong to a live sibling.
+        """
+        self._queue = asyncio.Queue()
+
+        if requeue_running:
+            recovered = self.store.requeue_running()
+            if recovered:
+                logger.info(f"Requeued {recovered} interrupted job(s)")
+        for job_id in self.store.list_ids((QUEUED,)):
+            self._queue.put_nowait(job_id)
+
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    async def close(self):
+        """
+        Stop the workers.
+
+        Running jobs are interrupted but stay in the running state, so they
+        are requeued on the next start.
+        """
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        self._running.clear()
+        self._queue = None
+
+    def submit(self, kind: str, params: Dict[str, Any], input_path: str,
+               filename: Optional[str] = None) -> str:
+        """
+        Queue a job.
+
+        Args:
+            kind: Runner name
+            params: JSON-serializable runner parameters
+            input_path: Uploaded input file, owned by the job from now on
+            filename: Original upload filename
+
+        Returns:
+            Job ID
+
+        Raises:
+            JobQueueFullError: If max_queued jobs are already waiting
+        """
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+
+        job_id = self.store.create(kind, params, input_path, filename)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            True if the job was cancelled, False if it had already finished
+        """
+        if not self.store.transition(job_id, ACTIVE_STATES, CANCELLED, finished_at=time.time()):
+            return False
+
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        else:
+            self._discard_input(job_id)
+        return True
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Job {job_id} crashed")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        # Skip jobs cancelled while they were queued
+        if not self.store.transition(job_id, (QUEUED,), RUNNING, started_at=time.time()):
+            return
+
+        job = self.store.get(job_id)
+        runner = self.runners.get(job["kind"])
+        if runner is None:
+            self.store.transition(job_id, (RUNNING,), FAILED, error=f"Unknown job kind: {job['kind']}",
+                                  finished_at=time.time())
+            self._discard_input(job_id)
+            return
+
+        task = asyncio.create_task(runner(job["params"], job["input_path"]))
+        self._running[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if task.cancelled() and self.store.get(job_id)["status"] == CANCELLED:
+                # Cancelled by the user; the worker carries on with the next job
+                self._discard_input(job_id)
+                return
+            task.cancel()  # Shutdown: leave the job running so it is requeued
+            raise
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed: {e}")
+            self.store.transition(job_id, (RUNNING,), FAILED, error=str(e), finished_at=time.time())
+            self._discard_input(job_id)
+            return
+        finally:
+            self._running.pop(job_id, None)
+
+        self.store.transition(job_id, (RUNNING,), COMPLETED, result=result, finished_at=time.time())
+        self._discard_input(job_id)
+
+    def _discard_input(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is not None and job["input_path"]:
+            cleanup_temp_file(job["input_path"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker and queue statistics."""
+        return {
+            "workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "running": len(self._running),
+            "jobs_by_status": self.store.count_by_status()
+        }
@@ -2,10 +2,17 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from routes import router
+from admission import AdmissionMiddleware, UploadLimitMiddleware
+from config import Config
+from routes import (
+    router, shutdown_scheduler, preload_models, readiness,
+    start_job_manager, shutdown_job_manager
+)
+from executor import run_inference, shutdown_executors
 from utils import get_device_info
 
 # Configure logging
@@ -25,10 +32,33 @@ async def lifespan(app: FastAPI):
     if device_info['cuda_available']:
         logger.info(f"CUDA device: {device_info['cuda_device_name']}")
     
+    # An unknown sampling mode would fail every video request
+    sampling_warning = Config.check_frame_sampling_mode()
+    if sampling_warning:
+        logger.warning(sampling_warning)
+    
+    # Preload and warm up models in the background; /ready reports progress
+    preload_task = None
+    if Config.PRELOAD_CLASSIFIERS:
+        logger.info(f"Preloading classifiers: {Config.PRELOAD_CLASSIFIERS}")
+        preload_task = asyncio.create_task(run_inference(
+            preload_models, Config.PRELOAD_CLASSIFIERS, Config.WARMUP_BATCH_SIZES
+        ))
+    else:
+        readiness.update(ready=True, stage="ready")
+    
+    # Background job workers (queued jobs from a previous run are resumed)
+    await start_job_manager()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Deepfake Detection API")
+    if preload_task is not None and not preload_task.done():
+        preload_task.cancel()
+    await shutdown_job_manager()
+    await shutdown_scheduler()
+    shutdown_executors()
 
 # Create FastAPI app
 app = FastAPI(
@@ -38,10 +68,13 @@ app = FastAPI(
     
     ## Features
     - **Image Detection**: Analyze single images for deepfake detection
-    - **Video Detection**: Analyze videos by extracting and processing frames
+    - **Video Detection**: Analyze videos by extracting and processing frames, optionally skipping near-duplicate frames and stopping once the majority verdict is settled
     - **Batch Processing**: Process multiple images at once
+    - **Background Jobs**: Queue long videos with `/jobs/video` and poll for the result
     - **Multiple Models**: Support for KNN, Linear, and SVM classifiers
+    - **Ensemble Mode**: Run all classifiers on one shared embedding with `model_type=all`
     - **GPU Acceleration**: Automatic GPU usage when available
+    - **Admission Control**: Overload returns 429/503 with `Retry-After`; send `X-Request-Timeout-Ms` to drop work that cannot finish in time
     
     ## Models Available
     - **KNN**: K-Nearest Neighbors classifier (default)
@@ -58,6 +91,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control and deadlines for the detection routes (inside CORS, so
+# rejections carry CORS headers)
+app.add_middleware(AdmissionMiddleware, prefix="/api/v1")
+
+# Oversized uploads are cut off during transfer, before they take a queue slot
+app.add_middleware(UploadLimitMiddleware, prefix="/api/v1")
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -102,7 +142,7 @@ if __name__ == "__main__":
     config = {
         "host": "0.0.0.0",
         "port": 8000,
-        "reload": True,  # Set to False in production
+        "reload": True,  # Development server; use serve.py in production
         "log_level": "info",
         "access_log": True
     }
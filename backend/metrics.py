@@ -0,0 +1,215 @@
+"""
+Prometheus metrics for the detection pipeline.
+
+Request metrics are labelled by endpoint and classifier; stage timings are
+labelled by the endpoint that triggered them, which is tracked in a context
+variable so shared helpers (embed_images, analyze_video, ...) do not need to
+be told who called them. Model forwards are shared across requests by the
+micro-batching scheduler, so they are recorded per batch without an
+endpoint label.
+
+Stages are timed where the event loop awaits them, so executor queueing is
+included and timings survive EXECUTOR_TYPE=process (metrics recorded in a
+process pool worker would be lost).
+
+With PROMETHEUS_MULTIPROC_DIR set (see serve.py), metrics from every forked
+worker are aggregated when scraped.
+"""
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Tuple
+
+from fastapi import HTTPException
+
+from config import Config
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, multiprocess
+except ImportError:  # Metrics are optional
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+# Endpoint label for stage timings recorded while handling a request
+_endpoint: ContextVar[str] = ContextVar('metrics_endpoint', default='none')
+
+if prometheus_client is not None:
+    REQUESTS = Counter(
+        'deepfake_requests_total', 'Detection requests by response status',
+        ['endpoint', 'classifier', 'status']
+    )
+    REQUEST_SECONDS = Histogram(
+        'deepfake_request_duration_seconds', 'Detection request latency',
+        ['endpoint', 'classifier'], buckets=LATENCY_BUCKETS
+    )
+    IN_FLIGHT = Gauge(
+        'deepfake_requests_in_flight', 'Detection requests being processed',
+        ['endpoint'], multiprocess_mode='livesum'
+    )
+    STAGE_SECONDS = Histogram(
+        'deepfake_stage_duration_seconds',
+        'Time spent in each processing stage (upload_read, decode, extract_frames, '
+        'frames_to_tensors, forward, classify, encode)',
+        ['endpoint', 'stage'], buckets=LATENCY_BUCKETS
+    )
+    ITEMS = Histogram(
+        'deepfake_request_items', 'Images or video frames processed per request',
+        ['endpoint', 'kind'], buckets=BATCH_SIZE_BUCKETS
+    )
+    FORWARD_SECONDS = Histogram(
+        'deepfake_model_forward_duration_seconds', 'Backbone forward latency per batch',
+        ['backend'], buckets=LATENCY_BUCKETS
+    )
+    FORWARD_BATCH_SIZE = Histogram(
+        'deepfake_model_forward_batch_size', 'Rows per backbone forward',
+        buckets=BATCH_SIZE_BUCKETS
+    )
+    CLASSIFIER_SECONDS = Histogram(
+        'deepfake_classifier_duration_seconds', 'Classifier head latency per batch',
+        ['classifier'], buckets=LATENCY_BUCKETS
+    )
+    ADMISSION_REJECTIONS = Counter(
+        'deepfake_admission_rejections_total',
+        'Requests turned away by admission control (queue_full, timeout, deadline)',
+        ['endpoint_class', 'reason']
+    )
+    ADMISSION_QUEUED = Gauge(
+        'deepfake_admission_queued', 'Requests waiting for an admission slot',
+        ['endpoint_class'], multiprocess_mode='livesum'
+    )
+
+def is_enabled() -> bool:
+    """Whether prometheus_client is installed."""
+    return prometheus_client is not None
+
+def get_endpoint() -> str:
+    """Endpoint label of the request being handled."""
+    return _endpoint.get()
+
+@contextmanager
+def endpoint_label(endpoint: str):
+    """Attribute stage timings recorded inside the block to endpoint."""
+    token = _endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+async def labelled_stream(endpoint: str, stream: AsyncGenerator):
+    """Re-yield a streaming response body, attributing its stage timings to endpoint."""
+    try:
+        with endpoint_label(endpoint):
+            async for item in stream:
+                yield item
+    finally:
+        await stream.aclose()
+
+@contextmanager
+def track_request(endpoint: str, classifier: str, success_status: int = 200):
+    """
+    Count a request, its latency and response status, and keep it in the
+    in-flight gauge while the block runs.
+    """
+    if prometheus_client is None:
+        with endpoint_label(endpoint):
+            yield
+        return
+
+    IN_FLIGHT.labels(endpoint).inc()
+    start_time = time.perf_counter()
+    status = str(success_status)
+    try:
+        with endpoint_label(endpoint):
+            yield
+    except HTTPException as e:
+        status = str(e.status_code)
+        raise
+    except BaseException:
+        status = '500'
+        raise
+    finally:
+        REQUEST_SECONDS.labels(endpoint, classifier).observe(time.perf_counter() - start_time)
+        REQUESTS.labels(endpoint, classifier, status).inc()
+        IN_FLIGHT.labels(endpoint).dec()
+
+def instrument(endpoint: str, success_status: int = 200):
+    """Decorator applying track_request to an async route, labelled by its model_type argument."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            model_type = kwargs.get('model_type', 'none')
+            # Unvalidated input must not create new label values
+            classifier = model_type if Config.validate_model_type(model_type) else 'invalid'
+            with track_request(endpoint, classifier, success_status):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def time_stage(stage: str):
+    """Record the duration of a processing stage for the current endpoint."""
+    if prometheus_client is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(_endpoint.get(), stage).observe(time.perf_counter() - start_time)
+
+def observe_items(kind: str, count: int):
+    """Record how many images or frames the current request processes."""
+    if prometheus_client is not None:
+        ITEMS.labels(_endpoint.get(), kind).observe(count)
+
+def observe_forward(backend: str, batch_size: int, seconds: float):
+    """Record one backbone forward."""
+    if prometheus_client is not None:
+        FORWARD_SECONDS.labels(backend).observe(seconds)
+        FORWARD_BATCH_SIZE.observe(batch_size)
+
+def observe_classifier(classifier: str, seconds: float):
+    """Record one classifier head evaluation."""
+    if prometheus_client is not None:
+        CLASSIFIER_SECONDS.labels(classifier).observe(seconds)
+
+def observe_admission_rejection(endpoint_class: str, reason: str):
+    """Count a request rejected by admission control or dropped at its deadline."""
+    if prometheus_client is not None:
+        ADMISSION_REJECTIONS.labels(endpoint_class, reason).inc()
+
+def set_admission_queued(endpoint_class: str, queued: int):
+    """Record how many requests wait for an admission slot."""
+    if prometheus_client is not None:
+        ADMISSION_QUEUED.labels(endpoint_class).set(queued)
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body, content type)
+
+    Raises:
+        RuntimeError: If prometheus_client is not installed
+    """
+    if prometheus_client is None:
+        raise RuntimeError("prometheus_client is not installed")
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid: int):
+    """Drop the live gauges of an exited worker (multiprocess mode)."""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
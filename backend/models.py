@@ -3,75 +3,356 @@ from huggingface_hub import hf_hub_download
 import torch
 import torch.nn as nn
 import joblib
-from typing import Optional
+import logging
+import contextlib
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from heads import UnsupportedHeadError, convert_classifier, check_parity
+from backends import BACKEND_NAMES, CLSEmbedding, load_backend, weights_fingerprint
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Backbone precision modes: fp32, bf16 autocast, int8 dynamic quantization of Linear layers
+PRECISION_MODES = ('fp32', 'bf16', 'int8')
+
+# Classifier artifacts shipped alongside the backbone in the hub repository
+CLASSIFIER_FILES = {
+    'svm': 'sklearn/ocsvm_kernel_poly_gamma_auto_nu_0_1_crop.joblib',
+    'linear': 'sklearn/linear_tot_classifier_epoch-32.sav',
+    'knn': 'sklearn/knn_tot_classifier_epoch-32.sav'
+}
 
 class VITContrastiveHF(nn.Module):
     """
     Vision Transformer model for deepfake detection using contrastive learning.
     Supports three classifier types: svm, linear, and knn.
     
+    The ViT backbone is loaded once and shared by every classifier head, so
+    several heads can be evaluated on a single CLS embedding. With
+    torch_heads enabled the sklearn classifiers are converted into torch
+    modules (see heads.py) that run on the backbone's device; estimators
+    that cannot be converted, or whose converted head disagrees with them,
+    are used through sklearn.
+    
+    The backbone runs in fp32 by default; set_precision switches it to bf16
+    autocast or int8 dynamic quantization. CLS embeddings are always returned
+    as float32. set_backend serves the backbone from a TorchScript or ONNX
+    export instead of eager PyTorch (see backends.py).
+    
+    With bundle_dir set, everything is loaded from a local bundle (see
+    bundle.py) without hub access, and the safetensors weights are
+    memory-mapped instead of read into memory up front.
+    
     Prediction outputs:
     - linear/knn: 0 = Real, 1 = Fake
     - svm: -1 = Real, 1 = Fake
     """
     
-    def __init__(self, repo_name: str = 'aimagelab/CoDE', classificator_type: str = 'knn'):
+    def __init__(self, repo_name: str = 'aimagelab/CoDE', classificator_type: str = 'knn',
+                 torch_heads: bool = True, knn_options: Optional[Dict[str, Any]] = None,
+                 bundle_dir: Optional[str] = None):
         super(VITContrastiveHF, self).__init__()
         
-        if classificator_type not in ['svm', 'linear', 'knn']:
+        if classificator_type not in CLASSIFIER_FILES:
             raise ValueError('Selected an invalid classifier. Choose from: svm, linear, knn')
         
         self.classificator_type = classificator_type
         self.repo_name = repo_name
+        self.bundle_dir = bundle_dir or None
+        self.torch_heads = torch_heads
+        self.knn_options = knn_options or {}  # Neighbour index settings, see heads.KNNHead
+        self.classifiers: Dict[str, Any] = {}
+        self.heads = nn.ModuleDict()  # Converted torch heads, moved with the backbone
+        self.precision = 'fp32'
+        self.backend = None  # Exported backbone; None runs eager PyTorch
+        self.backend_info: Dict[str, Any] = {'name': 'eager'}
+        self._weights_fingerprint: Optional[str] = None
         
         # Load the base model
-        self.model = transformers.AutoModel.from_pretrained(repo_name)
+        if self.bundle_dir:
+            source = self.bundle_dir
+            load_options = {'local_files_only': True, 'use_safetensors': True, 'low_cpu_mem_usage': True}
+        else:
+            source = repo_name
+            load_options = {}
+        self.model = transformers.AutoModel.from_pretrained(source, **load_options)
         self.model.pooler = nn.Identity()
         
         # Load processor
-        self.processor = transformers.AutoProcessor.from_pretrained(repo_name)
+        self.processor = transformers.AutoProcessor.from_pretrained(
+            source, **({'local_files_only': True} if self.bundle_dir else {})
+        )
         self.processor.do_resize = False
         
-        # Load the appropriate classifier
-        self._load_classifier()
+        # Load the default classifier
+        self.load_classifier(classificator_type)
+    
+    @property
+    def classifier(self) -> Any:
+        """Classifier head used when no classifier type is requested."""
+        return self.classifiers[self.classificator_type]
+    
+    @property
+    def loaded_classifiers(self) -> List[str]:
+        """Names of the classifier heads currently attached to the backbone."""
+        return list(self.classifiers.keys())
     
-    def _load_classifier(self):
-        """Load the classifier based on the specified type."""
-        classifier_files = {
-            'svm': 'sklearn/ocsvm_kernel_poly_gamma_auto_nu_0_1_crop.joblib',
-            'linear': 'sklearn/linear_tot_classifier_epoch-32.sav',
-            'knn': 'sklearn/knn_tot_classifier_epoch-32.sav'
+    @property
+    def classifier_backends(self) -> Dict[str, str]:
+        """Whether each loaded head runs as a torch module or through sklearn."""
+        return {
+            name: 'torch' if name in self.heads else 'sklearn'
+            for name in self.classifiers
         }
+    
+    def load_classifier(self, classifier_type: str) -> Any:
+        """
+        Attach a classifier head to the shared backbone.
+        
+        Args:
+            classifier_type: Classifier to load (svm, linear, knn)
+            
+        Returns:
+            The loaded classifier (already loaded heads are reused)
+        """
+        if classifier_type not in CLASSIFIER_FILES:
+            raise ValueError('Selected an invalid classifier. Choose from: svm, linear, knn')
+        
+        if classifier_type not in self.classifiers:
+            if self.bundle_dir:
+                file_path = os.path.join(self.bundle_dir, CLASSIFIER_FILES[classifier_type])
+            else:
+                file_path = hf_hub_download(
+                    repo_id=self.repo_name, 
+                    filename=CLASSIFIER_FILES[classifier_type]
+                )
+            estimator = joblib.load(file_path)
+            self.classifiers[classifier_type] = self._build_head(classifier_type, estimator)
+        
+        return self.classifiers[classifier_type]
+    
+    def _build_head(self, classifier_type: str, estimator: Any) -> Any:
+        """Convert a loaded estimator to a torch head, falling back to the estimator."""
+        if not self.torch_heads:
+            return estimator
+        
+        try:
+            head = convert_classifier(estimator, self.knn_options)
+        except UnsupportedHeadError as e:
+            logger.warning(f"Using sklearn for the {classifier_type} classifier: {e}")
+            return estimator
+        
+        parity = check_parity(estimator, head)
+        if getattr(head, 'approximate', False):
+            # Approximate heads are expected to differ occasionally; report recall
+            logger.info(
+                f"Approximate {classifier_type} head agrees with sklearn on "
+                f"{parity['agreement']:.1%} of probe samples"
+            )
+        elif parity['mismatches']:
+            logger.warning(
+                f"Using sklearn for the {classifier_type} classifier: torch head disagrees "
+                f"on {parity['mismatches']}/{parity['samples']} probe samples"
+            )
+            return estimator
+        
+        head.to(self.device)
+        self.heads[classifier_type] = head
+        return head
+    
+    def set_precision(self, mode: str) -> str:
+        """
+        Select the numeric precision of the backbone.
+        
+        Call after to_device: int8 dynamic quantization is CPU-only and
+        falls back to fp32 on other devices.
+        
+        Args:
+            mode: fp32, bf16 (autocast) or int8 (dynamic quantization of Linear layers)
+            
+        Returns:
+            The precision mode now active
+        """
+        if mode not in PRECISION_MODES:
+            raise ValueError(f"Invalid precision mode. Choose from: {', '.join(PRECISION_MODES)}")
+        if mode == self.precision:
+            return mode
+        if self.precision == 'int8':
+            raise ValueError("An int8-quantized backbone cannot be converted back; reload the model")
+        
+        if self.backend is not None:
+            raise ValueError("Set the precision before selecting an exported backend")
+        
+        if mode == 'int8':
+            if self.device.type != 'cpu':
+                logger.warning(f"int8 dynamic quantization is CPU-only; keeping fp32 on {self.device}")
+                return self.precision
+            self.weights_fingerprint  # Fingerprint the fp32 weights before they are packed
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {nn.Linear}, dtype=torch.qint8
+            )
+        
+        self.precision = mode
+        return mode
+    
+    @property
+    def embedding_signature(self) -> str:
+        """Effective precision, backend and device; embeddings differ slightly across them."""
+        return f"{self.precision}|{self.backend_info['name']}|{self.device.type}"
+    
+    @property
+    def weights_fingerprint(self) -> str:
+        """Fingerprint of the fp32 backbone weights (keys exported artifacts)."""
+        if self._weights_fingerprint is None:
+            self._weights_fingerprint = weights_fingerprint(self.model)
+        return self._weights_fingerprint
+    
+    def set_backend(self, name: str, cache_dir: str, tolerance: float = 1e-3) -> str:
+        """
+        Serve the backbone from an exported artifact.
+        
+        The export is cached in cache_dir and checked against eager output
+        on random inputs; if exporting, loading or the check fails, or the
+        precision mode cannot be exported (bf16 autocast), the model keeps
+        running eagerly.
+        
+        Args:
+            name: eager, torchscript or onnx
+            cache_dir: Directory for exported artifacts
+            tolerance: Maximum relative difference from eager embeddings
+            
+        Returns:
+            The backend now active
+        """
+        if name not in BACKEND_NAMES:
+            raise ValueError(f"Invalid inference backend. Choose from: {', '.join(BACKEND_NAMES)}")
+        
+        self.backend = None
+        self.backend_info = {'name': 'eager'}
+        if name == 'eager':
+            return 'eager'
+        
+        if self.precision == 'bf16' or (name == 'onnx' and self.precision == 'int8'):
+            logger.warning(f"The {name} backend does not support {self.precision} precision; using eager")
+            return 'eager'
+        
+        try:
+            loaded = load_backend(
+                name,
+                CLSEmbedding(self.model).eval(),
+                reference_fn=self._extract_features_eager,
+                fingerprint=self.weights_fingerprint,
+                precision=self.precision,
+                device=self.device,
+                image_size=self.model.config.image_size,
+                cache_dir=cache_dir,
+                tolerance=tolerance
+            )
+        except Exception as e:
+            logger.warning(f"Falling back to eager inference: {name} backend unavailable ({e})")
+            return 'eager'
         
-        file_path = hf_hub_download(
-            repo_id=self.repo_name, 
-            filename=classifier_files[self.classificator_type]
+        self.backend = loaded.pop('backend')
+        self.backend_info = {'name': name, **loaded}
+        logger.info(
+            f"Serving the backbone with {name} (max relative difference from eager "
+            f"{loaded['max_relative_difference']:.2e})"
         )
-        self.classifier = joblib.load(file_path)
+        return name
+    
+    @property
+    def device(self) -> torch.device:
+        """Device holding the backbone weights."""
+        return next(self.model.parameters(), torch.empty(0)).device
+    
+    def _autocast(self, x: torch.Tensor):
+        if self.precision == 'bf16':
+            return torch.autocast(device_type=x.device.type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+    
+    def extract_features(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Compute the CLS token embedding for a batch of images.
+        
+        Args:
+            x: Input tensor of shape (batch_size, channels, height, width)
+            
+        Returns:
+            Tensor of shape (batch_size, hidden_size)
+        """
+        start_time = time.perf_counter()
+        if self.backend is not None:
+            features = self.backend(x).detach().float()
+        else:
+            features = self._extract_features_eager(x)
+        metrics.observe_forward(self.backend_info['name'], x.shape[0], time.perf_counter() - start_time)
+        return features
+    
+    def _extract_features_eager(self, x: torch.Tensor) -> torch.Tensor:
+        with self._autocast(x):
+            features = self.model(x)
+        return features.last_hidden_state[:, 0, :].detach().float()
+    
+    def classify(self, features: torch.Tensor, classifier_type: Optional[str] = None) -> torch.Tensor:
+        """
+        Apply a classifier head to precomputed CLS embeddings.
+        
+        Args:
+            features: CLS embeddings from extract_features
+            classifier_type: Head to use (defaults to the model's classifier)
+            
+        Returns:
+            Tensor of raw predictions (on the features' device for torch heads)
+        """
+        classifier_type = classifier_type or self.classificator_type
+        classifier = self.load_classifier(classifier_type)
+        start_time = time.perf_counter()
+        if isinstance(classifier, nn.Module):
+            predictions = classifier(features)
+        else:
+            predictions = torch.from_numpy(classifier.predict(features.cpu().numpy()))
+        metrics.observe_classifier(classifier_type, time.perf_counter() - start_time)
+        return predictions
     
-    def forward(self, x: torch.Tensor, return_feature: bool = False) -> torch.Tensor:
+    def forward(self, x: torch.Tensor, return_feature: bool = False,
+                classifier_type: Optional[str] = None) -> torch.Tensor:
         """
         Forward pass through the model.
         
         Args:
             x: Input tensor of shape (batch_size, channels, height, width)
             return_feature: If True, return raw features instead of predictions
+            classifier_type: Head to use (defaults to the model's classifier)
             
         Returns:
             Predictions or features based on return_feature flag
         """
-        features = self.model(x)
-        
         if return_feature:
-            return features
+            with self._autocast(x):
+                return self.model(x)
         
-        # Extract CLS token features
-        features = features.last_hidden_state[:, 0, :].cpu().detach().numpy()
-        
-        # Get predictions from classifier
-        predictions = self.classifier.predict(features)
+        return self.classify(self.extract_features(x), classifier_type)
+    
+    def forward_all(self, x: torch.Tensor,
+                    classifier_types: Optional[Iterable[str]] = None) -> Dict[str, torch.Tensor]:
+        """
+        Run the backbone once and apply several classifier heads.
         
-        return torch.from_numpy(predictions)
+        Args:
+            x: Input tensor of shape (batch_size, channels, height, width)
+            classifier_types: Heads to apply (defaults to all available heads)
+            
+        Returns:
+            Dictionary mapping classifier type to its predictions
+        """
+        features = self.extract_features(x)
+        return {
+            classifier_type: self.classify(features, classifier_type)
+            for classifier_type in (classifier_types or CLASSIFIER_FILES)
+        }
     
     def predict_single(self, x: torch.Tensor) -> str:
         """
@@ -94,4 +375,5 @@ class VITContrastiveHF(nn.Module):
     def to_device(self, device: torch.device):
         """Move model to specified device."""
         self.model.to(device)
-        return self
\ No newline at end of file
+        self.heads.to(device)
+        return self
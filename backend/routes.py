@@ -1,34 +1,433 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from PIL import Image
 import torch
-import io
-from typing import Optional, Dict, Any
+import os
+import json
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 
+try:
+    import msgpack
+except ImportError:  # msgpack responses are optional
+    msgpack = None
+
+import admission
+import metrics
+from config import Config
 from models import VITContrastiveHF
+from scheduler import InferenceScheduler
+from cache import EmbeddingCache
+from bundle import ensure_standin_bundle
+from jobs import JobStore, JobManager, JobQueueFullError, COMPLETED, FAILED
+from executor import (
+    run_cpu_bound, run_inference, run_blocking, get_inference_executor, get_executor_info
+)
 from utils import (
     device, VideoProcessor, ImageProcessor, PredictionProcessor,
-    save_uploaded_file, cleanup_temp_file, get_device_info
+    save_upload_stream, get_upload_suffix, FileTooLargeError,
+    cleanup_temp_file, get_device_info, get_preprocessing_signature,
+    encode_image_payload, encode_image_payloads
 )
 
+logger = logging.getLogger(__name__)
+
 # Create router
 router = APIRouter()
 
-# Global model instances (will be initialized on first use)
-models = {}
+# Shared backbone instance (will be initialized on first use); classifier
+# heads are attached to it on demand
+backbone: Optional[VITContrastiveHF] = None
+
+# Guards model creation so concurrent first requests load the backbone once
+_model_lock = threading.Lock()
+
+# Readiness stages during which detection requests are turned away with 503
+LOADING_STAGES = ("starting", "loading", "warming_up")
+
+# Readiness state, updated by the startup preload
+readiness: Dict[str, Any] = {
+    "ready": False,
+    "stage": "starting",
+    "error": None,
+    "warmup_batch_sizes": [],
+    "warmup_seconds": None
+}
+
+# Micro-batching scheduler feeding the shared backbone
+scheduler: Optional[InferenceScheduler] = None
+
+# CLS embeddings of previously seen uploads
+embedding_cache: Optional[EmbeddingCache] = (
+    EmbeddingCache(
+        max_bytes=Config.get_embedding_cache_limit_bytes(),
+        signature=(
+            f"{Config.get_model_id()}|{get_preprocessing_signature()}"
+        ),
+        disk_dir=Config.EMBEDDING_CACHE_DIR
+    )
+    if Config.EMBEDDING_CACHE_ENABLED else None
+)
+
+# Background job subsystem for long-running video analysis (started with the app)
+job_manager: Optional[JobManager] = None
+
+def get_bundle_dir() -> Optional[str]:
+    """Local bundle to load the model from (None loads from the hub)."""
+    if Config.MODEL_STANDIN:
+        logger.warning("Serving the stand-in model: predictions are meaningless (testing only)")
+        return ensure_standin_bundle(Config.STANDIN_MODEL_DIR)
+    return Config.MODEL_BUNDLE_DIR or None
+
+def get_classifier_types(model_type: str) -> List[str]:
+    """Classifier heads needed to serve model_type."""
+    if model_type == Config.ALL_CLASSIFIERS_MODE:
+        return Config.AVAILABLE_CLASSIFIERS
+    return [model_type]
+
+def is_model_loaded(classifier_type: str) -> bool:
+    """Whether the backbone and the requested classifier head(s) are loaded."""
+    return backbone is not None and all(
+        name in backbone.classifiers for name in get_classifier_types(classifier_type)
+    )
 
 def get_model(classifier_type: str) -> VITContrastiveHF:
-    """Get or create model instance."""
-    if classifier_type not in models:
-        try:
-            model = VITContrastiveHF(classificator_type=classifier_type)
-            model.to_device(device)
-            model.eval()
-            models[classifier_type] = model
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
+    """Get the shared model with the requested classifier head(s) loaded."""
+    global backbone
+    
+    classifier_types = get_classifier_types(classifier_type)
+    
+    # Fast path once the backbone and heads are loaded
+    if is_model_loaded(classifier_type):
+        return backbone
+    
+    try:
+        with _model_lock:
+            if backbone is None:
+                model = VITContrastiveHF(
+                    classificator_type=classifier_types[0],
+                    torch_heads=Config.TORCH_CLASSIFIER_HEADS,
+                    knn_options=Config.get_knn_options(),
+                    bundle_dir=get_bundle_dir()
+                )
+                model.to_device(device)
+                model.eval()
+                model.set_precision(Config.INFERENCE_PRECISION)
+                model.set_backend(
+                    Config.INFERENCE_BACKEND, Config.BACKEND_CACHE_DIR, Config.BACKEND_TOLERANCE
+                )
+                backbone = model
+            
+            for name in classifier_types:
+                backbone.load_classifier(name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
+    
+    return backbone
+
+async def load_model(classifier_type: str) -> VITContrastiveHF:
+    """
+    Get the shared model from async code without blocking the event loop.
+    
+    A cold load (hub downloads, head unpickling and conversion, parity
+    checks) runs on a worker thread. While the startup preload and warmup
+    are in progress, requests are turned away instead of queueing behind
+    them; after a failed preload, a successful load marks the service ready.
+    
+    Raises:
+        HTTPException: 503 with Retry-After until the model is ready
+    """
+    if readiness["stage"] in LOADING_STAGES:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not ready yet ({readiness['stage']}); retry later",
+            headers={"Retry-After": "5"}
+        )
+    if is_model_loaded(classifier_type):
+        return backbone
+    model = await run_blocking(get_model, classifier_type)
+    
+    if readiness["stage"] == "failed":
+        # An on-demand load recovered from a failed preload
+        readiness.update(ready=True, stage="ready", error=None)
+        logger.info(f"Models ready after a failed preload: {get_loaded_classifiers()}")
+    return model
+
+async def wait_until_loaded(poll_interval: float = 0.5):
+    """Wait for the startup preload and warmup to finish (or fail)."""
+    while readiness["stage"] in LOADING_STAGES:
+        await asyncio.sleep(poll_interval)
+
+def get_loaded_classifiers() -> list:
+    """List classifier heads attached to the shared backbone."""
+    return backbone.loaded_classifiers if backbone is not None else []
+
+def preload_models(classifier_types: List[str], warmup_batch_sizes: List[int]):
+    """
+    Load the backbone and classifier heads, then run warmup forwards.
+    
+    Marks the service ready once every warmup batch size has been served.
+    
+    Args:
+        classifier_types: Classifier heads to load
+        warmup_batch_sizes: Batch sizes to run dummy forwards at
+    """
+    try:
+        readiness.update(ready=False, stage="loading", error=None, warmup_batch_sizes=[])
+        model = None
+        for name in classifier_types:
+            model = get_model(name)
+        
+        readiness["stage"] = "warming_up"
+        start_time = time.perf_counter()
+        if model is not None:
+            for batch_size in warmup_batch_sizes:
+                dummy = torch.zeros(batch_size, 3, 224, 224, device=device)
+                features = _extract_features_sync(model, dummy)
+                _classify_sync(model, features, classifier_types)
+                readiness["warmup_batch_sizes"].append(batch_size)
+        
+        readiness.update(
+            ready=True,
+            stage="ready",
+            warmup_seconds=time.perf_counter() - start_time
+        )
+        logger.info(f"Models ready: {get_loaded_classifiers()}")
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        readiness.update(ready=False, stage="failed", error=detail)
+        logger.error(f"Model preload failed: {detail}")
+
+def get_scheduler(model: VITContrastiveHF) -> InferenceScheduler:
+    """Get or create the micro-batching scheduler for the shared backbone."""
+    global scheduler
+    if scheduler is None:
+        scheduler = InferenceScheduler(
+            model.extract_features,
+            max_batch_size=Config.MICRO_BATCH_MAX_SIZE,
+            max_wait_ms=Config.MICRO_BATCH_MAX_WAIT_MS,
+            executor=get_inference_executor()
+        )
+    return scheduler
+
+async def shutdown_scheduler():
+    """Stop the micro-batching scheduler, if one was started."""
+    global scheduler
+    if scheduler is not None:
+        await scheduler.close()
+        scheduler = None
+
+def validate_model_type(model_type: str):
+    """Reject unknown classifier types."""
+    if not Config.validate_model_type(model_type):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid model_type. Choose from: knn, linear, svm, all"
+        )
+
+def validate_response_options(image_payload: str, response_format: str):
+    """Reject unknown image payload modes and response formats."""
+    if image_payload not in Config.IMAGE_PAYLOAD_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid image_payload. Choose from: {', '.join(Config.IMAGE_PAYLOAD_MODES)}"
+        )
+    
+    if response_format not in Config.RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid response_format. Choose from: {', '.join(Config.RESPONSE_FORMATS)}"
+        )
+    
+    if response_format == "msgpack" and msgpack is None:
+        raise HTTPException(
+            status_code=400,
+            detail="msgpack responses require the msgpack package"
+        )
+
+def get_image_field(response_format: str) -> str:
+    """Response key for image payloads: raw bytes in msgpack, base64 strings in JSON."""
+    return "image_bytes" if response_format == "msgpack" else "image_base64"
+
+def build_response(response_data: Dict[str, Any], response_format: str):
+    """Serialize response data as JSON (default) or msgpack."""
+    if response_format == "msgpack":
+        return Response(
+            content=msgpack.packb(response_data, use_bin_type=True),
+            media_type="application/x-msgpack"
+        )
+    return response_data
+
+def _extract_features_sync(model: VITContrastiveHF, input_tensor: torch.Tensor) -> torch.Tensor:
+    with torch.no_grad():
+        return model.extract_features(input_tensor)
+
+def _classify_sync(model: VITContrastiveHF, features: torch.Tensor,
+                   classifier_types: list) -> Dict[str, torch.Tensor]:
+    return {name: model.classify(features, name) for name in classifier_types}
+
+async def extract_features(model: VITContrastiveHF, input_tensor: torch.Tensor) -> torch.Tensor:
+    """Compute CLS embeddings, batching with concurrent requests when enabled."""
+    # Drop work that can no longer finish in time before paying for the forward
+    admission.check_deadline("forward", admission.forward_latency.value)
+    
+    start_time = time.perf_counter()
+    with metrics.time_stage("forward"):
+        if Config.ENABLE_MICRO_BATCHING:
+            features = await get_scheduler(model).submit(input_tensor)
+        else:
+            features = await run_inference(_extract_features_sync, model, input_tensor)
+    admission.forward_latency.observe(time.perf_counter() - start_time)
+    return features
+
+async def embed_images(model: VITContrastiveHF, file_contents: List[bytes],
+                       keep_images: bool = True) -> List[Any]:
+    """
+    Decode, preprocess and embed several uploads with a single backbone forward.
+    
+    Uploads are decoded in parallel on the CPU executor; cached embeddings
+    are reused and decoding errors are isolated to the upload that caused them.
+    With keep_images=False only the model's center crop is decoded.
+    
+    Returns:
+        Per upload, either a tuple of (decoded image, or None on a cache hit
+        or when keep_images is False; CLS embedding of shape (1, hidden_size))
+        or the exception raised while decoding it
+    """
+    metrics.observe_items("images", len(file_contents))
+    outputs: List[Any] = [None] * len(file_contents)
+    cache_keys: List[Optional[str]] = [None] * len(file_contents)
+    to_decode = []
+    
+    # Hashing the uploads and reading the disk tier happen off the event loop
+    cached: List[Optional[torch.Tensor]] = [None] * len(file_contents)
+    if embedding_cache is not None:
+        cache_keys, cached = await run_blocking(
+            embedding_cache.lookup_many, file_contents, model.embedding_signature
+        )
+    
+    for i, features in enumerate(cached):
+        if features is not None:
+            outputs[i] = (None, features.to(device))
+        else:
+            to_decode.append(i)
+    
+    with metrics.time_stage("decode"):
+        decoded = await asyncio.gather(*[
+            run_cpu_bound(ImageProcessor.decode_and_preprocess, file_contents[i], keep_images)
+            for i in to_decode
+        ], return_exceptions=True)
+    
+    valid = []
+    for i, item in zip(to_decode, decoded):
+        if isinstance(item, BaseException):
+            outputs[i] = item
+        else:
+            valid.append((i, item))
+    
+    if valid:
+        input_tensor = torch.cat([tensor for _, (_, tensor) in valid]).to(device)
+        features = await extract_features(model, input_tensor)
+        
+        new_entries = []
+        for row, (i, (image, _)) in enumerate(valid):
+            image_features = features[row:row + 1]
+            if cache_keys[i] is not None:
+                new_entries.append((cache_keys[i], image_features))
+            outputs[i] = (image, image_features)
+        
+        if new_entries:
+            await run_blocking(embedding_cache.put_many, new_entries)
     
-    return models[classifier_type]
+    return outputs
+
+async def embed_image(model: VITContrastiveHF, file_content: bytes,
+                      keep_image: bool = True) -> Tuple[Optional[Image.Image], torch.Tensor]:
+    """
+    Decode, preprocess and embed uploaded image bytes, reusing cached embeddings.
+    
+    Returns:
+        Tuple of (decoded image, or None on a cache hit or when keep_image
+        is False; CLS embedding)
+    """
+    output = (await embed_images(model, [file_content], keep_image))[0]
+    if isinstance(output, BaseException):
+        raise output
+    return output
+
+async def classify_features(model: VITContrastiveHF, features: torch.Tensor,
+                            model_type: str) -> Dict[str, torch.Tensor]:
+    """
+    Apply the requested classifier head(s) to CLS embeddings.
+    
+    Returns:
+        Dictionary mapping classifier type to its raw predictions
+    """
+    classifier_types = get_classifier_types(model_type)
+    
+    with metrics.time_stage("classify"):
+        return await run_inference(_classify_sync, model, features, classifier_types)
+
+async def run_classifiers(model: VITContrastiveHF, input_tensor: torch.Tensor,
+                          model_type: str) -> Dict[str, torch.Tensor]:
+    """
+    Run the backbone once and apply the requested classifier head(s).
+    
+    Returns:
+        Dictionary mapping classifier type to its raw predictions
+    """
+    features = await extract_features(model, input_tensor)
+    return await classify_features(model, features, model_type)
+
+def combine_predictions(predictions: Dict[str, torch.Tensor], model_type: str) -> torch.Tensor:
+    """Reduce per-classifier predictions to the verdicts reported for model_type."""
+    if model_type == Config.ALL_CLASSIFIERS_MODE:
+        return PredictionProcessor.ensemble_predictions(predictions)
+    return predictions[model_type]
+
+def validate_video_request(file: UploadFile, model_type: str,
+                           frame_rate: Optional[float], max_frames: int):
+    """Validate the parameters shared by the video detection endpoints."""
+    # Validate model type
+    validate_model_type(model_type)
+    
+    # Validate file type
+    if not file.content_type.startswith('video/'):
+        raise HTTPException(
+            status_code=400,
+            detail="File must be a video"
+        )
+    
+    # Validate parameters
+    if max_frames <= 0 or max_frames > 100:
+        raise HTTPException(
+            status_code=400,
+            detail="max_frames must be between 1 and 100"
+        )
+    
+    if frame_rate is not None and (frame_rate <= 0 or frame_rate > 60):
+        raise HTTPException(
+            status_code=400,
+            detail="frame_rate must be between 0 and 60 fps"
+        )
+
+async def save_video_upload(file: UploadFile, directory: Optional[str] = None) -> str:
+    """Stream a video upload to a temporary file, enforcing the size limit."""
+    try:
+        with metrics.time_stage("upload_read"):
+            return await save_upload_stream(
+                file,
+                suffix=get_upload_suffix(file.filename, file.content_type),
+                max_bytes=Config.get_file_size_limit_bytes(),
+                directory=directory
+            )
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
 @router.get("/")
 async def root():
@@ -40,7 +439,13 @@ async def root():
         "endpoints": {
             "/detect/image": "Detect deepfakes in images",
             "/detect/video": "Detect deepfakes in videos",
+            "/detect/video/stream": "Stream per-frame video verdicts as NDJSON or Server-Sent Events",
+            "/detect/batch": "Detect deepfakes in multiple images",
+            "/jobs/video": "Queue a video for background analysis",
+            "/jobs/{job_id}": "Poll a background job (/result for its result, /cancel to cancel it)",
             "/health": "Health check endpoint",
+            "/ready": "Readiness probe (ready after model warmup)",
+            "/metrics": "Prometheus metrics (per-stage latency, batch sizes, in-flight requests)",
             "/models": "List available models"
         }
     }
@@ -50,10 +455,40 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
+        "model": Config.get_model_id(),
         "device_info": get_device_info(),
-        "loaded_models": list(models.keys())
+        "loaded_models": get_loaded_classifiers(),
+        "classifier_backends": backbone.classifier_backends if backbone is not None else {},
+        "precision": backbone.precision if backbone is not None else None,
+        "inference_backend": backbone.backend_info if backbone is not None else None,
+        "scheduler": scheduler.get_stats() if scheduler is not None else None,
+        "admission": admission.get_admission_stats(),
+        "executors": get_executor_info(),
+        "embedding_cache": embedding_cache.get_stats() if embedding_cache is not None else None,
+        "jobs": job_manager.get_stats() if job_manager is not None else None
     }
 
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: request counts and latencies, per-stage timings and batch sizes."""
+    try:
+        body, content_type = metrics.generate_metrics()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return Response(content=body, media_type=content_type)
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once models are loaded and warmed up, 503 before."""
+    if not readiness["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", **readiness}
+        )
+    
+    return {"status": "ready", **readiness}
+
 @router.get("/models")
 async def list_models():
     """List available classifier models."""
@@ -75,34 +510,37 @@ async def list_models():
                 "output_format": "-1=Real, 1=Fake"
             }
         ],
-        "default_model": "knn"
+        "default_model": "knn",
+        "ensemble_mode": {
+            "name": Config.ALL_CLASSIFIERS_MODE,
+            "description": "Run knn, linear and svm on one shared embedding and take a majority vote",
+            "output_format": "0=Real, 1=Fake"
+        }
     }
 
-import base64
-import io
-from PIL import Image
-
 @router.post("/detect/image")
+@metrics.instrument("/detect/image")
 async def detect_image_deepfake(
     file: UploadFile = File(...),
-    model_type: str = Form(default="knn")
+    model_type: str = Form(default="knn"),
+    image_payload: str = Form(default=Config.DEFAULT_IMAGE_PAYLOAD),
+    response_format: str = Form(default="json")
 ):
     """
     Detect deepfakes in uploaded image.
     
     Args:
         file: Image file to analyze
-        model_type: Classifier type (knn, linear, svm)
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
+        image_payload: Image returned with the result (full, thumbnail, original or none)
+        response_format: json (base64 images) or msgpack (raw image bytes)
     
     Returns:
-        Prediction results with base64 encoded image
+        Prediction results with the requested image payload
     """
     # Validate model type
-    if model_type not in ['knn', 'linear', 'svm']:
-        raise HTTPException(
-            status_code=400, 
-            detail="Invalid model_type. Choose from: knn, linear, svm"
-        )
+    validate_model_type(model_type)
+    validate_response_options(image_payload, response_format)
     
     # Validate file type
     if not file.content_type.startswith('image/'):
@@ -112,172 +550,346 @@ async def detect_image_deepfake(
         )
     
     try:
-        # Read and process image
-        file_content = await file.read()
-        image = Image.open(io.BytesIO(file_content)).convert('RGB')
-        
-        # Convert image to base64
-        img_buffer = io.BytesIO()
-        image.save(img_buffer, format='JPEG')
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+        with metrics.time_stage("upload_read"):
+            file_content = await file.read()
         
         # Get model
-        model = get_model(model_type)
+        model = await load_model(model_type)
         
-        # Preprocess image
-        input_tensor = ImageProcessor.preprocess_image(image).to(device)
+        # Decode, preprocess and embed image (skipped on a cache hit); the
+        # full image is only decoded when it is re-encoded into the response
+        image, features = await embed_image(
+            model, file_content, keep_image=(image_payload == "full")
+        )
+        
+        # Build the image payload
+        with metrics.time_stage("encode"):
+            image_data = await run_cpu_bound(
+                encode_image_payload, file_content, image, image_payload,
+                as_base64=(response_format == "json")
+            )
         
         # Make prediction
-        with torch.no_grad():
-            prediction = model.forward(input_tensor).item()
+        predictions = await classify_features(model, features, model_type)
+        prediction = combine_predictions(predictions, model_type).item()
         
         # Process results
         result = PredictionProcessor.process_single_prediction(prediction, model_type)
         
-        return {
+        response_data = {
             "success": True,
             "filename": file.filename,
             "model_used": model_type,
-            "result": result,
-            "image_base64": img_base64
+            "result": result
         }
         
+        if image_data is not None:
+            response_data[get_image_field(response_format)] = image_data
+        
+        if model_type == Config.ALL_CLASSIFIERS_MODE:
+            response_data["classifier_results"] = {
+                name: PredictionProcessor.process_single_prediction(preds.item(), name)
+                for name, preds in predictions.items()
+            }
+        
+        return build_response(response_data, response_format)
+    
+    except HTTPException:
+        raise
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing image: {str(e)}")
 
-@router.post("/detect/video")
-async def detect_video_deepfake(
-    file: UploadFile = File(...),
-    model_type: str = Form(default="knn"),
-    frame_rate: Optional[float] = Form(default=None),
-    max_frames: int = Form(default=30)
-):
+async def classify_frames_until_settled(model: VITContrastiveHF, video_path: str, model_type: str,
+                                        frame_rate: Optional[float], max_frames: int
+                                        ) -> Tuple[list, Dict[str, torch.Tensor], List[int], bool]:
     """
-    Detect deepfakes in uploaded video by analyzing frames.
+    Decode and classify video frames in steps until the verdict is settled.
+    
+    Each step takes the fewest frames that could settle the majority verdict
+    (at least Config.VIDEO_EARLY_EXIT_MIN_CHUNK), so a clear-cut video stops
+    after about half of max_frames with the verdict the full analysis would
+    reach (see PredictionProcessor.get_settled_verdict). Near-duplicate
+    frames are not classified and vote with their representative.
+    
+    Returns:
+        Tuple of (frames classified, classifier predictions for them,
+        representative of every evaluated frame, whether analysis stopped
+        before max_frames)
+    """
+    frame_iter = VideoProcessor.skip_similar_frames(
+        VideoProcessor.iter_frames(video_path, frame_rate=frame_rate, max_frames=max_frames),
+        Config.FRAME_DEDUP_THRESHOLD
+    )
+    frames = []
+    representatives = []
+    fake_flags = []
+    chunk_predictions = []
+    fake_count = 0
+    verdict = None
+    
+    try:
+        while verdict is None:
+            step = max(
+                Config.VIDEO_EARLY_EXIT_MIN_CHUNK,
+                PredictionProcessor.get_frames_to_settle(fake_count, len(representatives), max_frames)
+            )
+            with metrics.time_stage("extract_frames"):
+                chunk = await run_blocking(list, itertools.islice(frame_iter, step))
+            if not chunk:
+                break
+            
+            new_frames = [frame for _, frame in chunk if frame is not None]
+            if new_frames:
+                with metrics.time_stage("frames_to_tensors"):
+                    frame_tensors = (await run_cpu_bound(VideoProcessor.frames_to_tensors, new_frames)).to(device)
+                
+                classifier_predictions = await run_classifiers(model, frame_tensors, model_type)
+                chunk_predictions.append(classifier_predictions)
+                fake_flags.extend(
+                    (combine_predictions(classifier_predictions, model_type).flatten() == 1).tolist()
+                )
+            
+            for _, frame in chunk:
+                if frame is not None:
+                    frames.append(frame)
+                representatives.append(len(frames) - 1)
+                fake_count += int(fake_flags[len(frames) - 1])
+            
+            if len(chunk) < step:
+                break  # The video ran out of frames
+            verdict = PredictionProcessor.get_settled_verdict(fake_count, len(representatives), max_frames)
+    finally:
+        try:
+            frame_iter.close()
+        except ValueError:
+            pass  # Still stepping on a worker thread; released when collected
+    
+    if not chunk_predictions:
+        return frames, {}, representatives, False
+    
+    classifier_predictions = {
+        name: torch.cat([predictions[name] for predictions in chunk_predictions])
+        for name in chunk_predictions[0]
+    }
+    stopped_early = verdict is not None and len(representatives) < max_frames
+    return frames, classifier_predictions, representatives, stopped_early
+
+def expand_predictions(predictions: Dict[str, torch.Tensor],
+                       representatives: List[int]) -> Dict[str, torch.Tensor]:
+    """Give every sampled frame the predictions of its representative classified frame."""
+    index = torch.as_tensor(representatives)
+    return {name: preds[index.to(preds.device)] for name, preds in predictions.items()}
+
+def get_duplicate_sources(representatives: List[int]) -> Dict[int, int]:
+    """Map the position of every skipped frame to the position of its representative."""
+    first_positions = {}
+    duplicates = {}
+    for position, representative in enumerate(representatives):
+        if representative in first_positions:
+            duplicates[position] = first_positions[representative]
+        else:
+            first_positions[representative] = position
+    return duplicates
+
+async def analyze_video(video_path: str, filename: Optional[str], model_type: str,
+                        frame_rate: Optional[float], max_frames: int,
+                        image_payload: str = "full", as_base64: bool = True,
+                        early_exit: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Extract frames from a stored video and classify them.
+    
+    Shared by /detect/video and the background job workers. Sampled frames
+    that are near-duplicates of the last classified frame (see
+    Config.FRAME_DEDUP_THRESHOLD) are not classified; they reuse the
+    prediction of that representative frame, and their entries in
+    individual_predictions and fake_frames carry "duplicate_of": the
+    position of the representative in individual_predictions (the same
+    numbering as fake_frames' frame_index).
     
     Args:
-        file: Video file to analyze
-        model_type: Classifier type (knn, linear, svm)
+        video_path: Path to the video file
+        filename: Original upload filename
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
         frame_rate: Frames per second to extract (None for adaptive)
         max_frames: Maximum number of frames to analyze
+        image_payload: Fake frame images returned (full, thumbnail or none)
+        as_base64: Encode fake frames as base64 strings instead of raw bytes
+        early_exit: Stop once the majority verdict is settled; the
+            percentages, counts and confidence then describe only the
+            frames evaluated (defaults to Config.VIDEO_EARLY_EXIT, off)
     
     Returns:
-        Prediction results with frame-by-frame analysis and base64 encoded fake frames
+        Response data with frame-by-frame analysis
     """
-    # Validate model type
-    if model_type not in ['knn', 'linear', 'svm']:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid model_type. Choose from: knn, linear, svm"
-        )
+    image_field = "image_base64" if as_base64 else "image_bytes"
+    if early_exit is None:
+        early_exit = Config.VIDEO_EARLY_EXIT
     
-    # Validate file type
-    if not file.content_type.startswith('video/'):
-        raise HTTPException(
-            status_code=400,
-            detail="File must be a video"
-        )
+    # Get model
+    model = await load_model(model_type)
     
-    # Validate parameters
-    if max_frames <= 0 or max_frames > 100:
-        raise HTTPException(
-            status_code=400,
-            detail="max_frames must be between 1 and 100"
+    admission.check_deadline("extract_frames")
+    stopped_early = False
+    if early_exit:
+        # Classify frames in steps, stopping once the verdict cannot change
+        frames, classifier_predictions, representatives, stopped_early = await classify_frames_until_settled(
+            model, video_path, model_type, frame_rate, max_frames
         )
+    else:
+        # Extract frames from video, keeping one frame of each run of near-duplicates
+        with metrics.time_stage("extract_frames"):
+            frames, representatives = await run_cpu_bound(
+                VideoProcessor.extract_distinct_frames,
+                video_path,
+                Config.FRAME_DEDUP_THRESHOLD,
+                frame_rate=frame_rate, 
+                max_frames=max_frames
+            )
     
-    if frame_rate is not None and (frame_rate <= 0 or frame_rate > 60):
+    if not frames:
         raise HTTPException(
             status_code=400,
-            detail="frame_rate must be between 0 and 60 fps"
+            detail="Could not extract frames from video"
         )
     
-    temp_file_path = None
+    metrics.observe_items("frames", len(representatives))
     
-    try:
-        # Save uploaded video to temporary file
-        file_content = await file.read()
-        temp_file_path = save_uploaded_file(file_content, suffix='.mp4')
-        
-        # Extract frames from video
-        frames = VideoProcessor.extract_frames(
-            temp_file_path, 
-            frame_rate=frame_rate, 
-            max_frames=max_frames
-        )
+    if not early_exit:
+        # Convert frames to tensors
+        with metrics.time_stage("frames_to_tensors"):
+            frame_tensors = (await run_cpu_bound(VideoProcessor.frames_to_tensors, frames)).to(device)
         
-        if not frames:
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract frames from video"
-            )
+        # Make predictions on all distinct frames
+        classifier_predictions = await run_classifiers(model, frame_tensors, model_type)
+    
+    duplicates = get_duplicate_sources(representatives)
+    if duplicates:
+        classifier_predictions = expand_predictions(classifier_predictions, representatives)
+    predictions = combine_predictions(classifier_predictions, model_type)
+    
+    # Process results
+    result = PredictionProcessor.process_batch_predictions(predictions, model_type)
+    for position, source in duplicates.items():
+        result['individual_predictions'][position]['duplicate_of'] = source
+    
+    # Prepare response data
+    response_data = {
+        "success": True,
+        "filename": filename,
+        "model_used": model_type,
+        "processing_info": {
+            "frames_extracted": len(representatives),
+            "frames_evaluated": len(representatives),
+            "frames_classified": len(frames),
+            "frames_skipped_similar": len(duplicates),
+            "frame_rate_used": frame_rate,
+            "max_frames_limit": max_frames,
+            "sampling_mode": Config.FRAME_SAMPLING_MODE,
+            "frame_dedup_threshold": Config.FRAME_DEDUP_THRESHOLD,
+            "early_exit": early_exit,
+            "stopped_early": stopped_early
+        },
+        "result": result
+    }
+    
+    if model_type == Config.ALL_CLASSIFIERS_MODE:
+        response_data["classifier_results"] = {
+            name: PredictionProcessor.process_batch_predictions(preds, name)
+            for name, preds in classifier_predictions.items()
+        }
+    
+    # If video is detected as fake, include the fake frames
+    if result.get('overall_prediction') == 'Fake' or result.get('likely_fake', False):
+        fake_frames = []
         
-        # Convert frames to tensors
-        frame_tensors = VideoProcessor.frames_to_tensors(frames).to(device)
+        # Get individual frame predictions from the processed result
+        individual_predictions = result.get('individual_predictions', [])
         
-        # Get model
-        model = get_model(model_type)
+        # Select frames predicted as fake
+        fake_indices = [
+            i for i, pred_data in enumerate(individual_predictions[:len(representatives)])
+            if pred_data.get('is_fake', False) or pred_data.get('prediction') == 'Fake'
+        ]
         
-        # Make predictions on all frames
-        with torch.no_grad():
-            predictions = model.forward(frame_tensors)
+        # Encode all fake frames in one executor call; a skipped frame
+        # points to its representative instead of repeating its image
+        encoded_indices = [i for i in fake_indices if i not in duplicates]
+        if image_payload == "none":
+            encoded_frames = [None] * len(encoded_indices)
+        else:
+            with metrics.time_stage("encode"):
+                encoded_frames = await run_cpu_bound(
+                    encode_image_payloads, [frames[representatives[i]] for i in encoded_indices],
+                    image_payload, as_base64=as_base64
+                )
+        encoded_by_index = dict(zip(encoded_indices, encoded_frames))
         
-        # Process results
-        result = PredictionProcessor.process_batch_predictions(predictions, model_type)
+        for i in fake_indices:
+            pred_data = individual_predictions[i]
+            fake_frame = {
+                "frame_index": i,
+                "prediction": pred_data.get('prediction', 'Unknown'),
+                "confidence": pred_data.get('confidence', 0.0),
+                "raw_prediction": pred_data.get('raw_prediction', 0)
+            }
+            if i in duplicates:
+                fake_frame["duplicate_of"] = duplicates[i]
+            elif encoded_by_index[i] is not None:
+                fake_frame[image_field] = encoded_by_index[i]
+            fake_frames.append(fake_frame)
         
-        # Prepare response data
-        response_data = {
-            "success": True,
-            "filename": file.filename,
-            "model_used": model_type,
-            "processing_info": {
-                "frames_extracted": len(frames),
-                "frame_rate_used": frame_rate,
-                "max_frames_limit": max_frames
-            },
-            "result": result
-        }
+        response_data["fake_frames"] = fake_frames
+        response_data["fake_frames_count"] = len(fake_frames)
+    
+    return response_data
+
+@router.post("/detect/video")
+@metrics.instrument("/detect/video")
+async def detect_video_deepfake(
+    file: UploadFile = File(...),
+    model_type: str = Form(default="knn"),
+    frame_rate: Optional[float] = Form(default=None),
+    max_frames: int = Form(default=30),
+    image_payload: str = Form(default=Config.DEFAULT_IMAGE_PAYLOAD),
+    response_format: str = Form(default="json"),
+    early_exit: bool = Form(default=Config.VIDEO_EARLY_EXIT)
+):
+    """
+    Detect deepfakes in uploaded video by analyzing frames.
+    
+    Args:
+        file: Video file to analyze
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
+        frame_rate: Frames per second to extract (None for adaptive)
+        max_frames: Maximum number of frames to analyze
+        image_payload: Fake frame images returned (full, thumbnail or none; original is treated as full)
+        response_format: json (base64 images) or msgpack (raw image bytes)
+        early_exit: Stop classifying frames once the majority verdict cannot change
+            (statistics then describe only the frames evaluated)
+    
+    Returns:
+        Prediction results with frame-by-frame analysis and the requested fake frame payloads
+    """
+    validate_video_request(file, model_type, frame_rate, max_frames)
+    validate_response_options(image_payload, response_format)
+    
+    temp_file_path = None
+    
+    try:
+        # Stream uploaded video to a temporary file, keeping its container suffix
+        temp_file_path = await save_video_upload(file)
         
-        # If video is detected as fake, include base64 encoded fake frames
-        if result.get('overall_prediction') == 'Fake' or result.get('likely_fake', False):
-            fake_frames_base64 = []
-            
-            # Get individual frame predictions from the processed result
-            individual_predictions = result.get('individual_predictions', [])
-            
-            for i, (frame, pred_data) in enumerate(zip(frames, individual_predictions)):
-                # Check if this frame is predicted as fake
-                if pred_data.get('is_fake', False) or pred_data.get('prediction') == 'Fake':
-                    # Convert PIL Image to base64
-                    if hasattr(frame, 'save'):  # PIL Image
-                        img_buffer = io.BytesIO()
-                        frame.save(img_buffer, format='JPEG')
-                        img_buffer.seek(0)
-                        frame_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-                    else:  # numpy array or other format
-                        # Convert to PIL Image first
-                        if hasattr(frame, 'shape') and len(frame.shape) == 3:  # numpy array
-                            pil_frame = Image.fromarray(frame.astype('uint8'))
-                        else:
-                            pil_frame = frame
-                        
-                        img_buffer = io.BytesIO()
-                        pil_frame.save(img_buffer, format='JPEG')
-                        img_buffer.seek(0)
-                        frame_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-                    
-                    fake_frames_base64.append({
-                        "frame_index": i,
-                        "prediction": pred_data.get('prediction', 'Unknown'),
-                        "confidence": pred_data.get('confidence', 0.0),
-                        "raw_prediction": pred_data.get('raw_prediction', 0),
-                        "image_base64": frame_base64
-                    })
-            
-            response_data["fake_frames"] = fake_frames_base64
-            response_data["fake_frames_count"] = len(fake_frames_base64)
+        response_data = await analyze_video(
+            temp_file_path, file.filename, model_type, frame_rate, max_frames,
+            image_payload=image_payload, as_base64=(response_format == "json"),
+            early_exit=early_exit
+        )
         
-        return response_data
+        return build_response(response_data, response_format)
+    
+    except HTTPException:
+        raise
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
@@ -287,80 +899,310 @@ async def detect_video_deepfake(
         if temp_file_path:
             cleanup_temp_file(temp_file_path)
 
+def format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """Serialize a streaming event as an NDJSON line or a Server-Sent Event."""
+    payload = json.dumps(event)
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+@router.post("/detect/video/stream")
+@metrics.instrument("/detect/video/stream")
+async def detect_video_deepfake_stream(
+    file: UploadFile = File(...),
+    model_type: str = Form(default="knn"),
+    frame_rate: Optional[float] = Form(default=None),
+    max_frames: int = Form(default=30),
+    stream_format: str = Form(default="ndjson"),
+    early_exit: bool = Form(default=Config.VIDEO_EARLY_EXIT)
+):
+    """
+    Detect deepfakes in uploaded video, streaming verdicts as frames are classified.
+    
+    Frames are decoded and classified in chunks of Config.STREAM_CHUNK_FRAMES.
+    Each chunk produces a "frames" event with per-frame verdicts; a final
+    "summary" event carries the same result as /detect/video (without
+    fake frame images). Near-duplicate frames are not classified; their
+    verdicts repeat the last classified frame. In "frames" events they
+    carry "duplicate_of_frame_index", the video frame index of that
+    frame; in the summary's individual_predictions they carry
+    "duplicate_of", its position in that list, as in /detect/video.
+    Failures after streaming starts produce an "error" event.
+    With early_exit, the stream ends after the chunk that settles the
+    majority verdict.
+    
+    Args:
+        file: Video file to analyze
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
+        frame_rate: Frames per second to extract (None for adaptive)
+        max_frames: Maximum number of frames to analyze
+        stream_format: ndjson (application/x-ndjson) or sse (text/event-stream)
+        early_exit: Stop classifying frames once the majority verdict cannot change
+            (statistics then describe only the frames evaluated)
+    
+    Returns:
+        Streaming response of prediction events
+    """
+    validate_video_request(file, model_type, frame_rate, max_frames)
+    
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(
+            status_code=400,
+            detail="stream_format must be ndjson or sse"
+        )
+    
+    temp_file_path = await save_video_upload(file)
+    
+    try:
+        model = await load_model(model_type)
+    except HTTPException:
+        cleanup_temp_file(temp_file_path)
+        raise
+    
+    async def event_stream():
+        chunks = VideoProcessor.iter_frame_chunks(
+            temp_file_path,
+            chunk_size=Config.STREAM_CHUNK_FRAMES,
+            frame_rate=frame_rate,
+            max_frames=max_frames,
+            dedup_threshold=Config.FRAME_DEDUP_THRESHOLD
+        )
+        chunk_predictions = []
+        chunk_index = 0
+        fake_count = 0
+        verdict = None
+        # Position, frame index and predictions of the last classified frame
+        representative = None
+        duplicates = {}
+        
+        try:
+            while True:
+                # Decode the next chunk of frames off the event loop
+                with metrics.time_stage("extract_frames"):
+                    chunk = await run_blocking(next, chunks, None)
+                if chunk is None:
+                    break
+                
+                # Near-duplicates of the last classified frame come as None
+                frame_indices = [index for index, _ in chunk]
+                new_frames = [frame for _, frame in chunk if frame is not None]
+                kept = [frame is not None for _, frame in chunk]
+                del chunk
+                
+                if new_frames:
+                    with metrics.time_stage("frames_to_tensors"):
+                        frame_tensors = (await run_cpu_bound(
+                            VideoProcessor.frames_to_tensors, new_frames
+                        )).to(device)
+                    del new_frames
+                    
+                    classifier_predictions = await run_classifiers(model, frame_tensors, model_type)
+                    new_predictions = iter(zip(
+                        combine_predictions(classifier_predictions, model_type).flatten().tolist(),
+                        *(preds.flatten().tolist() for preds in classifier_predictions.values())
+                    ))
+                
+                frame_results = []
+                chunk_values = []
+                offset = sum(len(p) for p in chunk_predictions)
+                for frame_index, is_kept in zip(frame_indices, kept):
+                    position = offset + len(chunk_values)
+                    if is_kept:
+                        prediction, *classifier_values = next(new_predictions)
+                        representative = (position, frame_index, prediction, classifier_values)
+                    else:
+                        duplicates[position] = representative[0]
+                    _, source_index, prediction, classifier_values = representative
+                    
+                    frame_result = {
+                        "frame_index": frame_index,
+                        **PredictionProcessor.process_single_prediction(prediction, model_type)
+                    }
+                    if not is_kept:
+                        frame_result["duplicate_of_frame_index"] = source_index
+                    if model_type == Config.ALL_CLASSIFIERS_MODE:
+                        frame_result["classifier_results"] = {
+                            name: PredictionProcessor.process_single_prediction(value, name)
+                            for name, value in zip(classifier_predictions, classifier_values)
+                        }
+                    frame_results.append(frame_result)
+                    chunk_values.append(prediction)
+                
+                predictions = torch.tensor(chunk_values)
+                chunk_predictions.append(predictions)
+                
+                yield format_stream_event({
+                    "type": "frames",
+                    "chunk_index": chunk_index,
+                    "frames": frame_results
+                }, stream_format)
+                chunk_index += 1
+                
+                if early_exit:
+                    fake_count += int((predictions.flatten() == 1).sum())
+                    evaluated = sum(len(p) for p in chunk_predictions)
+                    verdict = PredictionProcessor.get_settled_verdict(fake_count, evaluated, max_frames)
+                    if verdict is not None:
+                        break
+            
+            if not chunk_predictions:
+                yield format_stream_event({
+                    "type": "error",
+                    "detail": "Could not extract frames from video"
+                }, stream_format)
+                return
+            
+            all_predictions = torch.cat(chunk_predictions)
+            metrics.observe_items("frames", len(all_predictions))
+            result = PredictionProcessor.process_batch_predictions(all_predictions, model_type)
+            for position, source in duplicates.items():
+                result['individual_predictions'][position]['duplicate_of'] = source
+            yield format_stream_event({
+                "type": "summary",
+                "success": True,
+                "filename": file.filename,
+                "model_used": model_type,
+                "processing_info": {
+                    "frames_extracted": len(all_predictions),
+                    "frames_evaluated": len(all_predictions),
+                    "frames_classified": len(all_predictions) - len(duplicates),
+                    "frames_skipped_similar": len(duplicates),
+                    "frame_rate_used": frame_rate,
+                    "max_frames_limit": max_frames,
+                    "sampling_mode": Config.FRAME_SAMPLING_MODE,
+                    "frame_dedup_threshold": Config.FRAME_DEDUP_THRESHOLD,
+                    "chunks": chunk_index,
+                    "early_exit": early_exit,
+                    "stopped_early": verdict is not None and len(all_predictions) < max_frames
+                },
+                "result": result
+            }, stream_format)
+        
+        except Exception as e:
+            yield format_stream_event({
+                "type": "error",
+                "detail": f"Error processing video: {str(e)}"
+            }, stream_format)
+        
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                pass  # Still stepping on a worker thread; released when collected
+    
+    return StreamingResponse(
+        metrics.labelled_stream("/detect/video/stream", event_stream()),
+        media_type="text/event-stream" if stream_format == "sse" else "application/x-ndjson",
+        background=BackgroundTask(cleanup_temp_file, temp_file_path)
+    )
+
 @router.post("/detect/batch")
+@metrics.instrument("/detect/batch")
 async def detect_batch_images(
     files: list[UploadFile] = File(...),
-    model_type: str = Form(default="knn")
+    model_type: str = Form(default="knn"),
+    image_payload: str = Form(default=Config.DEFAULT_IMAGE_PAYLOAD),
+    response_format: str = Form(default="json")
 ):
     """
     Detect deepfakes in multiple images.
 
     Args:
         files: List of image files to analyze
-        model_type: Classifier type (knn, linear, svm)
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
+        image_payload: Images returned with the results (full, thumbnail, original or none)
+        response_format: json (base64 images) or msgpack (raw image bytes)
 
     Returns:
-        Batch prediction results with base64-encoded images
+        Batch prediction results with the requested image payloads
     """
-    if model_type not in ['knn', 'linear', 'svm']:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid model_type. Choose from: knn, linear, svm"
-        )
+    validate_model_type(model_type)
+    validate_response_options(image_payload, response_format)
 
-    if len(files) > 20:
+    if len(files) > Config.MAX_BATCH_FILES:
         raise HTTPException(
             status_code=400,
-            detail="Maximum 20 files allowed in batch processing"
+            detail=f"Maximum {Config.MAX_BATCH_FILES} files allowed in batch processing"
         )
 
-    results = []
+    results: List[Optional[Dict[str, Any]]] = [None] * len(files)
 
     try:
-        model = get_model(model_type)
+        model = await load_model(model_type)
 
-        for file in files:
+        # Read uploads; non-image files are reported without being decoded
+        file_indices = []
+        file_contents = []
+        for i, file in enumerate(files):
             if not file.content_type.startswith('image/'):
-                results.append({
+                results[i] = {
                     "filename": file.filename,
                     "success": False,
                     "error": "File is not an image"
-                })
+                }
                 continue
 
-            try:
-                file_content = await file.read()
+            file_indices.append(i)
+            with metrics.time_stage("upload_read"):
+                file_contents.append(await file.read())
 
-                # Load and convert image
-                image = Image.open(io.BytesIO(file_content)).convert('RGB')
+        # Decode in parallel and run one stacked forward for all valid images
+        embedded = await embed_images(
+            model, file_contents, keep_images=(image_payload == "full")
+        )
 
-                # Preprocess image
-                input_tensor = ImageProcessor.preprocess_image(image).to(device)
+        valid = []
+        for i, file_content, output in zip(file_indices, file_contents, embedded):
+            if isinstance(output, BaseException):
+                results[i] = {
+                    "filename": files[i].filename,
+                    "success": False,
+                    "error": str(output)
+                }
+            else:
+                valid.append((i, file_content, output))
 
-                # Predict
-                with torch.no_grad():
-                    prediction = model.forward(input_tensor).item()
+        if valid:
+            # Predict
+            features = torch.cat([image_features for _, _, (_, image_features) in valid])
+            predictions = await classify_features(model, features, model_type)
+            combined = combine_predictions(predictions, model_type).flatten().tolist()
 
-                result = PredictionProcessor.process_single_prediction(prediction, model_type)
+            # Build the image payloads in parallel
+            with metrics.time_stage("encode"):
+                encoded_images = await asyncio.gather(*[
+                    run_cpu_bound(
+                        encode_image_payload, file_content, image, image_payload,
+                        as_base64=(response_format == "json")
+                    )
+                    for _, file_content, (image, _) in valid
+                ], return_exceptions=True)
 
-                # Base64 encode the original image
-                buffered = io.BytesIO()
-                image.save(buffered, format="JPEG")
-                encoded_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
+            for row, ((i, _, _), encoded_image) in enumerate(zip(valid, encoded_images)):
+                if isinstance(encoded_image, BaseException):
+                    results[i] = {
+                        "filename": files[i].filename,
+                        "success": False,
+                        "error": str(encoded_image)
+                    }
+                    continue
 
-                results.append({
-                    "filename": file.filename,
+                file_result = {
+                    "filename": files[i].filename,
                     "success": True,
-                    "result": result,
-                    "image_base64": encoded_image
-                })
+                    "result": PredictionProcessor.process_single_prediction(combined[row], model_type)
+                }
 
-            except Exception as e:
-                results.append({
-                    "filename": file.filename,
-                    "success": False,
-                    "error": str(e)
-                })
+                if encoded_image is not None:
+                    file_result[get_image_field(response_format)] = encoded_image
+
+                if model_type == Config.ALL_CLASSIFIERS_MODE:
+                    file_result["classifier_results"] = {
+                        name: PredictionProcessor.process_single_prediction(preds.flatten()[row].item(), name)
+                        for name, preds in predictions.items()
+                    }
+
+                results[i] = file_result
 
         successful_results = [r for r in results if r['success']]
         if successful_results:
@@ -372,7 +1214,7 @@ async def detect_batch_images(
             total_count = 0
             fake_percentage = 0
 
-        return {
+        return build_response({
             "success": True,
             "model_used": model_type,
             "batch_summary": {
@@ -383,7 +1225,161 @@ async def detect_batch_images(
                 "fake_percentage": fake_percentage
             },
             "individual_results": results
-        }
+        }, response_format)
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in batch processing: {str(e)}")
+
+async def run_video_job(params: Dict[str, Any], input_path: str) -> Dict[str, Any]:
+    """Job runner for queued video analysis."""
+    # Jobs resumed at startup wait for the model rather than fail
+    await wait_until_loaded()
+    try:
+        with metrics.endpoint_label("/jobs/video"):
+            return await analyze_video(input_path, **params)
+    except HTTPException as e:
+        raise ValueError(e.detail)
+
+async def start_job_manager():
+    """Open the job store, recover unfinished jobs and start the job workers."""
+    global job_manager
+    store = JobStore(os.path.join(Config.JOB_STORAGE_DIR, "jobs.db"))
+    purged = store.purge_finished(time.time() - Config.JOB_RETENTION_HOURS * 3600)
+    if purged:
+        logger.info(f"Purged {purged} expired job(s)")
+    
+    job_manager = JobManager(
+        store,
+        runners={"video": run_video_job},
+        max_workers=Config.JOB_WORKERS,
+        max_queued=Config.JOB_MAX_QUEUED
+    )
+    await job_manager.start(requeue_running=Config.JOB_REQUEUE_ON_START)
+
+async def shutdown_job_manager():
+    """Stop the job workers; interrupted jobs are resumed on the next start."""
+    global job_manager
+    if job_manager is not None:
+        await job_manager.close()
+        job_manager.store.close()
+        job_manager = None
+
+def get_job_manager() -> JobManager:
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Job subsystem is not running")
+    return job_manager
+
+def get_job_or_404(job_id: str, include_result: bool = False) -> Dict[str, Any]:
+    job = get_job_manager().store.get(job_id, include_result=include_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+def format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public view of a stored job."""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "filename": job["filename"],
+        "params": job["params"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
+
+@router.post("/jobs/video", status_code=202)
+@metrics.instrument("/jobs/video", success_status=202)
+async def submit_video_job(
+    request: Request,
+    file: UploadFile = File(...),
+    model_type: str = Form(default="knn"),
+    frame_rate: Optional[float] = Form(default=None),
+    max_frames: int = Form(default=30),
+    image_payload: str = Form(default=Config.DEFAULT_IMAGE_PAYLOAD),
+    early_exit: bool = Form(default=Config.VIDEO_EARLY_EXIT)
+):
+    """
+    Queue a video for background analysis.
+    
+    Args:
+        file: Video file to analyze
+        model_type: Classifier type (knn, linear, svm, or all for every classifier)
+        frame_rate: Frames per second to extract (None for adaptive)
+        max_frames: Maximum number of frames to analyze
+        image_payload: Fake frame images stored with the result (full, thumbnail or none)
+        early_exit: Stop classifying frames once the majority verdict cannot change
+            (statistics then describe only the frames evaluated)
+    
+    Returns:
+        Job ID and URLs to poll for status and results
+    """
+    validate_video_request(file, model_type, frame_rate, max_frames)
+    validate_response_options(image_payload, "json")
+    manager = get_job_manager()
+    
+    # The upload is kept in the job directory until the job finishes
+    upload_dir = os.path.join(Config.JOB_STORAGE_DIR, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    input_path = await save_video_upload(file, directory=upload_dir)
+    
+    try:
+        job_id = manager.submit(
+            "video",
+            params={
+                "filename": file.filename,
+                "model_type": model_type,
+                "frame_rate": frame_rate,
+                "max_frames": max_frames,
+                "image_payload": image_payload,
+                "early_exit": early_exit
+            },
+            input_path=input_path,
+            filename=file.filename
+        )
+    except JobQueueFullError as e:
+        cleanup_temp_file(input_path)
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": str(request.url_for("get_job_status", job_id=job_id)),
+        "result_url": str(request.url_for("get_job_result", job_id=job_id))
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Get the status of a background job."""
+    return format_job(get_job_or_404(job_id))
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Get the result of a completed job.
+    
+    Returns 409 while the job is queued or running, or if it failed or was cancelled.
+    """
+    job = get_job_or_404(job_id, include_result=True)
+    if job["status"] != COMPLETED:
+        detail = f"Job is {job['status']}"
+        if job["status"] == FAILED and job["error"]:
+            detail += f": {job['error']}"
+        raise HTTPException(status_code=409, detail=detail)
+    
+    return job["result"]
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    get_job_or_404(job_id)
+    if not get_job_manager().cancel(job_id):
+        job = get_job_or_404(job_id)
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    
+    return format_job(get_job_or_404(job_id))
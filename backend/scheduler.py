@@ -0,0 +1,186 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import torch
+
+@dataclass
+class _PendingRequest:
+    """A tensor waiting to be included in the next batch."""
+    inputs: torch.Tensor
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def rows(self) -> int:
+        return self.inputs.shape[0]
+
+class InferenceScheduler:
+    """
+    Dynamic micro-batching scheduler for backbone inference.
+
+    Tensors submitted by concurrent requests are gathered until either
+    max_batch_size rows are pending or the oldest request has waited
+    max_wait_ms, then run through a single forward pass. Each caller
+    receives the slice of the output that corresponds to its input.
+    """
+
+    def __init__(self, forward_fn: Callable[[torch.Tensor], torch.Tensor],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        self.forward_fn = forward_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._pending: Deque[_PendingRequest] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Statistics
+        self._batches_run = 0
+        self._samples_processed = 0
+        self._requests_processed = 0
+        self._largest_batch = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+
+    async def submit(self, inputs: torch.Tensor) -> torch.Tensor:
+        """
+        Queue a tensor for batched inference and wait for its result.
+
+        Args:
+            inputs: Tensor of shape (batch_size, channels, height, width)
+
+        Returns:
+            Output rows of forward_fn for this request's inputs
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._pending.append(_PendingRequest(inputs, future))
+        self._wakeup.set()
+        return await future
+
+    def _ensure_worker(self):
+        """Start the batching task on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+
+        # Requests queued on a previous (closed) loop can never complete
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+
+        self._loop = loop
+        self._pending = deque()
+        self._wakeup = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Batching loop: wait for work, gather a batch and execute it."""
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Give concurrent requests a chance to join the batch
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while self._pending_rows() < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            await self._execute(self._take_batch())
+
+    def _pending_rows(self) -> int:
+        return sum(request.rows for request in self._pending)
+
+    def _take_batch(self) -> List[_PendingRequest]:
+        """Pop queued requests up to max_batch_size rows (at least one request)."""
+        batch = []
+        rows = 0
+        while self._pending:
+            request = self._pending[0]
+            if request.future.done():  # Caller went away
+                self._pending.popleft()
+                continue
+            if batch and rows + request.rows > self.max_batch_size:
+                break
+            batch.append(self._pending.popleft())
+            rows += request.rows
+        return batch
+
+    async def _execute(self, batch: List[_PendingRequest]):
+        """Run one forward pass for the batch and distribute the results."""
+        if not batch:
+            return
+
+        inputs = torch.cat([request.inputs for request in batch])
+        try:
+            outputs = await self._loop.run_in_executor(self.executor, self._forward, inputs)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        self._record_batch(len(batch), inputs.shape[0])
+
+        offset = 0
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(outputs[offset:offset + request.rows])
+            offset += request.rows
+
+    def _forward(self, inputs: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            return self.forward_fn(inputs)
+
+    def _record_batch(self, num_requests: int, batch_size: int):
+        self._batches_run += 1
+        self._requests_processed += num_requests
+        self._samples_processed += batch_size
+        self._largest_batch = max(self._largest_batch, batch_size)
+        self._batch_size_histogram[batch_size] = self._batch_size_histogram.get(batch_size, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and batch size statistics."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'queue_depth': len(self._pending),
+            'queued_samples': self._pending_rows(),
+            'batches_run': self._batches_run,
+            'requests_processed': self._requests_processed,
+            'samples_processed': self._samples_processed,
+            'average_batch_size': (
+                self._samples_processed / self._batches_run if self._batches_run else 0.0
+            ),
+            'largest_batch_size': self._largest_batch,
+            'batch_size_histogram': dict(sorted(self._batch_size_histogram.items()))
+        }
+
+    async def close(self):
+        """Stop the batching task and cancel requests still waiting."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending.clear()
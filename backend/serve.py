@@ -0,0 +1,251 @@
+"""
+Production launcher: load the model once, then fork the API workers.
+
+Running uvicorn with --workers spawns fresh interpreters, so every worker
+would load its own copy of the ViT and the classifier heads. This launcher
+loads them in the parent process and forks the workers afterwards; the
+weights are inherited copy-on-write and, since nothing writes to them
+during inference, every worker maps the same physical pages. Only the
+per-worker activations, caches and interpreter state add to the memory
+footprint.
+
+Each worker gets its own share of the CPU cores for torch intra-op threads
+(TORCH_THREADS_PER_WORKER, default cpu_count // workers) so concurrent
+forwards do not oversubscribe the machine.
+
+Usage (from the backend directory):
+    python serve.py --workers 4 --port 8000
+
+Set PROMETHEUS_MULTIPROC_DIR to an empty directory to aggregate /metrics
+over all workers; the launcher clears it on start.
+
+Forking is CPU-only: CUDA cannot be used in a child once the parent has
+initialised it, so on a GPU the launcher serves a single worker.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Dict, Optional
+
+import torch
+import uvicorn
+
+from config import Config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("serve")
+
+# A worker dying sooner than this after being forked is treated as a crash loop
+MIN_WORKER_UPTIME_S = 10.0
+
+def get_threads_per_worker(workers: int, threads: Optional[int] = None) -> int:
+    """torch intra-op threads per worker (an even share of the cores unless set)."""
+    threads = threads or Config.TORCH_THREADS_PER_WORKER
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def load_shared_model():
+    """
+    Load the backbone and the preloaded classifier heads in this process.
+
+    Returns:
+        The inference backend to re-attach in each worker. ONNX Runtime
+        sessions own thread pools that do not survive a fork, so an onnx
+        backend is detached here (its export stays cached) and rebuilt
+        after forking.
+    """
+    import routes
+
+    for name in Config.PRELOAD_CLASSIFIERS or [Config.DEFAULT_CLASSIFIER]:
+        routes.get_model(name)
+
+    backend = routes.backbone.backend_info['name']
+    if backend == 'onnx':
+        routes.backbone.set_backend('eager', Config.BACKEND_CACHE_DIR)
+    return backend
+
+def recover_jobs():
+    """Requeue jobs interrupted by the previous shutdown, once for all workers."""
+    from jobs import JobStore
+
+    store = JobStore(os.path.join(Config.JOB_STORAGE_DIR, "jobs.db"))
+    try:
+        recovered = store.requeue_running()
+    finally:
+        store.close()
+    if recovered:
+        logger.info(f"Requeued {recovered} interrupted job(s)")
+    # Workers (and restarted workers) must not requeue jobs running in a sibling
+    Config.JOB_REQUEUE_ON_START = False
+
+def run_worker(config: uvicorn.Config, sock, threads: int, backend: str):
+    """Serve requests in a forked worker until it is told to stop."""
+    import routes
+
+    torch.set_num_threads(threads)
+    if "EXECUTOR_WORKERS" not in os.environ:
+        Config.EXECUTOR_WORKERS = threads
+    if backend == 'onnx':
+        routes.backbone.set_backend(backend, Config.BACKEND_CACHE_DIR, Config.BACKEND_TOLERANCE)
+
+    uvicorn.Server(config).run(sockets=[sock])
+
+class WorkerSupervisor:
+    """Forks the workers and replaces any that exit unexpectedly."""
+
+    def __init__(self, config: uvicorn.Config, workers: int, threads: int, backend: str):
+        self.config = config
+        self.workers = workers
+        self.threads = threads
+        self.backend = backend
+        self.children: Dict[int, float] = {}  # pid -> fork time
+        self.stopping = False
+        self.sock = None
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                run_worker(self.config, self.sock, self.threads, self.backend)
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} failed")
+                exit_code = 1
+            finally:
+                # Skip the parent's atexit handlers and buffered state
+                os._exit(exit_code)
+
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid} ({self.threads} torch threads)")
+
+    def stop(self, signum=None, frame=None):
+        """Ask every worker to shut down gracefully."""
+        if not self.stopping:
+            logger.info("Stopping workers")
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        """
+        Run the workers until a shutdown signal or a crash loop.
+
+        Returns:
+            Process exit code
+        """
+        import metrics
+
+        self.sock = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        exit_code = 0
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started_at = self.children.pop(pid, None)
+            metrics.mark_process_dead(pid)
+            if started_at is None or self.stopping:
+                continue
+
+            uptime = time.monotonic() - started_at
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)} "
+                           f"after {uptime:.0f}s")
+            if uptime < MIN_WORKER_UPTIME_S:
+                logger.error("Worker crashed during startup; shutting down")
+                exit_code = 1
+                self.stop()
+            else:
+                self.spawn()
+
+        self.sock.close()
+        return exit_code
+
+def clear_metrics_dir():
+    """
+    Remove stale multiprocess metric files left by a previous run.
+
+    Must run before metrics is imported, which creates the parent's files.
+    """
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not metrics_dir:
+        return
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith(".db"):
+            os.remove(os.path.join(metrics_dir, name))
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from forked workers sharing one model copy")
+    parser.add_argument("--host", default=Config.HOST)
+    parser.add_argument("--port", type=int, default=Config.PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS)
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--log-level", default=Config.LOG_LEVEL)
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+
+    clear_metrics_dir()
+
+    workers = max(1, args.workers)
+    if workers > 1 and torch.cuda.is_available():
+        logger.warning("Forked workers cannot share a CUDA context; serving a single worker")
+        workers = 1
+
+    threads = get_threads_per_worker(workers, args.threads_per_worker)
+    # Set before loading so the parent never starts more threads than a worker will use
+    torch.set_num_threads(threads)
+
+    from main import app
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        access_log=not args.no_access_log
+    )
+
+    if workers == 1:
+        uvicorn.Server(config).run()
+        return
+
+    start_time = time.perf_counter()
+    try:
+        backend = load_shared_model()
+    except Exception as e:
+        detail = getattr(e, 'detail', str(e))
+        logger.error(f"Model loading failed: {detail}")
+        sys.exit(1)
+    logger.info(f"Model loaded in {time.perf_counter() - start_time:.1f}s; forking {workers} workers")
+
+    recover_jobs()
+
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers do not write to (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+    sys.exit(WorkerSupervisor(config, workers, threads, backend).run())
+
+if __name__ == "__main__":
+    main()
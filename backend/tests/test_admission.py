@@ -0,0 +1,39 @@
+import asyncio
+
+import admission
+from admission import EndpointLimiter
+
+def test_slot_handed_over_at_timeout_is_not_leaked(monkeypatch):
+    async def scenario():
+        limiter = EndpointLimiter("video", max_in_flight=1, max_queued=1)
+        assert await limiter.acquire(timeout=1) is None
+
+        # The holder releases in the same loop iteration as the waiter's timeout
+        async def wait_for(waiter, timeout):
+            limiter.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(admission.asyncio, "wait_for", wait_for)
+        reason = await limiter.acquire(timeout=1)
+        monkeypatch.undo()
+
+        assert reason is None
+        assert limiter.in_flight == 1 and limiter.queued == 0
+        limiter.release()
+        assert limiter.in_flight == 0
+        assert await limiter.acquire(timeout=1) is None
+
+    asyncio.run(scenario())
+
+def test_queue_timeout_and_full_queue():
+    async def scenario():
+        limiter = EndpointLimiter("image", max_in_flight=1, max_queued=1)
+        assert await limiter.acquire(timeout=1) is None
+        waiting = asyncio.create_task(limiter.acquire(timeout=0.05))
+        await asyncio.sleep(0)
+        assert await limiter.acquire(timeout=1) == 'queue_full'
+        assert await waiting == 'timeout'
+        limiter.release()
+        assert limiter.in_flight == 0 and limiter.queued == 0
+
+    asyncio.run(scenario())
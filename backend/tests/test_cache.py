@@ -0,0 +1,22 @@
+import torch
+
+from cache import EmbeddingCache
+
+def test_disk_tier_is_keyed_by_the_effective_model_configuration(tmp_path):
+    upload = b"same upload bytes"
+    embedding = torch.arange(4, dtype=torch.float32).view(1, 4)
+
+    writer = EmbeddingCache(max_bytes=1 << 20, signature="model|preprocessing", disk_dir=str(tmp_path))
+    keys, cached = writer.lookup_many([upload], "fp32|eager|cpu")
+    assert cached == [None]
+    writer.put_many([(keys[0], embedding)])
+
+    # A fresh process (empty memory tier) serving the same configuration
+    reader = EmbeddingCache(max_bytes=1 << 20, signature="model|preprocessing", disk_dir=str(tmp_path))
+    _, cached = reader.lookup_many([upload], "fp32|eager|cpu")
+    assert torch.equal(cached[0], embedding)
+
+    # ... or after a redeploy with another precision or backend
+    for model_signature in ("int8|eager|cpu", "fp32|onnx|cpu", "fp32|eager|cuda"):
+        _, cached = reader.lookup_many([upload], model_signature)
+        assert cached == [None]
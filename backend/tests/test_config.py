@@ -0,0 +1,12 @@
+from config import Config
+
+def test_unknown_frame_sampling_mode_falls_back_to_seek(monkeypatch):
+    monkeypatch.setattr(Config, "FRAME_SAMPLING_MODE", "fastest")
+    warning = Config.check_frame_sampling_mode()
+    assert "fastest" in warning
+    assert Config.FRAME_SAMPLING_MODE == "seek"
+
+def test_known_frame_sampling_mode_is_kept(monkeypatch):
+    monkeypatch.setattr(Config, "FRAME_SAMPLING_MODE", "grab")
+    assert Config.check_frame_sampling_mode() is None
+    assert Config.FRAME_SAMPLING_MODE == "grab"
@@ -0,0 +1,76 @@
+import itertools
+
+import pytest
+import torch
+
+from utils import PredictionProcessor
+
+def full_verdict(sequence):
+    predictions = torch.tensor(sequence, dtype=torch.long)
+    return PredictionProcessor.process_batch_predictions(predictions, 'linear')['overall_prediction']
+
+def settle(sequence, frame_budget):
+    """Classify frames one at a time until the verdict settles; returns (verdict, frames used)."""
+    fake_count = 0
+    for evaluated_count, prediction in enumerate(sequence, 1):
+        fake_count += prediction
+        verdict = PredictionProcessor.get_settled_verdict(fake_count, evaluated_count, frame_budget)
+        if verdict is not None:
+            return verdict, evaluated_count
+    return None, len(sequence)
+
+@pytest.mark.parametrize("frame_budget", range(1, 11))
+def test_settled_verdict_always_matches_all_frames(frame_budget):
+    # Every sequence up to the budget, including videos with fewer frames
+    for length in range(1, frame_budget + 1):
+        for sequence in itertools.product([0, 1], repeat=length):
+            verdict, _ = settle(sequence, frame_budget)
+            if verdict is not None:
+                assert verdict == full_verdict(list(sequence)), (frame_budget, sequence)
+            if length == frame_budget:
+                assert verdict is not None, sequence
+
+@pytest.mark.parametrize("frame_budget", range(1, 11))
+def test_frames_to_settle_is_a_lower_bound(frame_budget):
+    for evaluated_count in range(frame_budget):
+        for fake_count in range(evaluated_count + 1):
+            if PredictionProcessor.get_settled_verdict(fake_count, evaluated_count, frame_budget):
+                continue
+            frames = PredictionProcessor.get_frames_to_settle(fake_count, evaluated_count, frame_budget)
+            assert frames >= 1
+            # No outcome of fewer frames settles the verdict...
+            for extra in range(1, frames):
+                for extra_fake in range(extra + 1):
+                    assert PredictionProcessor.get_settled_verdict(
+                        fake_count + extra_fake, evaluated_count + extra, frame_budget) is None
+            # ...but some outcome of that many frames does
+            assert any(
+                PredictionProcessor.get_settled_verdict(
+                    fake_count + extra_fake, evaluated_count + frames, frame_budget) is not None
+                for extra_fake in range(frames + 1)
+            )
+
+def test_boundary_of_an_even_budget():
+    # 30 frames: 15 fake is a tie (Real), 16 fake is a majority
+    assert PredictionProcessor.get_settled_verdict(15, 15, 30) is None
+    assert PredictionProcessor.get_settled_verdict(16, 16, 30) == 'Fake'
+    assert PredictionProcessor.get_settled_verdict(15, 30, 30) == 'Real'
+    assert full_verdict([1] * 15 + [0] * 15) == 'Real'
+    assert full_verdict([1] * 16 + [0] * 14) == 'Fake'
+
+    # Real once the fake frames can reach at most a tie
+    assert PredictionProcessor.get_settled_verdict(0, 14, 30) is None
+    assert PredictionProcessor.get_settled_verdict(0, 15, 30) == 'Real'
+
+def test_boundary_of_an_odd_budget():
+    # 31 frames: 16 fake is a majority, 15 fake is not
+    assert PredictionProcessor.get_settled_verdict(15, 15, 31) is None
+    assert PredictionProcessor.get_settled_verdict(16, 16, 31) == 'Fake'
+    assert PredictionProcessor.get_settled_verdict(0, 15, 31) is None
+    assert PredictionProcessor.get_settled_verdict(0, 16, 31) == 'Real'
+
+def test_video_shorter_than_the_budget_is_not_settled_early():
+    # 10 of 30 frames decoded, all fake: fake over the 10 frames, not settled over the budget
+    verdict, _ = settle([1] * 10, 30)
+    assert verdict is None
+    assert full_verdict([1] * 10) == 'Fake'
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+import torch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes
+from config import Config
+from utils import VideoProcessor
+
+def solid_frame(value, size=224):
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+def indexed(frames):
+    return ((index, frame) for index, frame in enumerate(frames))
+
+def kept_indices(frames, threshold):
+    return [index for index, frame in VideoProcessor.skip_similar_frames(indexed(frames), threshold)
+            if frame is not None]
+
+def test_identical_frames_are_skipped():
+    frames = [solid_frame(100)] * 4
+    results = list(VideoProcessor.skip_similar_frames(indexed(frames), 2.0))
+    assert [index for index, _ in results] == [0, 1, 2, 3]
+    assert results[0][1] is frames[0]
+    assert all(frame is None for _, frame in results[1:])
+
+def test_shot_change_is_kept():
+    frames = [solid_frame(100), solid_frame(101), solid_frame(200), solid_frame(200)]
+    assert kept_indices(frames, 2.0) == [0, 2]
+
+def test_zero_threshold_keeps_every_frame():
+    frames = [solid_frame(100)] * 3
+    assert kept_indices(frames, 0) == [0, 1, 2]
+
+def test_drift_is_compared_against_the_last_kept_frame():
+    # Each step is below the threshold, but the drift adds up
+    frames = [solid_frame(100 + step) for step in range(6)]
+    assert kept_indices(frames, 2.5) == [0, 3]
+
+def test_duplicate_sources_and_expanded_predictions():
+    # Sampled frames 1 and 2 repeat classified frame 0, frame 4 repeats frame 1
+    representatives = [0, 0, 0, 1, 1, 2]
+    assert routes.get_duplicate_sources(representatives) == {1: 0, 2: 0, 4: 3}
+
+    predictions = {"knn": torch.tensor([1, 0, 1]), "svm": torch.tensor([0, 0, 1])}
+    expanded = routes.expand_predictions(predictions, representatives)
+    assert expanded["knn"].tolist() == [1, 1, 1, 0, 0, 1]
+    assert expanded["svm"].tolist() == [0, 0, 0, 0, 0, 1]
+
+# Sampled frames of the stand-in video: the duplicates of frame 20 straddle
+# the chunk boundary (chunks of 4)
+VIDEO = [(0, 0), (10, 0), (20, 200), (30, 200), (40, 200), (50, 0)]
+
+@pytest.fixture
+def stand_in_video(monkeypatch, tmp_path):
+    video_path = tmp_path / "video.mp4"
+    video_path.write_bytes(b"")
+
+    def iter_frames(video_path, frame_rate=None, max_frames=30, sampling_mode=None):
+        for index, value in VIDEO[:max_frames]:
+            yield index, solid_frame(value)
+
+    async def load_model(model_type):
+        return object()
+
+    async def run_classifiers(model, frame_tensors, model_type):
+        # Bright frames are fake
+        return {model_type: (frame_tensors.mean(dim=(1, 2, 3)) > 0).long()}
+
+    async def save_video_upload(file, directory=None):
+        return str(video_path)
+
+    monkeypatch.setattr(VideoProcessor, "iter_frames", iter_frames)
+    monkeypatch.setattr(routes, "load_model", load_model)
+    monkeypatch.setattr(routes, "run_classifiers", run_classifiers)
+    monkeypatch.setattr(routes, "save_video_upload", save_video_upload)
+    monkeypatch.setattr(Config, "FRAME_DEDUP_THRESHOLD", 2.0)
+    monkeypatch.setattr(Config, "STREAM_CHUNK_FRAMES", 4)
+    return str(video_path)
+
+def test_stream_maps_duplicates_to_frame_indices_and_positions(stand_in_video):
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    response = TestClient(app).post(
+        "/api/v1/detect/video/stream",
+        files={"file": ("video.mp4", b"", "video/mp4")},
+        data={"model_type": "knn", "max_frames": "6"}
+    )
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    frames = [frame for event in events if event["type"] == "frames" for frame in event["frames"]]
+    assert [frame["frame_index"] for frame in frames] == [0, 10, 20, 30, 40, 50]
+    assert {frame["frame_index"]: frame["duplicate_of_frame_index"]
+            for frame in frames if "duplicate_of_frame_index" in frame} == {10: 0, 30: 20, 40: 20}
+    assert [frame["prediction"] for frame in frames] == ["Real", "Real", "Fake", "Fake", "Fake", "Real"]
+
+    summary = events[-1]
+    assert summary["type"] == "summary"
+    individual = summary["result"]["individual_predictions"]
+    assert {position: prediction["duplicate_of"]
+            for position, prediction in enumerate(individual) if "duplicate_of" in prediction} == {1: 0, 3: 2, 4: 2}
+    assert summary["processing_info"]["frames_classified"] == 3
+    assert summary["processing_info"]["frames_skipped_similar"] == 3
+
+def test_analyze_video_maps_duplicates_to_positions(stand_in_video):
+    response = asyncio.run(routes.analyze_video(
+        stand_in_video, "video.mp4", "knn", None, 6, image_payload="none", early_exit=False
+    ))
+    individual = response["result"]["individual_predictions"]
+    assert [prediction["prediction"] for prediction in individual] == ["Real", "Real", "Fake", "Fake", "Fake", "Real"]
+    assert {position: prediction["duplicate_of"]
+            for position, prediction in enumerate(individual) if "duplicate_of" in prediction} == {1: 0, 3: 2, 4: 2}
+    assert response["processing_info"]["frames_classified"] == 3
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import OneClassSVM
+
+from heads import check_parity, convert_classifier
+
+HIDDEN_SIZE = 32
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(0)
+    features = rng.standard_normal((300, HIDDEN_SIZE)).astype(np.float32)
+    labels = (features[:, 0] + 0.5 * features[:, 1] > 0).astype(int)
+    return features, labels
+
+def fit_estimator(name, features, labels):
+    if name == "knn":
+        return KNeighborsClassifier(n_neighbors=5).fit(features, labels)
+    if name == "linear":
+        return LogisticRegression().fit(features, labels)
+    # As deployed: fitted on the fake class only
+    return OneClassSVM(kernel="poly", gamma="auto", nu=0.1).fit(features[labels == 1])
+
+@pytest.mark.parametrize("name", ["knn", "linear", "svm"])
+def test_torch_head_matches_sklearn(training_data, name):
+    estimator = fit_estimator(name, *training_data)
+    head = convert_classifier(estimator)
+
+    parity = check_parity(estimator, head)
+
+    assert parity["samples"] > 0
+    assert parity["mismatches"] == 0
+
+@pytest.mark.parametrize("name", ["knn", "linear", "svm"])
+def test_torch_head_matches_sklearn_on_training_data(training_data, name):
+    estimator = fit_estimator(name, *training_data)
+    head = convert_classifier(estimator)
+
+    parity = check_parity(estimator, head, training_data[0])
+
+    assert parity["mismatches"] == 0
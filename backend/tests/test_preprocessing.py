@@ -0,0 +1,92 @@
+import io
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from utils import CROP_SIZE, ImageProcessor, VideoProcessor, image_transform
+
+def reference_tensors(frames):
+    return torch.stack([image_transform(Image.fromarray(frame)) for frame in frames])
+
+@pytest.mark.parametrize("height,width", [
+    (CROP_SIZE, CROP_SIZE),
+    (480, 640),
+    (361, 479),  # odd margins round like CenterCrop
+    (720, 1280)
+])
+def test_frames_to_tensors_matches_image_transform(height, width):
+    rng = np.random.default_rng(height * width)
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+
+    batch = VideoProcessor.frames_to_tensors(frames)
+
+    assert batch.shape == (4, 3, CROP_SIZE, CROP_SIZE)
+    assert batch.dtype == torch.float32
+    torch.testing.assert_close(batch, reference_tensors(frames), rtol=0, atol=1e-5)
+
+@pytest.mark.parametrize("shapes", [
+    [(200, 300, 3)] * 2,  # smaller than the crop: padded by CenterCrop
+    [(480, 640, 3), (360, 640, 3)]  # mixed shapes
+])
+def test_frames_to_tensors_fallback_matches_image_transform(shapes):
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, shape, dtype=np.uint8) for shape in shapes]
+
+    torch.testing.assert_close(VideoProcessor.frames_to_tensors(frames), reference_tensors(frames),
+                               rtol=0, atol=1e-5)
+
+def encode(array, fmt, **options):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("fmt,options", [
+    ("JPEG", {"quality": 90}),
+    ("JPEG", {"quality": 90, "progressive": True}),
+    ("PNG", {}),
+    ("PNG", {"optimize": True}),
+    ("WEBP", {"quality": 90})
+])
+@pytest.mark.parametrize("height,width", [(600, 500), (CROP_SIZE, 301), (150, 400)])
+def test_center_crop_decode_matches_full_decode(fmt, options, height, width):
+    rng = np.random.default_rng(height + width)
+    # Smooth gradients plus noise, so lossy codecs keep detail in every row
+    rows = np.linspace(0, 255, height)[:, None, None]
+    cols = np.linspace(0, 255, width)[None, :, None]
+    array = (rows * 0.5 + cols * 0.5 + rng.integers(0, 32, (height, width, 3))).clip(0, 255).astype(np.uint8)
+    content = encode(array, fmt, **options)
+
+    full = ImageProcessor.load_from_bytes(content)
+    box = ImageProcessor.get_center_crop_box(*full.size)
+    expected = full.crop(box) if box is not None else full
+
+    cropped = ImageProcessor.load_center_crop(content)
+
+    assert cropped.mode == 'RGB'
+    assert np.array_equal(np.asarray(cropped), np.asarray(expected))
+
+def test_center_crop_decode_without_pillow_internals_decodes_everything(monkeypatch):
+    array = np.random.default_rng(1).integers(0, 256, (600, 500, 3), dtype=np.uint8)
+    content = encode(array, "PNG")
+    # Older Pillow tiles are plain tuples without named fields
+    original_open = Image.open
+
+    def open_with_plain_tiles(fp):
+        image = original_open(fp)
+        image.tile = [tuple(tile) for tile in image.tile]
+        return image
+
+    monkeypatch.setattr(Image, "open", open_with_plain_tiles)
+    cropped = ImageProcessor.load_center_crop(content)
+    assert np.array_equal(np.asarray(cropped), array[188:412, 138:362])
+
+@pytest.mark.parametrize("fmt,options", [("JPEG", {}), ("PNG", {})])
+def test_sequential_formats_stop_at_the_crop(fmt, options):
+    array = np.random.default_rng(2).integers(0, 256, (600, 500, 3), dtype=np.uint8)
+    image = Image.open(io.BytesIO(encode(array, fmt, **options)))
+
+    ImageProcessor._decode_top_rows(image, 412)
+
+    assert image.size == (500, 412)
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import routes
+
+@pytest.fixture
+def readiness(monkeypatch):
+    monkeypatch.setattr(routes, "backbone", None)
+    state = dict(routes.readiness)
+    yield routes.readiness
+    routes.readiness.clear()
+    routes.readiness.update(state)
+
+def test_failed_preload_recovers_on_a_later_load(readiness, monkeypatch):
+    def failing_get_model(classifier_type):
+        raise HTTPException(status_code=500, detail="Failed to load model: hub unreachable")
+
+    monkeypatch.setattr(routes, "get_model", failing_get_model)
+    routes.preload_models(["knn"], [1])
+    assert readiness["stage"] == "failed" and not readiness["ready"]
+    assert "hub unreachable" in readiness["error"]
+
+    with pytest.raises(HTTPException):
+        asyncio.run(routes.load_model("knn"))
+    assert readiness["stage"] == "failed"
+
+    model = object()
+    monkeypatch.setattr(routes, "get_model", lambda classifier_type: model)
+    assert asyncio.run(routes.load_model("knn")) is model
+    assert readiness["ready"] and readiness["stage"] == "ready"
+    assert readiness["error"] is None
+
+def test_detection_is_rejected_while_loading(readiness):
+    readiness.update(ready=False, stage="warming_up")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(routes.load_model("knn"))
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"]
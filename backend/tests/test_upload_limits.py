@@ -0,0 +1,51 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from admission import UPLOAD_OVERHEAD_BYTES, UploadLimitMiddleware
+from config import Config
+
+def make_client(monkeypatch, max_mb=1):
+    monkeypatch.setattr(Config, "MAX_FILE_SIZE_MB", max_mb)
+    app = FastAPI()
+    calls = []
+
+    @app.post("/api/v1/detect/image")
+    async def detect_image(file: UploadFile = File(...)):
+        calls.append(file.filename)
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadLimitMiddleware, prefix="/api/v1")
+    return TestClient(app), calls
+
+def test_upload_within_limit_reaches_route(monkeypatch):
+    client, calls = make_client(monkeypatch)
+    response = client.post("/api/v1/detect/image", files={"file": ("a.jpg", b"x" * 1000)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 1000}
+    assert calls == ["a.jpg"]
+
+def test_oversized_content_length_rejected_before_body(monkeypatch):
+    client, calls = make_client(monkeypatch)
+    limit = Config.get_file_size_limit_bytes() + UPLOAD_OVERHEAD_BYTES
+    response = client.post("/api/v1/detect/image", files={"file": ("a.jpg", b"x" * (limit + 1))})
+    assert response.status_code == 413
+    assert response.json()["error"] == "Upload too large"
+    assert calls == []
+
+def test_oversized_stream_cut_off_during_transfer(monkeypatch):
+    client, calls = make_client(monkeypatch)
+    chunk = b"x" * 16384
+    sent = []
+
+    def body():
+        # No Content-Length: the body arrives in chunks until it is cut off
+        for _ in range(200):
+            sent.append(len(chunk))
+            yield chunk
+
+    response = client.post(
+        "/api/v1/detect/image", content=body(),
+        headers={"content-type": "multipart/form-data; boundary=xyz"}
+    )
+    assert response.status_code == 413
+    assert calls == []
@@ -3,26 +3,50 @@ import cv2
 import numpy as np
 from PIL import Image
 from torchvision import transforms
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Iterator, Union
 import tempfile
+import base64
+import io
 import os
 from pathlib import Path
 
+from config import Config
+
 # Global device configuration
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
+# Image preprocessing parameters
+CROP_SIZE = 224
+IMAGE_MEAN = [0.485, 0.456, 0.406]
+IMAGE_STD = [0.229, 0.224, 0.225]
+
 # Image preprocessing transform
 image_transform = transforms.Compose([
-    transforms.CenterCrop(224),
+    transforms.CenterCrop(CROP_SIZE),
     transforms.ToTensor(),
-    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    transforms.Normalize(mean=IMAGE_MEAN, std=IMAGE_STD),
 ])
 
+# Side of the grayscale thumbnail compared to spot near-duplicate frames
+FRAME_SIGNATURE_SIZE = 32
+
+# Pillow errors raised when a JPEG decode stops before the end of the stream
+_EARLY_STOP_ERRORS = ("broken data stream", "image file is truncated")
+
+# Normalization constants shaped for (batch, channels, height, width) tensors
+_MEAN_TENSOR = torch.tensor(IMAGE_MEAN, dtype=torch.float32).view(1, 3, 1, 1)
+_STD_TENSOR = torch.tensor(IMAGE_STD, dtype=torch.float32).view(1, 3, 1, 1)
+
+def get_preprocessing_signature() -> str:
+    """Describe the preprocessing pipeline, so cached results are invalidated when it changes."""
+    return repr(image_transform)
+
 class VideoProcessor:
     """Utility class for processing videos and extracting frames."""
     
     @staticmethod
-    def extract_frames(video_path: str, frame_rate: Optional[float] = None, max_frames: int = 30) -> List[np.ndarray]:
+    def extract_frames(video_path: str, frame_rate: Optional[float] = None, max_frames: int = 30,
+                       sampling_mode: Optional[str] = None) -> List[np.ndarray]:
         """
         Extract frames from video at specified frame rate.
         
@@ -30,58 +54,276 @@ class VideoProcessor:
             video_path: Path to video file
             frame_rate: Frames per second to extract (None for original rate)
             max_frames: Maximum number of frames to extract
+            sampling_mode: How skipped frames are handled (seek, grab, sequential);
+                defaults to Config.FRAME_SAMPLING_MODE
             
         Returns:
             List of frames as numpy arrays
         """
+        return [
+            frame for _, frame in VideoProcessor.iter_frames(
+                video_path, frame_rate=frame_rate, max_frames=max_frames,
+                sampling_mode=sampling_mode
+            )
+        ]
+    
+    @staticmethod
+    def extract_distinct_frames(video_path: str, dedup_threshold: float,
+                                frame_rate: Optional[float] = None, max_frames: int = 30,
+                                sampling_mode: Optional[str] = None) -> Tuple[List[np.ndarray], List[int]]:
+        """
+        Extract frames like extract_frames, keeping only one of each run of near-duplicates.
+        
+        Args:
+            video_path: Path to video file
+            dedup_threshold: Signature difference below which a frame is a
+                duplicate of the last kept frame (see skip_similar_frames)
+            frame_rate: Frames per second to extract (None for original rate)
+            max_frames: Maximum number of frames to extract
+            sampling_mode: How skipped frames are handled (seek, grab, sequential);
+                defaults to Config.FRAME_SAMPLING_MODE
+            
+        Returns:
+            Tuple of (kept frames, position in the kept frames of the
+            representative of every sampled frame)
+        """
+        frames = []
+        representatives = []
+        sampled = VideoProcessor.iter_frames(
+            video_path, frame_rate=frame_rate, max_frames=max_frames, sampling_mode=sampling_mode
+        )
+        for _, frame in VideoProcessor.skip_similar_frames(sampled, dedup_threshold):
+            if frame is not None:
+                frames.append(frame)
+            representatives.append(len(frames) - 1)
+        return frames, representatives
+    
+    @staticmethod
+    def get_frame_signature(frame: np.ndarray) -> np.ndarray:
+        """Downscaled grayscale thumbnail of an RGB frame, cheap to compare."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        return cv2.resize(
+            gray, (FRAME_SIGNATURE_SIZE, FRAME_SIGNATURE_SIZE), interpolation=cv2.INTER_AREA
+        ).astype(np.float32)
+    
+    @staticmethod
+    def skip_similar_frames(frames: Iterator[Tuple[int, np.ndarray]], threshold: float
+                            ) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+        """
+        Drop frames that are near-duplicates of the last frame kept.
+        
+        Frames are compared by the mean absolute difference of their
+        signatures (0-255 grayscale levels). Comparing against the last kept
+        frame rather than the previous one lets slow drift add up until a
+        new frame is kept, while a shot change is always kept.
+        
+        Args:
+            frames: (frame index, RGB frame) tuples, e.g. from iter_frames
+            threshold: Difference below which a frame is dropped (0 keeps every frame)
+            
+        Yields:
+            (frame index, frame) tuples, with None instead of a dropped frame
+        """
+        reference = None
+        try:
+            for index, frame in frames:
+                if threshold > 0:
+                    signature = VideoProcessor.get_frame_signature(frame)
+                    if reference is not None and float(np.abs(signature - reference).mean()) < threshold:
+                        yield index, None
+                        continue
+                    reference = signature
+                yield index, frame
+        finally:
+            frames.close()
+    
+    @staticmethod
+    def iter_frames(video_path: str, frame_rate: Optional[float] = None, max_frames: int = 30,
+                    sampling_mode: Optional[str] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Lazily extract frames from video at specified frame rate.
+        
+        Sampling modes:
+        - seek: jump straight to each target frame (grabbing forward over short
+          gaps); falls back to grab when the container does not seek accurately
+        - grab: advance over skipped frames with grab() and only retrieve targets
+        - sequential: fully read every frame
+        
+        Args:
+            video_path: Path to video file
+            frame_rate: Frames per second to extract (None for original rate)
+            max_frames: Maximum number of frames to extract
+            sampling_mode: How skipped frames are handled (defaults to Config.FRAME_SAMPLING_MODE)
+            
+        Yields:
+            Tuples of (frame index, RGB frame as numpy array)
+        """
+        sampling_mode = sampling_mode or Config.FRAME_SAMPLING_MODE
+        if sampling_mode not in Config.FRAME_SAMPLING_MODES:
+            raise ValueError(f"Invalid sampling mode: {sampling_mode}")
+        
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
             raise ValueError(f"Could not open video file: {video_path}")
         
-        original_fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        frames = []
-        
-        if frame_rate is None:
-            # Extract frames at original rate but limit to max_frames
-            frame_interval = max(1, total_frames // max_frames)
-        else:
-            # Calculate frame interval based on desired frame rate
-            frame_interval = max(1, int(original_fps / frame_rate))
+        try:
+            original_fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            
+            if frame_rate is None:
+                # Extract frames at original rate but limit to max_frames
+                frame_interval = max(1, total_frames // max_frames)
+            else:
+                # Calculate frame interval based on desired frame rate
+                frame_interval = max(1, int(original_fps / frame_rate))
+            
+            if sampling_mode == 'seek' and total_frames > 0:
+                targets = list(range(0, total_frames, frame_interval))[:max_frames]
+                position = 0
+                
+                for extracted_count, target in enumerate(targets):
+                    if target - position >= Config.FRAME_SEEK_MIN_GAP:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                    else:
+                        while position < target and cap.grab():
+                            position += 1
+                    
+                    ret, frame = cap.read()
+                    
+                    if not ret or int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != target + 1:
+                        # Seeking is unreliable for this container; restart and
+                        # grab forward to the remaining targets instead
+                        cap.release()
+                        cap = cv2.VideoCapture(video_path)
+                        yield from VideoProcessor._grab_frames(
+                            cap, frame_interval, max_frames - extracted_count, start_frame=target
+                        )
+                        return
+                    
+                    position = target + 1
+                    yield target, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            
+            elif sampling_mode == 'sequential':
+                frame_count = 0
+                extracted_count = 0
+                
+                while cap.isOpened() and extracted_count < max_frames:
+                    ret, frame = cap.read()
+                    
+                    if not ret:
+                        break
+                    
+                    if frame_count % frame_interval == 0:
+                        # Convert BGR to RGB
+                        yield frame_count, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                        extracted_count += 1
+                    
+                    frame_count += 1
+            
+            else:
+                yield from VideoProcessor._grab_frames(cap, frame_interval, max_frames)
+        finally:
+            cap.release()
+    
+    @staticmethod
+    def iter_frame_chunks(video_path: str, chunk_size: int, frame_rate: Optional[float] = None,
+                          max_frames: int = 30, sampling_mode: Optional[str] = None,
+                          dedup_threshold: float = 0.0
+                          ) -> Iterator[List[Tuple[int, Optional[np.ndarray]]]]:
+        """
+        Lazily extract frames in chunks, so only one chunk is held in memory.
         
+        Args:
+            video_path: Path to video file
+            chunk_size: Number of frames per chunk
+            frame_rate: Frames per second to extract (None for original rate)
+            max_frames: Maximum number of frames to extract
+            sampling_mode: How skipped frames are handled (defaults to Config.FRAME_SAMPLING_MODE)
+            dedup_threshold: Replace near-duplicates of the last kept frame
+                by None (see skip_similar_frames; 0 keeps every frame)
+            
+        Yields:
+            Lists of (frame index, RGB frame) tuples
+        """
+        frames = VideoProcessor.skip_similar_frames(
+            VideoProcessor.iter_frames(
+                video_path, frame_rate=frame_rate, max_frames=max_frames, sampling_mode=sampling_mode
+            ),
+            dedup_threshold
+        )
+        try:
+            chunk = []
+            for indexed_frame in frames:
+                chunk.append(indexed_frame)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            frames.close()
+    
+    @staticmethod
+    def _grab_frames(cap: cv2.VideoCapture, frame_interval: int, max_frames: int,
+                     start_frame: int = 0) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield every frame_interval-th frame from start_frame, skipping others with grab()."""
         frame_count = 0
         extracted_count = 0
         
-        while cap.isOpened() and extracted_count < max_frames:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            if frame_count % frame_interval == 0:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(frame_rgb)
+        while extracted_count < max_frames and cap.grab():
+            if frame_count >= start_frame and frame_count % frame_interval == 0:
+                ret, frame = cap.retrieve()
+                
+                if not ret:
+                    break
+                
+                yield frame_count, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 extracted_count += 1
             
             frame_count += 1
-        
-        cap.release()
-        return frames
     
     @staticmethod
     def frames_to_tensors(frames: List[np.ndarray]) -> torch.Tensor:
         """
         Convert list of frames to batch tensor.
         
+        Frames sharing one shape are center-cropped by slicing and normalized
+        in a single vectorized pass into a preallocated tensor; the result
+        matches image_transform exactly. Mixed shapes or frames smaller than
+        the crop (which image_transform pads) use the per-frame PIL path.
+        
         Args:
             frames: List of frames as numpy arrays
             
         Returns:
             Batch tensor of shape (batch_size, channels, height, width)
         """
+        height, width = frames[0].shape[:2]
+        same_shape = all(frame.shape == frames[0].shape for frame in frames)
+        
+        if not same_shape or frames[0].ndim != 3 or frames[0].dtype != np.uint8 \
+                or height < CROP_SIZE or width < CROP_SIZE:
+            return VideoProcessor._frames_to_tensors_pil(frames)
+        
+        # Same offsets as transforms.CenterCrop
+        top = int(round((height - CROP_SIZE) / 2.0))
+        left = int(round((width - CROP_SIZE) / 2.0))
+        
+        crops = np.empty((len(frames), CROP_SIZE, CROP_SIZE, 3), dtype=np.uint8)
+        for i, frame in enumerate(frames):
+            crops[i] = frame[top:top + CROP_SIZE, left:left + CROP_SIZE]
+        
+        # Same operations as ToTensor + Normalize, applied to the whole batch
+        batch = torch.empty((len(frames), 3, CROP_SIZE, CROP_SIZE), dtype=torch.float32)
+        batch.copy_(torch.from_numpy(crops).permute(0, 3, 1, 2))
+        batch.div_(255)
+        batch.sub_(_MEAN_TENSOR).div_(_STD_TENSOR)
+        return batch
+    
+    @staticmethod
+    def _frames_to_tensors_pil(frames: List[np.ndarray]) -> torch.Tensor:
+        """Convert frames one at a time through PIL and image_transform."""
         tensors = []
         
         for frame in frames:
@@ -111,6 +353,130 @@ class ImageProcessor:
         """
         return image_transform(image).unsqueeze(0)
     
+    @staticmethod
+    def load_from_bytes(file_content: bytes) -> Image.Image:
+        """
+        Decode uploaded image bytes into an RGB PIL image.
+        
+        Args:
+            file_content: Encoded image bytes
+            
+        Returns:
+            PIL Image in RGB mode
+        """
+        return Image.open(io.BytesIO(file_content)).convert('RGB')
+    
+    @staticmethod
+    def load_thumbnail(file_content: bytes, size: int) -> Image.Image:
+        """
+        Decode uploaded image bytes as a thumbnail no larger than size on either side.
+        
+        JPEG images are decoded directly at a reduced scale (draft mode).
+        
+        Args:
+            file_content: Encoded image bytes
+            size: Maximum thumbnail width and height
+            
+        Returns:
+            RGB PIL Image thumbnail
+        """
+        image = Image.open(io.BytesIO(file_content))
+        image.draft('RGB', (size, size))
+        image = image.convert('RGB')
+        image.thumbnail((size, size))
+        return image
+    
+    @staticmethod
+    def get_center_crop_box(width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get the region kept by transforms.CenterCrop(CROP_SIZE).
+        
+        Returns:
+            (left, top, right, bottom) box, or None when the image is smaller
+            than the crop (CenterCrop pads it, so the whole image is needed)
+        """
+        if width < CROP_SIZE or height < CROP_SIZE:
+            return None
+        
+        top = int(round((height - CROP_SIZE) / 2.0))
+        left = int(round((width - CROP_SIZE) / 2.0))
+        return left, top, left + CROP_SIZE, top + CROP_SIZE
+    
+    @staticmethod
+    def load_center_crop(file_content: bytes) -> Image.Image:
+        """
+        Decode only the part of an uploaded image that the model sees.
+        
+        The crop box is computed from the header before decoding. Baseline
+        JPEG and non-interlaced PNG stop decoding at the bottom row of the
+        crop, and the color conversion only runs on the crop. The result is
+        identical to center-cropping the fully decoded RGB image.
+        
+        Args:
+            file_content: Encoded image bytes
+            
+        Returns:
+            RGB PIL Image of the center crop (or the whole image if it is
+            smaller than the crop)
+        """
+        image = Image.open(io.BytesIO(file_content))
+        box = ImageProcessor.get_center_crop_box(*image.size)
+        
+        if box is None:
+            return image.convert('RGB')
+        
+        ImageProcessor._decode_top_rows(image, box[3])
+        return image.crop(box).convert('RGB')
+    
+    @staticmethod
+    def _decode_top_rows(image: Image.Image, rows: int):
+        """Decode only the first rows of a sequentially coded image, if its format allows it."""
+        if len(image.tile) != 1 or rows >= image.height:
+            return
+        
+        tile = image.tile[0]
+        sequential = (
+            (tile[0] == 'jpeg' and not image.info.get('progressive') and not image.info.get('progression'))
+            or (tile[0] == 'zip' and not image.info.get('interlace'))
+        )
+        if not sequential or tuple(tile[1]) != (0, 0) + image.size:
+            return
+        
+        # Shortening the decode relies on Pillow internals (the named tile
+        # and the private size); without them the caller decodes everything
+        if not hasattr(image, '_size') or 'extents' not in getattr(tile, '_fields', ()):
+            return
+        
+        image.tile = [tile._replace(extents=(0, 0, image.width, rows))]
+        image._size = (image.width, rows)
+        try:
+            image.load()
+        except OSError as e:
+            # libjpeg reports the rows deliberately left unread as a broken
+            # stream; every requested row has been decoded at that point
+            if tile[0] != 'jpeg' or not str(e).startswith(_EARLY_STOP_ERRORS):
+                raise
+    
+    @staticmethod
+    def decode_and_preprocess(file_content: bytes,
+                              keep_image: bool = True) -> Tuple[Optional[Image.Image], torch.Tensor]:
+        """
+        Decode uploaded image bytes and preprocess them for model inference.
+        
+        Args:
+            file_content: Encoded image bytes
+            keep_image: Decode the full image and return it; otherwise only
+                the model's center crop is decoded and None is returned
+            
+        Returns:
+            Tuple of (decoded PIL Image or None, preprocessed tensor)
+        """
+        if not keep_image:
+            return None, ImageProcessor.preprocess_image(ImageProcessor.load_center_crop(file_content))
+        
+        image = ImageProcessor.load_from_bytes(file_content)
+        return image, ImageProcessor.preprocess_image(image)
+    
     @staticmethod
     def load_and_preprocess(image_path: str) -> torch.Tensor:
         """
@@ -122,7 +488,8 @@ class ImageProcessor:
         Returns:
             Preprocessed tensor
         """
-        image = Image.open(image_path).convert('RGB')
+        with open(image_path, 'rb') as image_file:
+            image = ImageProcessor.load_center_crop(image_file.read())
         return ImageProcessor.preprocess_image(image)
 
 class PredictionProcessor:
@@ -194,19 +561,194 @@ class PredictionProcessor:
             }
         }
 
-def save_uploaded_file(file_content: bytes, suffix: str = '') -> str:
+    @staticmethod
+    def get_settled_verdict(fake_count: int, evaluated_count: int, frame_budget: int) -> Optional[str]:
+        """
+        Get the video verdict if no remaining frame of the budget can flip it.
+        
+        process_batch_predictions calls a video fake when more than half of
+        its frames are fake. After evaluated_count of at most frame_budget
+        frames, that verdict is settled once the fake frames alone are a
+        majority of the budget, or once the fake frames could no longer
+        become one even if every remaining frame were fake. This curtailed
+        test never disagrees with the verdict over all frames, also when the
+        video yields fewer frames than the budget.
+        
+        Args:
+            fake_count: Frames classified as fake so far
+            evaluated_count: Frames classified so far
+            frame_budget: Most frames the full analysis would classify
+            
+        Returns:
+            'Fake' or 'Real' once settled, otherwise None
+        """
+        remaining = max(0, frame_budget - evaluated_count)
+        if 2 * fake_count > frame_budget:
+            return 'Fake'
+        if 2 * (fake_count + remaining) <= frame_budget:
+            return 'Real'
+        return None
+    
+    @staticmethod
+    def get_frames_to_settle(fake_count: int, evaluated_count: int, frame_budget: int) -> int:
+        """Fewest further frames after which get_settled_verdict could return a verdict."""
+        half = frame_budget // 2
+        to_fake = half + 1 - fake_count
+        to_real = fake_count + max(0, frame_budget - evaluated_count) - half
+        return max(1, min(to_fake, to_real))
+    
+    @staticmethod
+    def ensemble_predictions(predictions: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """
+        Combine predictions from several classifiers by majority vote.
+
+        Args:
+            predictions: Dictionary mapping classifier type to its predictions
+
+        Returns:
+            Tensor of combined predictions (0 = Real, 1 = Fake)
+        """
+        # Every classifier marks fake samples with 1 (svm uses -1 for real)
+        fake_votes = torch.stack([
+            (preds.flatten() == 1).long() for preds in predictions.values()
+        ]).sum(dim=0)
+        return (fake_votes * 2 > len(predictions)).long()
+
+def encode_image_bytes(image, format: str = 'JPEG') -> bytes:
+    """
+    Encode an image into a compressed image file.
+    
+    Args:
+        image: PIL Image or RGB numpy array
+        format: Output image format
+        
+    Returns:
+        Encoded image bytes
+    """
+    if not hasattr(image, 'save'):  # numpy array
+        image = Image.fromarray(image.astype('uint8'))
+    
+    img_buffer = io.BytesIO()
+    image.save(img_buffer, format=format)
+    return img_buffer.getvalue()
+
+def encode_image_base64(image, format: str = 'JPEG') -> str:
+    """
+    Encode an image as a base64 string.
+    
+    Args:
+        image: PIL Image or RGB numpy array
+        format: Output image format
+        
+    Returns:
+        Base64 encoded image
+    """
+    return base64.b64encode(encode_image_bytes(image, format)).decode('utf-8')
+
+def encode_image_payload(file_content: Optional[bytes], image=None, mode: str = 'full',
+                         as_base64: bool = True) -> Optional[Union[str, bytes]]:
+    """
+    Build the image payload returned alongside a prediction.
+    
+    Modes:
+    - full: the image re-encoded as JPEG
+    - thumbnail: a JPEG no larger than Config.THUMBNAIL_SIZE on either side
+    - original: the uploaded bytes unchanged (falls back to full without them)
+    - none: no payload
+    
+    Args:
+        file_content: Uploaded image bytes (None for video frames)
+        image: Already decoded PIL Image or RGB numpy array, if available
+        mode: Payload mode
+        as_base64: Return a base64 string instead of raw bytes
+        
+    Returns:
+        Encoded payload, or None when mode is none
+    """
+    if mode == 'none':
+        return None
+    
+    if mode == 'original' and file_content is not None:
+        data = file_content
+    else:
+        if image is None:
+            if mode == 'thumbnail':
+                image = ImageProcessor.load_thumbnail(file_content, Config.THUMBNAIL_SIZE)
+            else:
+                image = ImageProcessor.load_from_bytes(file_content)
+        elif mode == 'thumbnail':
+            image = Image.fromarray(image.astype('uint8')) if not hasattr(image, 'save') else image.copy()
+            image.thumbnail((Config.THUMBNAIL_SIZE, Config.THUMBNAIL_SIZE))
+        
+        data = encode_image_bytes(image)
+    
+    return base64.b64encode(data).decode('utf-8') if as_base64 else data
+
+def encode_image_payloads(images: List, mode: str = 'full',
+                          as_base64: bool = True) -> List[Optional[Union[str, bytes]]]:
+    """Build image payloads for several decoded images (e.g. video frames)."""
+    return [encode_image_payload(None, image, mode, as_base64) for image in images]
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+def get_upload_suffix(filename: Optional[str], content_type: Optional[str]) -> str:
     """
-    Save uploaded file content to temporary file.
+    Choose a temporary file suffix that preserves the upload's container format.
     
     Args:
-        file_content: File content as bytes
+        filename: Original upload filename
+        content_type: Upload content type
+        
+    Returns:
+        File extension suffix (e.g. '.webm')
+    """
+    suffix = Path(filename or '').suffix.lower()
+    if suffix[1:].isalnum():
+        return suffix
+    return Config.VIDEO_TYPE_SUFFIXES.get(content_type, '.mp4')
+
+async def save_upload_stream(upload, suffix: str = '', max_bytes: Optional[int] = None,
+                             directory: Optional[str] = None) -> str:
+    """
+    Stream an uploaded file to a temporary file chunk by chunk.
+    
+    Memory use stays constant regardless of the upload size.
+    
+    Args:
+        upload: FastAPI UploadFile
         suffix: File extension suffix
+        max_bytes: Maximum allowed size (None for unlimited)
+        directory: Directory for the file (None for the system temp directory)
         
     Returns:
         Path to temporary file
+        
+    Raises:
+        FileTooLargeError: If the upload exceeds max_bytes
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-        tmp_file.write(file_content)
+    limit_mb = max_bytes / (1024 * 1024) if max_bytes is not None else None
+    if max_bytes is not None and upload.size is not None and upload.size > max_bytes:
+        raise FileTooLargeError(f"File exceeds maximum size of {limit_mb:g} MB")
+    
+    total_bytes = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as tmp_file:
+        try:
+            while True:
+                chunk = await upload.read(Config.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                
+                total_bytes += len(chunk)
+                if max_bytes is not None and total_bytes > max_bytes:
+                    raise FileTooLargeError(f"File exceeds maximum size of {limit_mb:g} MB")
+                
+                tmp_file.write(chunk)
+        except BaseException:
+            tmp_file.close()
+            cleanup_temp_file(tmp_file.name)
+            raise
+        
         return tmp_file.name
 
 def cleanup_temp_file(file_path: str):